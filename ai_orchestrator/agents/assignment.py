@@ -1,16 +1,97 @@
 """Agent 3: Assignment Agent."""
+import asyncio
 import json
 from typing import Dict, Any, List
 try:
-    from ..models.llm import get_reasoning_model
+    from ..config import settings
+    from ..models.llm import get_reasoning_model, invoke_model
     from ..models.schemas import AssignmentOutput
     from ..prompts.agent_prompts import ASSIGNMENT_PROMPT
-    from ..tools.backend_tools import get_workspace_members, get_member_workload
+    from ..prompts.budget import PromptSection, estimate_tokens, fit_sections
+    from ..tools.backend_tools import get_workspace_members, fetch_member_workload, get_workspace_workloads
+    from ..tools.deadline import DeadlineExceeded, budget_below, current_deadline, degrade
 except ImportError:
-    from models.llm import get_reasoning_model
+    from config import settings
+    from models.llm import get_reasoning_model, invoke_model
     from models.schemas import AssignmentOutput
     from prompts.agent_prompts import ASSIGNMENT_PROMPT
-    from tools.backend_tools import get_workspace_members, get_member_workload
+    from prompts.budget import PromptSection, estimate_tokens, fit_sections
+    from tools.backend_tools import get_workspace_members, fetch_member_workload, get_workspace_workloads
+    from tools.deadline import DeadlineExceeded, budget_below, current_deadline, degrade
+
+
+async def collect_workloads(workspace_id: str, user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Collect member workloads within the configured stage deadline.
+    
+    In "per_member" mode lookups run concurrently, capped by
+    ASSIGNMENT_WORKLOAD_CONCURRENCY. In "bulk" mode all workloads come
+    from one task listing. Members whose lookup fails or misses the
+    deadline are left out of the result. Under a request deadline the
+    stage deadline is cut so DEADLINE_SKIP_LLM_MS remain for the
+    assignment call.
+    
+    Args:
+        workspace_id: The workspace ID
+        user_ids: Member user IDs
+    
+    Returns:
+        Dictionary mapping user ID to workload information
+    """
+    deadline = settings.assignment_workload_deadline_seconds
+    request_deadline = current_deadline()
+    if request_deadline is not None:
+        deadline = min(deadline, max(0.0, request_deadline.remaining() - settings.deadline_skip_llm_ms / 1000))
+    
+    if settings.assignment_workload_mode == "bulk":
+        try:
+            return await asyncio.wait_for(
+                get_workspace_workloads(workspace_id, user_ids),
+                timeout=deadline
+            )
+        except asyncio.TimeoutError:
+            print(f"Workload listing exceeded {deadline:.3f}s deadline")
+            degrade(None, "timeout:workloads")
+            return {}
+    
+    semaphore = asyncio.Semaphore(max(1, settings.assignment_workload_concurrency))
+    
+    async def lookup(user_id: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await fetch_member_workload(workspace_id, user_id)
+    
+    pending_by_user = {
+        asyncio.ensure_future(lookup(user_id)): user_id
+        for user_id in user_ids
+    }
+    if not pending_by_user:
+        return {}
+    
+    done, pending = await asyncio.wait(pending_by_user, timeout=deadline)
+    for future in pending:
+        future.cancel()
+    if pending:
+        print(f"Workload lookups for {len(pending)} members exceeded {deadline:.3f}s deadline")
+        degrade(None, "timeout:workloads")
+    
+    workloads = {}
+    for future in done:
+        if future.exception() is not None:
+            print(f"Error collecting member workload: {future.exception()}")
+            continue
+        workloads[pending_by_user[future]] = future.result()
+    return workloads
+
+
+def _summarize_members(omitted: List[Any]) -> str:
+    """One line standing in for members left out of the assignment prompt."""
+    loads = [c[2] for c in omitted if c[2] is not None]
+    parts = []
+    if loads:
+        parts.append(f"{len(loads)} with {min(loads)}-{max(loads)} tasks each")
+    if len(loads) < len(omitted):
+        parts.append(f"{len(omitted) - len(loads)} with unknown workload")
+    return f"- ...and {len(omitted)} more members ({', '.join(parts)})"
 
 
 async def assignment_agent(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -39,46 +120,95 @@ async def assignment_agent(state: Dict[str, Any]) -> Dict[str, Any]:
             ).dict()
         }
     
-    # Get workspace members
-    members = await get_workspace_members(workspace_id)
+    # Not enough of the request deadline left for the assignment call
+    if budget_below(state, settings.deadline_skip_llm_ms):
+        degrade(state, "fallback:assignment")
+        return {
+            **state,
+            "assignment": AssignmentOutput(
+                suggested_assignee_id=None,
+                candidate_assignees=[],
+                ai_assignment_reason="Skipped to meet the request deadline",
+                confidence=0.0
+            ).dict()
+        }
     
-    # Get workload for each member
-    workloads = {}
-    members_info = []
-    workloads_info = []
+    # Get workspace members
+    members = await get_workspace_members.ainvoke({"workspace_id": workspace_id})
     
+    # Get workload for each member (concurrently, within a deadline);
+    # skipped when the request deadline is close
+    user_ids = [str(m.get("_id", "")) for m in members if m.get("_id")]
+    if budget_below(state, settings.deadline_skip_optional_ms):
+        degrade(state, "skipped:workloads")
+        workloads = {}
+    else:
+        workloads = await collect_workloads(workspace_id, user_ids)
+    # One (member line, workload line, task count) entry per member
+    candidates = []
     for member in members:
         user_id = str(member.get("_id", ""))
         if not user_id:
             continue
         
-        workload = await get_member_workload(workspace_id, user_id)
-        workloads[user_id] = workload
-        
-        members_info.append(
-            f"- {member.get('name', 'Unknown')} (ID: {user_id}, Role: {member.get('role', 'crew')})"
-        )
-        workloads_info.append(
+        member_line = f"- {member.get('name', 'Unknown')} (ID: {user_id}, Role: {member.get('role', 'crew')})"
+        workload = workloads.get(user_id)
+        if workload is None:
+            candidates.append((member_line, f"- {member.get('name', 'Unknown')}: workload unknown", None))
+            continue
+        candidates.append((
+            member_line,
             f"- {member.get('name', 'Unknown')}: {workload.get('total_tasks', 0)} tasks "
-            f"({workload.get('todo', 0)} todo, {workload.get('in_progress', 0)} in progress)"
-        )
+            f"({workload.get('todo', 0)} todo, {workload.get('in_progress', 0)} in progress)",
+            workload.get("total_tasks", 0)
+        ))
+    
+    # Fit into the token budget: long descriptions are cut first, then large
+    # workspaces keep the least loaded members (unknown workloads last) and
+    # summarize the rest in one line
+    task_title = task_extraction.get("title", "Untitled Task")
+    fitted = fit_sections("assignment", [
+        PromptSection(
+            "task_description",
+            task_extraction.get("description", ""),
+            priority=1,
+            strategy="truncate",
+            min_tokens=200
+        ),
+        PromptSection(
+            "candidates",
+            candidates,
+            priority=2,
+            strategy="rank",
+            render=lambda c: f"{c[0]}\n{c[1]}",
+            scores=[-c[2] if c[2] is not None else float("-inf") for c in candidates],
+            summarize=_summarize_members
+        ),
+    ], template=ASSIGNMENT_PROMPT, reserved_tokens=estimate_tokens(task_title))
+    members_info = []
+    workloads_info = []
+    for candidate in fitted["candidates"]:
+        if isinstance(candidate, str):
+            members_info.append(candidate)
+            continue
+        members_info.append(candidate[0])
+        workloads_info.append(candidate[1])
     
     # Prepare prompt
     prompt = ASSIGNMENT_PROMPT.format_messages(
-        task_title=task_extraction.get("title", "Untitled Task"),
-        task_description=task_extraction.get("description", ""),
+        task_title=task_title,
+        task_description=fitted["task_description"],
         priority=task_extraction.get("suggested_priority", "P2"),
         task_type=task_extraction.get("task_type", "other"),
         members_info="\n".join(members_info),
         workloads_info="\n".join(workloads_info)
     )
     
-    # Call LLM
-    response = await llm.ainvoke(prompt)
-    content = response.content
-    
-    # Parse JSON response
+    # Call LLM and parse JSON response
     try:
+        response = await invoke_model(llm, prompt, agent="assignment")
+        content = response.content
+        
         # Try to extract JSON from markdown code blocks if present
         if "```json" in content:
             content = content.split("```json")[1].split("```")[0].strip()
@@ -87,8 +217,12 @@ async def assignment_agent(state: Dict[str, Any]) -> Dict[str, Any]:
         
         result_dict = json.loads(content)
         assignment = AssignmentOutput(**result_dict)
-    except (json.JSONDecodeError, ValueError) as e:
-        print(f"Error parsing assignment output: {e}")
+    except (json.JSONDecodeError, ValueError, DeadlineExceeded) as e:
+        if isinstance(e, DeadlineExceeded):
+            print(f"Assignment cut short: {e}")
+            degrade(state, "fallback:assignment")
+        else:
+            print(f"Error parsing assignment output: {e}")
         # Fallback: assign to first member or leave unassigned
         assignment = AssignmentOutput(
             suggested_assignee_id=None,
@@ -2,15 +2,21 @@
 import json
 from typing import Dict, Any
 try:
-    from ..models.llm import get_reasoning_model
+    from ..models.llm import get_reasoning_model, invoke_model
     from ..models.schemas import InsightsOutput
     from ..prompts.agent_prompts import INSIGHTS_PROMPT
     from ..tools.backend_tools import get_workspace_stats
+    from ..tools.context_gathering import ContextGatherer
+    from ..tools.workspace_stats import describe_open_load
+    from ..tools.deadline import DeadlineExceeded, degrade
 except ImportError:
-    from models.llm import get_reasoning_model
+    from models.llm import get_reasoning_model, invoke_model
     from models.schemas import InsightsOutput
     from prompts.agent_prompts import INSIGHTS_PROMPT
     from tools.backend_tools import get_workspace_stats
+    from tools.context_gathering import ContextGatherer
+    from tools.workspace_stats import describe_open_load
+    from tools.deadline import DeadlineExceeded, degrade
 
 
 async def insights_agent(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -26,20 +32,25 @@ async def insights_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     llm = get_reasoning_model()
     workspace_id = state.get("workspace_id")
     
-    # Get workspace stats
-    stats = await get_workspace_stats(workspace_id)
+    # Get workspace stats (skipped when the request deadline is close)
+    gatherer = ContextGatherer("insights")
+    gatherer.start("workspace_stats", lambda: get_workspace_stats(workspace_id), fallback={}, optional=True)
+    stats = (await gatherer.results())["workspace_stats"]
     
     # Format stats for prompt
     workspace_stats = f"""
     Total Tasks: {stats.get('total_tasks', 0)}
+    Open Tasks: {stats.get('open_tasks', 0)}
+    Overdue Tasks: {stats.get('overdue_tasks', 0)}
     Tasks by Status: {stats.get('tasks_by_status', {})}
     Tasks by Priority: {stats.get('tasks_by_priority', {})}
+    Priority by Status: {stats.get('priority_by_status', {})}
     Total Members: {stats.get('total_members', 0)}
     Members by Role: {stats.get('members_by_role', {})}
     """
     
     task_distribution = str(stats.get('tasks_by_status', {}))
-    member_activity = str(stats.get('members_by_role', {}))
+    member_activity = f"{stats.get('members_by_role', {})}\n{describe_open_load(stats)}"
     
     # Prepare prompt
     prompt = INSIGHTS_PROMPT.format_messages(
@@ -48,12 +59,11 @@ async def insights_agent(state: Dict[str, Any]) -> Dict[str, Any]:
         member_activity=member_activity
     )
     
-    # Call LLM
-    response = await llm.ainvoke(prompt)
-    content = response.content
-    
-    # Parse JSON response
+    # Call LLM and parse JSON response
     try:
+        response = await invoke_model(llm, prompt, agent="insights")
+        content = response.content
+        
         # Try to extract JSON from markdown code blocks if present
         if "```json" in content:
             content = content.split("```json")[1].split("```")[0].strip()
@@ -62,8 +72,12 @@ async def insights_agent(state: Dict[str, Any]) -> Dict[str, Any]:
         
         result_dict = json.loads(content)
         insights = InsightsOutput(**result_dict)
-    except (json.JSONDecodeError, ValueError) as e:
-        print(f"Error parsing insights output: {e}")
+    except (json.JSONDecodeError, ValueError, DeadlineExceeded) as e:
+        if isinstance(e, DeadlineExceeded):
+            print(f"Insights cut short: {e}")
+            degrade(state, "fallback:insights")
+        else:
+            print(f"Error parsing insights output: {e}")
         # Fallback
         insights = InsightsOutput(
             summary="Workspace analysis completed",
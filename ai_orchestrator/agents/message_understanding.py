@@ -1,14 +1,133 @@
 """Agent 1: Message Understanding Agent."""
+import asyncio
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Awaitable, Callable, List, Sequence, Tuple
+from langchain_core.messages import AIMessage, BaseMessage
 try:
-    from ..models.llm import get_classification_model
+    from ..config import settings
+    from ..models.batching import MicroBatcher, register_batcher
+    from ..models.governor import llm_governor
+    from ..models.llm import CLASSIFICATION_TEMPERATURE, get_first_tier_model, invoke_cascade
     from ..models.schemas import MessageUnderstandingOutput
-    from ..prompts.agent_prompts import MESSAGE_UNDERSTANDING_PROMPT
+    from .prefilter import log_outcome
+    from ..prompts.agent_prompts import MESSAGE_UNDERSTANDING_PROMPT, MESSAGE_UNDERSTANDING_BATCH_PROMPT
+    from ..prompts.budget import fit_message_context
+    from ..tools.deadline import DeadlineExceeded, degrade
 except ImportError:
-    from models.llm import get_classification_model
+    from config import settings
+    from models.batching import MicroBatcher, register_batcher
+    from models.governor import llm_governor
+    from models.llm import CLASSIFICATION_TEMPERATURE, get_first_tier_model, invoke_cascade
     from models.schemas import MessageUnderstandingOutput
-    from prompts.agent_prompts import MESSAGE_UNDERSTANDING_PROMPT
+    from agents.prefilter import log_outcome
+    from prompts.agent_prompts import MESSAGE_UNDERSTANDING_PROMPT, MESSAGE_UNDERSTANDING_BATCH_PROMPT
+    from prompts.budget import fit_message_context
+    from tools.deadline import DeadlineExceeded, degrade
+
+
+def _message_fields(state: Dict[str, Any]) -> Dict[str, str]:
+    """Prompt fields describing the message in state, fitted to the agent's token budget."""
+    message_text, thread_context = fit_message_context(
+        "message_understanding",
+        MESSAGE_UNDERSTANDING_PROMPT,
+        state.get("message_text", ""),
+        state.get("thread_context", "None")
+    )
+    return {
+        "message_text": message_text,
+        "sender_name": state.get("sender_name", "Unknown"),
+        "channel_name": state.get("channel_name", "Unknown"),
+        "thread_context": thread_context
+    }
+
+
+async def _classify_batch(items: List[Dict[str, str]]) -> List[str]:
+    """
+    Classify several messages with one LLM call.
+    
+    Returns one JSON string per item (the same shape a single-message
+    call produces). Items missing or invalid in the batched answer are
+    classified individually.
+    """
+    llm = get_first_tier_model("message_understanding", CLASSIFICATION_TEMPERATURE)
+    if len(items) == 1:
+        response = await llm_governor.invoke(llm, MESSAGE_UNDERSTANDING_PROMPT.format_messages(**items[0]))
+        return [response.content]
+    
+    messages = "\n\n".join(
+        f"[{i}] Message: {item['message_text']}\n"
+        f"Sender: {item['sender_name']}\n"
+        f"Channel: {item['channel_name']}\n"
+        f"Thread Context: {item['thread_context']}"
+        for i, item in enumerate(items)
+    )
+    prompt = MESSAGE_UNDERSTANDING_BATCH_PROMPT.format_messages(count=len(items), messages=messages)
+    response = await llm_governor.invoke(llm, prompt)
+    content = response.content
+    
+    results: List[Any] = [None] * len(items)
+    try:
+        if "```json" in content:
+            content = content.split("```json")[1].split("```")[0].strip()
+        elif "```" in content:
+            content = content.split("```")[1].split("```")[0].strip()
+        parsed = json.loads(content)
+    except (json.JSONDecodeError, ValueError) as e:
+        print(f"Error parsing batched message understanding output: {e}")
+        parsed = []
+    
+    # One bad entry must not discard the valid ones around it
+    for position, entry in enumerate(parsed if isinstance(parsed, list) else []):
+        if not isinstance(entry, dict):
+            continue
+        index = entry.pop("index", position)
+        if not (isinstance(index, int) and 0 <= index < len(items) and results[index] is None):
+            continue
+        try:
+            MessageUnderstandingOutput(**entry)
+        except (ValueError, TypeError) as e:
+            print(f"Error parsing batched message understanding entry {index}: {e}")
+            continue
+        results[index] = json.dumps(entry)
+    
+    missing = [i for i, result in enumerate(results) if result is None]
+    singles = await asyncio.gather(*(
+        llm_governor.invoke(llm, MESSAGE_UNDERSTANDING_PROMPT.format_messages(**items[i]))
+        for i in missing
+    ))
+    for i, single in zip(missing, singles):
+        results[i] = single.content
+    return results
+
+
+message_batcher = register_batcher(MicroBatcher(
+    "message_understanding",
+    _classify_batch,
+    max_batch_size=settings.message_batch_max_size,
+    window_seconds=settings.message_batch_window_ms / 1000
+))
+
+
+def _batched_call(fields: Dict[str, str]) -> Callable[[Sequence[BaseMessage]], Awaitable[BaseMessage]]:
+    """invoke_model call that goes through the micro-batcher."""
+    async def call(prompt: Sequence[BaseMessage]) -> BaseMessage:
+        return AIMessage(content=await message_batcher.submit(fields))
+    return call
+
+
+def _parse_understanding(content: str) -> Tuple[MessageUnderstandingOutput, float]:
+    """Parse a classification from model output (plain or fenced JSON)."""
+    # Try to extract JSON from markdown code blocks if present
+    if "```json" in content:
+        content = content.split("```json")[1].split("```")[0].strip()
+    elif "```" in content:
+        content = content.split("```")[1].split("```")[0].strip()
+    
+    result_dict = json.loads(content)
+    if not isinstance(result_dict, dict):
+        raise ValueError("expected a JSON object")
+    understanding = MessageUnderstandingOutput(**result_dict)
+    return understanding, understanding.confidence
 
 
 async def message_understanding_agent(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -24,32 +143,29 @@ async def message_understanding_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     Output state keys:
         - message_understanding: MessageUnderstandingOutput
     """
-    llm = get_classification_model()
-    
     # Prepare prompt
-    prompt = MESSAGE_UNDERSTANDING_PROMPT.format_messages(
-        message_text=state.get("message_text", ""),
-        sender_name=state.get("sender_name", "Unknown"),
-        channel_name=state.get("channel_name", "Unknown"),
-        thread_context=state.get("thread_context", "None")
-    )
-    
-    # Call LLM
-    response = await llm.ainvoke(prompt)
-    content = response.content
+    fields = _message_fields(state)
+    prompt = MESSAGE_UNDERSTANDING_PROMPT.format_messages(**fields)
     
-    # Parse JSON response
+    # Call LLM (fast model first when cascading; micro-batched with
+    # concurrent messages when enabled)
+    call = _batched_call(fields) if settings.message_batch_enabled else None
     try:
-        # Try to extract JSON from markdown code blocks if present
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0].strip()
-        
-        result_dict = json.loads(content)
-        understanding = MessageUnderstandingOutput(**result_dict)
-    except (json.JSONDecodeError, ValueError) as e:
-        print(f"Error parsing message understanding output: {e}")
+        understanding = await invoke_cascade(
+            prompt,
+            "message_understanding",
+            _parse_understanding,
+            temperature=CLASSIFICATION_TEMPERATURE,
+            call=call
+        )
+        # Training data for the local pre-filter
+        await log_outcome(state.get("message_text", ""), understanding.is_task_candidate)
+    except (json.JSONDecodeError, ValueError, DeadlineExceeded) as e:
+        if isinstance(e, DeadlineExceeded):
+            print(f"Message understanding cut short: {e}")
+            degrade(state, "fallback:message_understanding")
+        else:
+            print(f"Error parsing message understanding output: {e}")
         # Fallback to default
         understanding = MessageUnderstandingOutput(
             is_task_candidate=False,
@@ -0,0 +1,249 @@
+"""Agent 0: Local pre-filter that skips the LLM for obvious non-task messages."""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+try:
+    from ..config import settings
+    from ..metrics import register_metrics
+    from ..models.schemas import MessageUnderstandingOutput
+except ImportError:
+    from config import settings
+    from metrics import register_metrics
+    from models.schemas import MessageUnderstandingOutput
+
+
+# Whole-message acknowledgements, greetings and reactions (after normalization)
+_NON_ACTIONABLE = {
+    "ok", "okay", "k", "kk", "ok thanks", "okay thanks", "ok thank you", "thanks", "thank you",
+    "thx", "ty", "tysm", "cool", "nice", "great", "awesome", "perfect", "sounds good", "got it",
+    "sure", "yes", "yep", "yeah", "no", "nope", "lol", "lmao", "haha", "hahaha", "np",
+    "no problem", "no worries", "will do", "done", "noted", "hi", "hello", "hey", "hey all",
+    "good morning", "morning", "gm", "good night", "gn", "bye", "see you", "brb", "+1",
+    "agreed", "same", "makes sense", "love it", "congrats", "welcome",
+}
+
+# Cues that a message may carry an action item; these always go to the LLM
+_TASK_CUES = re.compile(
+    r"\b(please|pls|can you|could you|need(s|ed)? to|have to|must|should|todo|to-do|fix|bug|"
+    r"broken|error|crash|deploy|review|deadline|due|asap|urgent|by (mon|tue|wed|thu|fri|sat|sun|tomorrow|eod|eow))",
+    re.IGNORECASE
+)
+_WORDS = re.compile(r"\w+")
+
+_stats = {"messages": 0, "skipped_by_rule": 0, "skipped_by_model": 0, "passed": 0}
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_WORDS.findall(text.casefold()))
+
+
+def _features(text: str, dim: int) -> Dict[int, float]:
+    """Signed, hashed word 1-2 grams and character 3-grams, L2-normalized."""
+    words = _WORDS.findall(text.casefold())
+    grams = [f"w:{w}" for w in words]
+    grams += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    padded = f" {' '.join(words)} "
+    grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+
+    features: Dict[int, float] = {}
+    for gram in grams:
+        h = zlib.crc32(gram.encode("utf-8"))
+        index = h % dim
+        features[index] = features.get(index, 0.0) + (1.0 if h & 0x80000000 else -1.0)
+    norm = math.sqrt(sum(v * v for v in features.values())) or 1.0
+    return {i: v / norm for i, v in features.items() if v}
+
+
+class HashedLinearModel:
+    """Logistic regression over hashed n-gram features."""
+
+    def __init__(self, dim: int = 2 ** 18, bias: float = 0.0, weights: Optional[Dict[int, float]] = None):
+        self.dim = dim
+        self.bias = bias
+        self.weights: Dict[int, float] = weights or {}
+
+    def predict(self, text: str) -> float:
+        """Probability that the message is a task candidate."""
+        z = self.bias + sum(self.weights.get(i, 0.0) * v for i, v in _features(text, self.dim).items())
+        return 1.0 / (1.0 + math.exp(-max(min(z, 35.0), -35.0)))
+
+    def fit(
+        self,
+        examples: List[Tuple[str, bool]],
+        epochs: int = 5,
+        learning_rate: float = 0.5,
+        l2: float = 1e-6
+    ) -> None:
+        """Train with SGD on (text, is_task_candidate) pairs."""
+        encoded = [(_features(text, self.dim), 1.0 if label else 0.0) for text, label in examples]
+        rng = random.Random(0)
+        for epoch in range(epochs):
+            rng.shuffle(encoded)
+            rate = learning_rate / (1 + epoch)
+            for features, label in encoded:
+                z = self.bias + sum(self.weights.get(i, 0.0) * v for i, v in features.items())
+                error = 1.0 / (1.0 + math.exp(-max(min(z, 35.0), -35.0))) - label
+                self.bias -= rate * error
+                for i, v in features.items():
+                    w = self.weights.get(i, 0.0)
+                    self.weights[i] = w - rate * (error * v + l2 * w)
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "dim": self.dim,
+                "bias": self.bias,
+                "weights": {str(i): round(w, 6) for i, w in self.weights.items() if abs(w) > 1e-6},
+            }, f)
+
+    @classmethod
+    def load(cls, path: str) -> "HashedLinearModel":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(
+            dim=data["dim"],
+            bias=data["bias"],
+            weights={int(i): w for i, w in data["weights"].items()},
+        )
+
+
+def _load_model() -> Optional[HashedLinearModel]:
+    path = settings.prefilter_model_path
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return HashedLinearModel.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error loading prefilter model from {path}: {e}")
+        return None
+
+
+_model = _load_model()
+
+
+def classify_message(text: str) -> Dict[str, Any]:
+    """
+    Decide whether a message can skip LLM classification.
+
+    Args:
+        text: Raw message text
+
+    Returns:
+        Dictionary with skip (bool), score (task probability, or None
+        without a model) and reason
+    """
+    normalized = _normalize(text or "")
+    if not normalized:
+        return {"skip": True, "score": 0.0, "reason": "no_text"}
+    if normalized in _NON_ACTIONABLE:
+        return {"skip": True, "score": 0.0, "reason": "acknowledgement"}
+
+    score = _model.predict(text) if _model is not None else None
+    if _TASK_CUES.search(text):
+        return {"skip": False, "score": score, "reason": "task_cue"}
+    if score is not None and score < settings.prefilter_threshold:
+        return {"skip": True, "score": score, "reason": "model"}
+    return {"skip": False, "score": score, "reason": "uncertain"}
+
+
+async def prefilter_agent(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Short-circuit confidently non-actionable messages before the LLM.
+
+    Input state keys:
+        - message_text: str
+
+    Output state keys:
+        - prefilter: dict (skip, score, reason)
+        - message_understanding: MessageUnderstandingOutput (only when skipped)
+    """
+    message_text = state.get("message_text", "")
+    if not settings.prefilter_enabled:
+        return {**state, "prefilter": {"skip": False, "score": None, "reason": "disabled"}}
+
+    decision = classify_message(message_text)
+    _stats["messages"] += 1
+    if not decision["skip"]:
+        _stats["passed"] += 1
+        return {**state, "prefilter": decision}
+
+    _stats["skipped_by_model" if decision["reason"] == "model" else "skipped_by_rule"] += 1
+    understanding = MessageUnderstandingOutput(
+        is_task_candidate=False,
+        category="chitchat",
+        urgency_estimate="low",
+        cleaned_text=message_text.strip(),
+        confidence=1.0 - (decision["score"] or 0.0)
+    )
+    return {
+        **state,
+        "prefilter": decision,
+        "message_understanding": understanding.dict()
+    }
+
+
+async def log_outcome(message_text: str, is_task_candidate: bool) -> None:
+    """Append an LLM classification to the training log (if configured)."""
+    path = settings.prefilter_outcome_log
+    if not path:
+        return
+
+    def append() -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"text": message_text, "is_task_candidate": is_task_candidate}) + "\n")
+
+    try:
+        await asyncio.to_thread(append)
+    except OSError as e:
+        print(f"Error logging prefilter outcome: {e}")
+
+
+def _read_outcomes(path: str) -> Iterable[Tuple[str, bool]]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(record.get("text"), str) and "is_task_candidate" in record:
+                yield record["text"], bool(record["is_task_candidate"])
+
+
+def get_prefilter_stats() -> Dict[str, Any]:
+    """Decision counters, including LLM calls avoided."""
+    return {
+        **_stats,
+        "llm_calls_avoided": _stats["skipped_by_rule"] + _stats["skipped_by_model"],
+        "model_loaded": _model is not None,
+        "threshold": settings.prefilter_threshold,
+    }
+
+
+register_metrics("prefilter", get_prefilter_stats)
+
+
+if __name__ == "__main__":
+    # python -m agents.prefilter --log data/prefilter_outcomes.jsonl --out data/prefilter_model.json
+    parser = argparse.ArgumentParser(description="Train the message pre-filter from logged outcomes")
+    parser.add_argument("--log", default=settings.prefilter_outcome_log, help="JSONL outcome log")
+    parser.add_argument("--out", default=settings.prefilter_model_path, help="Model output path")
+    parser.add_argument("--epochs", type=int, default=5)
+    args = parser.parse_args()
+    if not args.log or not args.out:
+        parser.error("--log and --out are required (or set PREFILTER_OUTCOME_LOG / PREFILTER_MODEL_PATH)")
+
+    examples = list(_read_outcomes(args.log))
+    model = HashedLinearModel()
+    model.fit(examples, epochs=args.epochs)
+    model.save(args.out)
+    positives = sum(1 for _, label in examples if label)
+    print(f"Trained on {len(examples)} messages ({positives} task candidates); saved to {args.out}")
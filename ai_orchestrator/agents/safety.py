@@ -27,13 +27,13 @@ async def safety_policy_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     explicit_consent = state.get("explicit_consent", False)
     
     # Get workspace config
-    workspace_config = await get_workspace_config(workspace_id)
+    workspace_config = await get_workspace_config.ainvoke({"workspace_id": workspace_id})
     workspace_mode = workspace_config.get("ai_automation_mode", "assist")
     
     # Get channel config if channel_id provided
     channel_mode = "off"
     if channel_id:
-        channel_config = await get_channel_config(channel_id)
+        channel_config = await get_channel_config.ainvoke({"channel_id": channel_id})
         channel_mode = channel_config.get("ai_mode", "off")
     
     # Safety checks
@@ -66,6 +66,7 @@ async def safety_policy_agent(state: Dict[str, Any]) -> Dict[str, Any]:
         **state,
         "safety_check": safety_check.dict(),
         "workspace_automation_mode": workspace_mode,
+        "workspace_pipeline_mode": workspace_config.get("ai_pipeline_mode"),
         "channel_ai_mode": channel_mode
     }
 
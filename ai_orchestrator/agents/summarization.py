@@ -1,77 +1,386 @@
 """Agent 6: Summarization & Context Agent."""
+import asyncio
+import contextvars
+import hashlib
 import json
-from typing import Dict, Any
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Set
 try:
-    from ..models.llm import get_chat_model_for_conversation
+    from ..config import settings
+    from ..metrics import register_metrics
+    from ..models.llm import get_chat_model_for_conversation, invoke_model
     from ..models.schemas import SummarizationOutput
-    from ..prompts.agent_prompts import SUMMARIZATION_PROMPT
-    from ..tools.rag_tools import index_workspace_context
+    from ..prompts.agent_prompts import SUMMARIZATION_PROMPT, SUMMARIZATION_BATCH_PROMPT
+    from ..tools.rag_tools import index_workspace_context, index_workspace_contexts, get_indexed_content_hashes
 except ImportError:
-    from models.llm import get_chat_model_for_conversation
+    from config import settings
+    from metrics import register_metrics
+    from models.llm import get_chat_model_for_conversation, invoke_model
     from models.schemas import SummarizationOutput
-    from prompts.agent_prompts import SUMMARIZATION_PROMPT
-    from tools.rag_tools import index_workspace_context
+    from prompts.agent_prompts import SUMMARIZATION_PROMPT, SUMMARIZATION_BATCH_PROMPT
+    from tools.rag_tools import index_workspace_context, index_workspace_contexts, get_indexed_content_hashes
+
+
+def _parse_summary(response_content: str, content_type: str) -> SummarizationOutput:
+    """Parse a summary from model output, falling back to the raw text."""
+    try:
+        # Try to extract JSON from markdown code blocks if present
+        if "```json" in response_content:
+            response_content = response_content.split("```json")[1].split("```")[0].strip()
+        elif "```" in response_content:
+            response_content = response_content.split("```")[1].split("```")[0].strip()
+
+        result_dict = json.loads(response_content)
+        return SummarizationOutput(**result_dict)
+    except (json.JSONDecodeError, ValueError, TypeError) as e:
+        print(f"Error parsing summarization output: {e}")
+        # Fallback
+        return SummarizationOutput(
+            summary=response_content[:500],
+            key_points=[],
+            metadata={"type": content_type}
+        )
+
+
+async def summarize_content(content_type: str, content: str) -> SummarizationOutput:
+    """
+    Summarize one piece of content with the LLM.
+
+    Args:
+        content_type: Type of content (e.g., 'thread', 'incident', 'sprint')
+        content: Text to summarize
+
+    Returns:
+        SummarizationOutput
+    """
+    llm = get_chat_model_for_conversation()
+
+    # Prepare prompt
+    prompt = SUMMARIZATION_PROMPT.format_messages(
+        content_type=content_type,
+        content=content
+    )
+
+    # Call LLM
+    response = await invoke_model(llm, prompt, agent="summarization")
+    return _parse_summary(response.content, content_type)
 
 
 async def summarization_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Summarize content and optionally index it for RAG.
-    
+
     Input state keys:
         - content: str
         - content_type: str (e.g., 'thread', 'incident', 'sprint')
         - workspace_id: str
         - should_index: bool (default: True)
-    
+
     Output state keys:
         - summarization: SummarizationOutput
     """
-    llm = get_chat_model_for_conversation()
     content = state.get("content", "")
     content_type = state.get("content_type", "general")
     workspace_id = state.get("workspace_id")
     should_index = state.get("should_index", True)
-    
-    # Prepare prompt
-    prompt = SUMMARIZATION_PROMPT.format_messages(
-        content_type=content_type,
-        content=content
-    )
-    
-    # Call LLM
-    response = await llm.ainvoke(prompt)
-    response_content = response.content
-    
-    # Parse JSON response
-    try:
-        # Try to extract JSON from markdown code blocks if present
-        if "```json" in response_content:
-            response_content = response_content.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_content:
-            response_content = response_content.split("```")[1].split("```")[0].strip()
-        
-        result_dict = json.loads(response_content)
-        summarization = SummarizationOutput(**result_dict)
-    except (json.JSONDecodeError, ValueError) as e:
-        print(f"Error parsing summarization output: {e}")
-        # Fallback
-        summarization = SummarizationOutput(
-            summary=response_content[:500],
-            key_points=[],
-            metadata={"type": content_type}
-        )
-    
+
+    summarization = await summarize_content(content_type, content)
+
     # Index for RAG if requested
     if should_index and workspace_id:
-        await index_workspace_context(
-            workspace_id=workspace_id,
-            text=summarization.summary,
-            context_type=content_type,
-            metadata=summarization.metadata
-        )
-    
+        await index_workspace_context.ainvoke({
+            "workspace_id": workspace_id,
+            "text": summarization.summary,
+            "context_type": content_type,
+            "metadata": summarization.metadata
+        })
+
     return {
         **state,
         "summarization": summarization.dict()
     }
 
+
+def content_hash(workspace_id: Optional[str], content_type: str, content: str) -> str:
+    """Stable hash identifying a piece of content (whitespace-insensitive)."""
+    normalized = " ".join(content.split())
+    body = json.dumps([workspace_id, content_type, normalized], ensure_ascii=False)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+class SummarizationQueue:
+    """
+    Summarizes and indexes content in the background, after the response.
+
+    Jobs wait in a bounded queue. One worker drains it in batches (up to
+    batch_size jobs, or whatever arrived within batch_window seconds of
+    the first), summarizes a batch with one LLM call and indexes each
+    workspace's summaries with one write. Empty content, content that
+    cannot be indexed (no workspace, should_index off or no MongoDB; the
+    summary would go nowhere), content already queued or summarized
+    recently, and content whose hash is already in the index are
+    skipped. When the queue is full, new jobs are rejected.
+    """
+
+    def __init__(self, max_queue: int, batch_size: int, batch_window: float, seen_max_entries: int):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.seen_max_entries = seen_max_entries
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Hashes summarized recently, and hashes still queued
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._queued: Set[str] = set()
+        self._stats = {
+            "queued": 0, "skipped_empty": 0, "skipped_not_indexed": 0, "skipped_duplicate": 0, "skipped_indexed": 0,
+            "rejected": 0, "summarized": 0, "indexed": 0, "batches": 0, "llm_calls": 0, "failed": 0
+        }
+
+    def start(self) -> None:
+        """Start the worker on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        # The worker runs in a clean context so no request-scoped state leaks into jobs
+        self._task = contextvars.Context().run(loop.create_task, self._worker())
+
+    async def stop(self, timeout: float) -> None:
+        """Let queued jobs finish (up to timeout seconds), then stop the worker."""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"Summarization queue not drained on shutdown; {self._queue.qsize()} jobs dropped")
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._queue = None
+        self._loop = None
+        self._queued.clear()
+
+    def _remember(self, key: str) -> None:
+        self._seen[key] = None
+        self._seen.move_to_end(key)
+        while len(self._seen) > self.seen_max_entries:
+            self._seen.popitem(last=False)
+
+    def enqueue(self, state: Dict[str, Any]) -> str:
+        """
+        Queue the content in state for summarization without waiting.
+
+        Uses the same state keys as summarization_agent.
+
+        Returns:
+            "queued", "skipped_empty", "skipped_not_indexed",
+            "skipped_duplicate" or "rejected"
+        """
+        content = state.get("content") or ""
+        if not content.strip():
+            self._stats["skipped_empty"] += 1
+            return "skipped_empty"
+
+        job = {
+            "workspace_id": state.get("workspace_id"),
+            "content": content,
+            "content_type": state.get("content_type", "general"),
+            "should_index": state.get("should_index", True),
+        }
+        if not (job["should_index"] and job["workspace_id"] and settings.mongodb_uri):
+            self._stats["skipped_not_indexed"] += 1
+            return "skipped_not_indexed"
+        job["hash"] = content_hash(job["workspace_id"], job["content_type"], content)
+        if job["hash"] in self._seen or job["hash"] in self._queued:
+            self._stats["skipped_duplicate"] += 1
+            return "skipped_duplicate"
+
+        self.start()
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._stats["rejected"] += 1
+            print("Summarization queue full; dropping job")
+            return "rejected"
+        self._queued.add(job["hash"])
+        self._stats["queued"] += 1
+        return "queued"
+
+    async def _worker(self) -> None:
+        queue = self._queue
+        while True:
+            jobs = [await queue.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(jobs) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    jobs.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._process(jobs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._stats["failed"] += len(jobs)
+                print(f"Error in background summarization: {e}")
+            finally:
+                for job in jobs:
+                    self._queued.discard(job["hash"])
+                    queue.task_done()
+
+    async def _process(self, jobs: List[Dict[str, Any]]) -> None:
+        self._stats["batches"] += 1
+
+        # Skip content already in the index
+        indexed = set()
+        for workspace_id in {job["workspace_id"] for job in jobs}:
+            hashes = [job["hash"] for job in jobs if job["workspace_id"] == workspace_id]
+            indexed.update(await get_indexed_content_hashes(workspace_id, hashes))
+        for key in indexed:
+            self._remember(key)
+        pending = [job for job in jobs if job["hash"] not in indexed]
+        self._stats["skipped_indexed"] += len(jobs) - len(pending)
+        if not pending:
+            return
+
+        summaries = await self._summarize(pending)
+        self._stats["summarized"] += len(pending)
+        # Remembered once summarized, so a failing index write does not
+        # cost another LLM call each time the content comes back
+        for job in pending:
+            self._remember(job["hash"])
+
+        # One index write per workspace
+        documents: Dict[str, List[Dict[str, Any]]] = {}
+        for job, summary in zip(pending, summaries):
+            documents.setdefault(job["workspace_id"], []).append({
+                "text": summary.summary,
+                "context_type": job["content_type"],
+                "metadata": {**summary.metadata, "contentHash": job["hash"]},
+            })
+        for workspace_id, docs in documents.items():
+            result = await index_workspace_contexts(workspace_id, docs)
+            if result.get("success"):
+                self._stats["indexed"] += len(docs)
+
+    async def _summarize(self, jobs: List[Dict[str, Any]]) -> List[SummarizationOutput]:
+        """Summarize jobs with one LLM call; items missing from the answer are summarized individually."""
+        if len(jobs) == 1:
+            self._stats["llm_calls"] += 1
+            return [await summarize_content(jobs[0]["content_type"], jobs[0]["content"])]
+
+        llm = get_chat_model_for_conversation()
+        items = "\n\n".join(
+            f"[{i}] Content Type: {job['content_type']}\nContent: {job['content']}"
+            for i, job in enumerate(jobs)
+        )
+        prompt = SUMMARIZATION_BATCH_PROMPT.format_messages(count=len(jobs), items=items)
+        response = await invoke_model(llm, prompt, agent="summarization")
+        self._stats["llm_calls"] += 1
+        content = response.content
+
+        results: List[Optional[SummarizationOutput]] = [None] * len(jobs)
+        try:
+            if "```json" in content:
+                content = content.split("```json")[1].split("```")[0].strip()
+            elif "```" in content:
+                content = content.split("```")[1].split("```")[0].strip()
+            parsed = json.loads(content)
+            for position, entry in enumerate(parsed if isinstance(parsed, list) else []):
+                if not isinstance(entry, dict):
+                    continue
+                index = entry.pop("index", position)
+                if isinstance(index, int) and 0 <= index < len(jobs) and results[index] is None:
+                    results[index] = SummarizationOutput(**entry)
+        except (json.JSONDecodeError, ValueError) as e:
+            print(f"Error parsing batched summarization output: {e}")
+
+        for i, result in enumerate(results):
+            if result is None:
+                self._stats["llm_calls"] += 1
+                results[i] = await summarize_content(jobs[i]["content_type"], jobs[i]["content"])
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, skip counts and batching."""
+        return {
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            **self._stats,
+        }
+
+
+summarization_queue = SummarizationQueue(
+    max_queue=settings.summarization_queue_size,
+    batch_size=settings.summarization_batch_size,
+    batch_window=settings.summarization_batch_window_seconds,
+    seen_max_entries=settings.summarization_seen_max_entries,
+)
+
+register_metrics("summarization_queue", summarization_queue.stats)
+
+
+def _graph_content(state: Dict[str, Any]) -> Dict[str, str]:
+    """
+    The content and content_type to summarize for a graph's state.
+
+    Uses state["content"] when set. With SUMMARIZATION_INDEX_CONVERSATIONS
+    on, falls back to the Ask Orbix exchange (user_message and
+    assistant_response) or the Task Help answer (user_question and
+    task_help); these are a user's own conversation, so they are not
+    indexed for the whole workspace unless explicitly enabled.
+    """
+    if state.get("content") or not settings.summarization_index_conversations:
+        return {"content": state.get("content") or "", "content_type": state.get("content_type", "general")}
+
+    assistant_response = state.get("assistant_response")
+    if assistant_response:
+        return {
+            "content": f"Q: {state.get('user_message', '')}\nA: {assistant_response.get('answer', '')}",
+            "content_type": "conversation"
+        }
+
+    task_help = state.get("task_help")
+    if task_help:
+        lines = [
+            f"Task: {state.get('task_id', '')}",
+            f"Q: {state.get('user_question', '')}",
+            f"A: {task_help.get('explanation', '')}",
+        ]
+        lines += [f"- {step}" for step in task_help.get("step_by_step_plan") or []]
+        lines += [f"Risk: {note}" for note in task_help.get("risk_notes") or []]
+        return {"content": "\n".join(lines), "content_type": "task_help"}
+
+    return {"content": "", "content_type": state.get("content_type", "general")}
+
+
+async def queue_summarization_agent(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Hand the graph's output to the background summarization queue.
+
+    Input state keys:
+        - content / content_type: as for summarization_agent, or (with
+          SUMMARIZATION_INDEX_CONVERSATIONS) user_message and
+          assistant_response (Ask Orbix) or task_id, user_question and
+          task_help (Task Help)
+        - workspace_id: str
+        - safety_check: SafetyCheckOutput (nothing is queued if not allowed)
+
+    Output state keys:
+        - summarization_status: str ("queued" or why it was skipped)
+    """
+    if not state.get("safety_check", {}).get("allowed", True):
+        status = "skipped_not_allowed"
+    else:
+        status = summarization_queue.enqueue({**state, **_graph_content(state)})
+    return {
+        **state,
+        "summarization_status": status
+    }
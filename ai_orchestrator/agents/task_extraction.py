@@ -1,14 +1,33 @@
 """Agent 2: Task Extraction Agent."""
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 try:
-    from ..models.llm import get_classification_model
+    from ..models.llm import CLASSIFICATION_TEMPERATURE, invoke_cascade
     from ..models.schemas import TaskExtractionOutput
     from ..prompts.agent_prompts import TASK_EXTRACTION_PROMPT
+    from ..prompts.budget import fit_message_context
+    from ..tools.deadline import DeadlineExceeded, degrade
 except ImportError:
-    from models.llm import get_classification_model
+    from models.llm import CLASSIFICATION_TEMPERATURE, invoke_cascade
     from models.schemas import TaskExtractionOutput
     from prompts.agent_prompts import TASK_EXTRACTION_PROMPT
+    from prompts.budget import fit_message_context
+    from tools.deadline import DeadlineExceeded, degrade
+
+
+def _parse_extraction(content: str) -> Tuple[TaskExtractionOutput, None]:
+    """Parse an extracted task from model output (plain or fenced JSON)."""
+    # Try to extract JSON from markdown code blocks if present
+    if "```json" in content:
+        content = content.split("```json")[1].split("```")[0].strip()
+    elif "```" in content:
+        content = content.split("```")[1].split("```")[0].strip()
+    
+    result_dict = json.loads(content)
+    if not isinstance(result_dict, dict):
+        raise ValueError("expected a JSON object")
+    # No confidence in this schema: only invalid output escalates
+    return TaskExtractionOutput(**result_dict), None
 
 
 async def task_extraction_agent(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -24,34 +43,36 @@ async def task_extraction_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     Output state keys:
         - task_extraction: TaskExtractionOutput
     """
-    llm = get_classification_model()
-    
     understanding = state.get("message_understanding", {})
     
-    # Prepare prompt
+    # Prepare prompt (thread context trimmed to the token budget)
+    cleaned_text, thread_context = fit_message_context(
+        "task_extraction",
+        TASK_EXTRACTION_PROMPT,
+        understanding.get("cleaned_text", state.get("cleaned_text", "")),
+        state.get("thread_context", "None")
+    )
     prompt = TASK_EXTRACTION_PROMPT.format_messages(
-        cleaned_text=understanding.get("cleaned_text", state.get("cleaned_text", "")),
+        cleaned_text=cleaned_text,
         category=understanding.get("category", "other"),
         urgency=understanding.get("urgency_estimate", "low"),
-        thread_context=state.get("thread_context", "None")
+        thread_context=thread_context
     )
     
-    # Call LLM
-    response = await llm.ainvoke(prompt)
-    content = response.content
-    
-    # Parse JSON response
+    # Call LLM (fast model first when cascading) and parse
     try:
-        # Try to extract JSON from markdown code blocks if present
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0].strip()
-        
-        result_dict = json.loads(content)
-        extraction = TaskExtractionOutput(**result_dict)
-    except (json.JSONDecodeError, ValueError) as e:
-        print(f"Error parsing task extraction output: {e}")
+        extraction = await invoke_cascade(
+            prompt,
+            "task_extraction",
+            _parse_extraction,
+            temperature=CLASSIFICATION_TEMPERATURE
+        )
+    except (json.JSONDecodeError, ValueError, DeadlineExceeded) as e:
+        if isinstance(e, DeadlineExceeded):
+            print(f"Task extraction cut short: {e}")
+            degrade(state, "fallback:task_extraction")
+        else:
+            print(f"Error parsing task extraction output: {e}")
         # Fallback
         extraction = TaskExtractionOutput(
             title="Untitled Task",
@@ -2,17 +2,35 @@
 import json
 from typing import Dict, Any
 try:
-    from ..models.llm import get_chat_model_for_conversation
+    from ..models.llm import get_chat_model_for_conversation, invoke_model
     from ..models.schemas import TaskHelperOutput
     from ..prompts.agent_prompts import TASK_HELPER_PROMPT
     from ..tools.backend_tools import get_task, get_related_tasks
     from ..tools.rag_tools import search_workspace_context
+    from ..tools.context_gathering import ContextGatherer
+    from ..tools.deadline import DeadlineExceeded, degrade
 except ImportError:
-    from models.llm import get_chat_model_for_conversation
+    from models.llm import get_chat_model_for_conversation, invoke_model
     from models.schemas import TaskHelperOutput
     from prompts.agent_prompts import TASK_HELPER_PROMPT
     from tools.backend_tools import get_task, get_related_tasks
     from tools.rag_tools import search_workspace_context
+    from tools.context_gathering import ContextGatherer
+    from tools.deadline import DeadlineExceeded, degrade
+
+
+def _parse_task_help(content: str) -> TaskHelperOutput:
+    """Parse task help from model output (plain or fenced JSON)."""
+    # Try to extract JSON from markdown code blocks if present
+    if "```json" in content:
+        content = content.split("```json")[1].split("```")[0].strip()
+    elif "```" in content:
+        content = content.split("```")[1].split("```")[0].strip()
+    
+    result_dict = json.loads(content)
+    if not isinstance(result_dict, dict):
+        raise ValueError("expected a JSON object")
+    return TaskHelperOutput(**result_dict)
 
 
 async def task_helper_agent(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -32,24 +50,44 @@ async def task_helper_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     task_id = state.get("task_id")
     user_question = state.get("user_question", "How can I complete this task?")
     
+    # Gather context concurrently: the task and its related tasks in
+    # parallel, the RAG search as soon as the task (its query) is known.
+    # Related tasks and RAG are skipped when the request deadline is close
+    gatherer = ContextGatherer("task_helper")
+    task_lookup = gatherer.start("task", lambda: get_task.ainvoke({"task_id": task_id}), fallback=None)
+    gatherer.start(
+        "related_tasks",
+        lambda: get_related_tasks.ainvoke({"task_id": task_id, "workspace_id": workspace_id}),
+        fallback=[],
+        optional=True
+    )
+    gatherer.start(
+        "workspace_context",
+        lambda task: search_workspace_context.ainvoke({
+            "workspace_id": workspace_id,
+            "query": f"{(task or {}).get('title', '')} {(task or {}).get('description', '')}",
+            "top_k": 3
+        }),
+        fallback=[],
+        after=task_lookup,
+        optional=True
+    )
+    context = await gatherer.results()
+    
     # Get task details
-    task = await get_task(task_id)
+    task = context["task"]
     if not task:
         task = {"title": "Unknown Task", "description": "", "status": "todo", "priority": "P2"}
     
     # Get related tasks
-    related_tasks = await get_related_tasks(task_id, workspace_id)
+    related_tasks = context["related_tasks"]
     related_tasks_text = "\n".join([
         f"- {t.get('title', 'Untitled')} ({t.get('status', 'unknown')})"
         for t in related_tasks[:5]
     ]) if related_tasks else "None"
     
     # Get workspace context via RAG
-    workspace_context_results = await search_workspace_context(
-        workspace_id,
-        f"{task.get('title', '')} {task.get('description', '')}",
-        top_k=3
-    )
+    workspace_context_results = context["workspace_context"]
     workspace_context = "\n".join([
         f"- {r.get('text', '')[:200]}"
         for r in workspace_context_results
@@ -67,20 +105,22 @@ async def task_helper_agent(state: Dict[str, Any]) -> Dict[str, Any]:
         user_question=user_question
     )
     
-    # Call LLM
-    response = await llm.ainvoke(prompt)
-    content = response.content
-    
-    # Parse JSON response
+    # Call LLM and parse JSON response
+    content = ""
     try:
-        # Try to extract JSON from markdown code blocks if present
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0].strip()
-        
-        result_dict = json.loads(content)
-        task_help = TaskHelperOutput(**result_dict)
+        # Only parseable answers are cached
+        response = await invoke_model(llm, prompt, agent="task_helper", validate=_parse_task_help)
+        content = response.content
+        task_help = _parse_task_help(content)
+    except DeadlineExceeded as e:
+        print(f"Task help cut short: {e}")
+        degrade(state, "fallback:task_helper")
+        # Fallback: generic plan for the task as described
+        task_help = TaskHelperOutput(
+            explanation=task.get("description", "")[:500],
+            step_by_step_plan=["Review the task", "Gather requirements", "Implement solution", "Test and verify"],
+            risk_notes=["Generic plan: the request deadline was reached before the task could be analyzed"]
+        )
     except (json.JSONDecodeError, ValueError) as e:
         print(f"Error parsing task helper output: {e}")
         # Fallback: use raw response as explanation
@@ -0,0 +1,308 @@
+"""Agents 1 + 2 fused: message understanding and task extraction in one LLM call."""
+import asyncio
+import contextvars
+import json
+import random
+import time
+from typing import Dict, Any, Awaitable, Callable
+try:
+    from ..config import settings
+    from ..metrics import register_metrics
+    from ..models.llm import get_classification_model, invoke_model
+    from ..models.schemas import MessageUnderstandingOutput, TaskExtractionOutput
+    from ..prompts.agent_prompts import MESSAGE_UNDERSTANDING_EXTRACTION_PROMPT
+    from ..prompts.budget import fit_message_context
+    from .message_understanding import message_understanding_agent
+    from .task_extraction import task_extraction_agent
+    from ..tools.deadline import DeadlineExceeded, degrade
+except ImportError:
+    from config import settings
+    from metrics import register_metrics
+    from models.llm import get_classification_model, invoke_model
+    from models.schemas import MessageUnderstandingOutput, TaskExtractionOutput
+    from prompts.agent_prompts import MESSAGE_UNDERSTANDING_EXTRACTION_PROMPT
+    from prompts.budget import fit_message_context
+    from agents.message_understanding import message_understanding_agent
+    from agents.task_extraction import task_extraction_agent
+    from tools.deadline import DeadlineExceeded, degrade
+
+
+PIPELINE_MODES = ("two_call", "fused", "speculative")
+
+_stats = {
+    "two_call": {"understanding_calls": 0, "understanding_ms": 0.0, "extraction_calls": 0, "extraction_ms": 0.0},
+    "fused": {"calls": 0, "ms": 0.0, "candidate_calls": 0, "candidate_ms": 0.0, "extraction_fallbacks": 0},
+    "speculative": {
+        "calls": 0, "ms": 0.0, "candidate_calls": 0, "candidate_ms": 0.0,
+        "used": 0, "saved_ms": 0.0, "discarded": 0, "cancelled": 0, "wasted_ms": 0.0, "errors": 0
+    },
+    "shadow": {"compared": 0, "candidate_agree": 0, "category_agree": 0, "priority_agree": 0, "task_type_agree": 0, "errors": 0},
+}
+
+# Strong references to running shadow comparisons
+_shadow_tasks = set()
+
+
+def resolve_pipeline_mode(state: Dict[str, Any]) -> str:
+    """Pipeline mode for a message: per request, else per workspace, else the default."""
+    for mode in (
+        state.get("pipeline_mode"),
+        state.get("workspace_pipeline_mode"),
+        settings.chat_pipeline_mode,
+    ):
+        if mode in PIPELINE_MODES:
+            return mode
+    return "two_call"
+
+
+def timed_stage(
+    stage: str,
+    agent: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+) -> Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]:
+    """Wrap a two-call pipeline node ("understanding" or "extraction") to record its latency."""
+    async def node(state: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        result = await agent(state)
+        _stats["two_call"][f"{stage}_calls"] += 1
+        _stats["two_call"][f"{stage}_ms"] += (time.perf_counter() - started) * 1000
+        return result
+    return node
+
+
+async def understanding_extraction_agent(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Classify a message and, for task candidates, extract the task in one call.
+
+    Input state keys:
+        - message_text: str
+        - sender_name: str (optional)
+        - channel_name: str (optional)
+        - thread_context: str (optional)
+
+    Output state keys:
+        - message_understanding: MessageUnderstandingOutput
+        - task_extraction: TaskExtractionOutput (task candidates only)
+    """
+    started = time.perf_counter()
+    llm = get_classification_model()
+
+    # Prepare prompt (thread context trimmed to the token budget)
+    message_text, thread_context = fit_message_context(
+        "understanding_extraction",
+        MESSAGE_UNDERSTANDING_EXTRACTION_PROMPT,
+        state.get("message_text", ""),
+        state.get("thread_context", "None")
+    )
+    prompt = MESSAGE_UNDERSTANDING_EXTRACTION_PROMPT.format_messages(
+        message_text=message_text,
+        sender_name=state.get("sender_name", "Unknown"),
+        channel_name=state.get("channel_name", "Unknown"),
+        thread_context=thread_context
+    )
+
+    # Call LLM and parse JSON response
+    extraction = None
+    try:
+        response = await invoke_model(llm, prompt, agent="understanding_extraction")
+        content = response.content
+
+        # Try to extract JSON from markdown code blocks if present
+        if "```json" in content:
+            content = content.split("```json")[1].split("```")[0].strip()
+        elif "```" in content:
+            content = content.split("```")[1].split("```")[0].strip()
+
+        result_dict = json.loads(content)
+        understanding = MessageUnderstandingOutput(**result_dict.get("understanding", {}))
+        if understanding.is_task_candidate and result_dict.get("extraction"):
+            try:
+                extraction = TaskExtractionOutput(**result_dict["extraction"])
+            except ValueError as e:
+                print(f"Error parsing fused task extraction output: {e}")
+    except (json.JSONDecodeError, ValueError, AttributeError, DeadlineExceeded) as e:
+        if isinstance(e, DeadlineExceeded):
+            print(f"Fused understanding cut short: {e}")
+            degrade(state, "fallback:understanding_extraction")
+        else:
+            print(f"Error parsing fused understanding output: {e}")
+        # Fallback to default
+        understanding = MessageUnderstandingOutput(
+            is_task_candidate=False,
+            category="other",
+            urgency_estimate="low",
+            cleaned_text=state.get("message_text", ""),
+            confidence=0.0
+        )
+
+    result = {
+        **state,
+        "message_understanding": understanding.dict()
+    }
+    if understanding.is_task_candidate:
+        if extraction is not None:
+            result["task_extraction"] = extraction.dict()
+        else:
+            # Candidate without a usable extraction: fall back to the extraction agent
+            _stats["fused"]["extraction_fallbacks"] += 1
+            result = await task_extraction_agent(result)
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    _stats["fused"]["calls"] += 1
+    _stats["fused"]["ms"] += elapsed_ms
+    if understanding.is_task_candidate:
+        _stats["fused"]["candidate_calls"] += 1
+        _stats["fused"]["candidate_ms"] += elapsed_ms
+
+    if random.random() < settings.chat_pipeline_shadow_rate:
+        _start_shadow_comparison(state, result)
+    return result
+
+
+def likely_task(state: Dict[str, Any]) -> bool:
+    """Cheap signal (from the pre-filter) that a message is worth speculating on."""
+    decision = state.get("prefilter") or {}
+    if decision.get("reason") == "task_cue":
+        return True
+    score = decision.get("score")
+    return score is not None and score >= settings.speculative_extraction_threshold
+
+
+async def speculative_understanding_agent(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run message understanding with task extraction started alongside it.
+    
+    Extraction starts from the raw message (category and urgency not yet
+    known). If the message turns out to be a task candidate, its result
+    is used as is; otherwise it is cancelled, or discarded if it already
+    finished.
+    
+    Output state keys:
+        - message_understanding: MessageUnderstandingOutput
+        - task_extraction: TaskExtractionOutput (task candidates only)
+    """
+    stats = _stats["speculative"]
+    started = time.perf_counter()
+    provisional = {
+        **state,
+        "message_understanding": {
+            "cleaned_text": state.get("message_text", ""),
+            "category": "unknown",
+            "urgency_estimate": "unknown",
+        }
+    }
+    extraction_started = time.perf_counter()
+    extraction = asyncio.ensure_future(task_extraction_agent(provisional))
+    extraction_ms: Dict[str, float] = {}
+    extraction.add_done_callback(
+        lambda _: extraction_ms.setdefault("ms", (time.perf_counter() - extraction_started) * 1000)
+    )
+    
+    try:
+        result = await message_understanding_agent(state)
+    except BaseException:
+        extraction.cancel()
+        raise
+    understanding_ms = (time.perf_counter() - started) * 1000
+    is_candidate = result["message_understanding"].get("is_task_candidate", False)
+    
+    if not is_candidate:
+        if extraction.done():
+            stats["discarded"] += 1
+            stats["wasted_ms"] += extraction_ms.get("ms", 0.0)
+            if not extraction.cancelled() and extraction.exception() is not None:
+                stats["errors"] += 1
+        else:
+            extraction.cancel()
+            stats["cancelled"] += 1
+            stats["wasted_ms"] += understanding_ms
+    else:
+        try:
+            speculated = await extraction
+        except Exception as e:
+            stats["errors"] += 1
+            print(f"Error in speculative task extraction: {e}")
+            result = await task_extraction_agent(result)
+        else:
+            stats["used"] += 1
+            # Time the sequential path would have spent extracting after understanding
+            stats["saved_ms"] += min(extraction_ms.get("ms", 0.0), understanding_ms)
+            result = {**result, "task_extraction": speculated["task_extraction"]}
+    
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    stats["calls"] += 1
+    stats["ms"] += elapsed_ms
+    if is_candidate:
+        stats["candidate_calls"] += 1
+        stats["candidate_ms"] += elapsed_ms
+    return result
+
+
+def _start_shadow_comparison(state: Dict[str, Any], fused: Dict[str, Any]) -> None:
+    """Run the two-call path in the background and record agreement with the fused result."""
+    async def compare() -> None:
+        try:
+            # The request (and its deadline) may be over by now
+            baseline = {k: v for k, v in state.items() if k != "deadline"}
+            reference = await message_understanding_agent(baseline)
+            if reference["message_understanding"].get("is_task_candidate"):
+                reference = await task_extraction_agent(reference)
+        except Exception as e:
+            _stats["shadow"]["errors"] += 1
+            print(f"Error in pipeline shadow comparison: {e}")
+            return
+
+        shadow = _stats["shadow"]
+        shadow["compared"] += 1
+        ours, theirs = fused["message_understanding"], reference["message_understanding"]
+        shadow["candidate_agree"] += ours.get("is_task_candidate") == theirs.get("is_task_candidate")
+        shadow["category_agree"] += ours.get("category") == theirs.get("category")
+        ours_task, theirs_task = fused.get("task_extraction") or {}, reference.get("task_extraction") or {}
+        shadow["priority_agree"] += ours_task.get("suggested_priority") == theirs_task.get("suggested_priority")
+        shadow["task_type_agree"] += ours_task.get("task_type") == theirs_task.get("task_type")
+
+    # Detached so the shadow run is not tied to (or cancelled with) the request
+    loop = asyncio.get_running_loop()
+    task = contextvars.Context().run(loop.create_task, compare())
+    _shadow_tasks.add(task)
+    task.add_done_callback(_shadow_tasks.discard)
+
+
+def get_pipeline_stats() -> Dict[str, Any]:
+    """Latency per pipeline mode, speculation outcomes and shadow agreement rates."""
+    two_call, fused, shadow = _stats["two_call"], _stats["fused"], _stats["shadow"]
+    speculative = _stats["speculative"]
+    speculated = speculative["used"] + speculative["discarded"] + speculative["cancelled"]
+    understanding_avg = two_call["understanding_ms"] / two_call["understanding_calls"] if two_call["understanding_calls"] else 0.0
+    extraction_avg = two_call["extraction_ms"] / two_call["extraction_calls"] if two_call["extraction_calls"] else 0.0
+    compared = shadow["compared"]
+    return {
+        "two_call": {
+            **two_call,
+            "avg_understanding_ms": round(understanding_avg, 3),
+            "avg_extraction_ms": round(extraction_avg, 3),
+            # Latency of a task candidate going through both calls
+            "avg_candidate_ms": round(understanding_avg + extraction_avg, 3),
+        },
+        "fused": {
+            **fused,
+            "avg_ms": round(fused["ms"] / fused["calls"], 3) if fused["calls"] else 0.0,
+            "avg_candidate_ms": round(fused["candidate_ms"] / fused["candidate_calls"], 3) if fused["candidate_calls"] else 0.0,
+        },
+        "speculative": {
+            **speculative,
+            "avg_ms": round(speculative["ms"] / speculative["calls"], 3) if speculative["calls"] else 0.0,
+            "avg_candidate_ms": round(speculative["candidate_ms"] / speculative["candidate_calls"], 3) if speculative["candidate_calls"] else 0.0,
+            # Share of speculative extractions whose result was used
+            "hit_rate": round(speculative["used"] / speculated, 3) if speculated else None,
+        },
+        "shadow": {
+            **shadow,
+            **{
+                f"{key}_rate": round(shadow[key] / compared, 3) if compared else None
+                for key in ("candidate_agree", "category_agree", "priority_agree", "task_type_agree")
+            },
+        },
+    }
+
+
+register_metrics("chat_pipeline", get_pipeline_stats)
@@ -1,17 +1,23 @@
 """Agent 5: Workspace Assistant Agent."""
 from typing import Dict, Any, List
 try:
-    from ..models.llm import get_chat_model_for_conversation
+    from ..models.llm import get_chat_model_for_conversation, invoke_model
     from ..models.schemas import WorkspaceAssistantOutput
     from ..prompts.agent_prompts import WORKSPACE_ASSISTANT_PROMPT
+    from ..prompts.budget import PromptSection, estimate_tokens, fit_sections
     from ..tools.rag_tools import search_workspace_context
     from ..tools.backend_tools import get_workspace_stats
+    from ..tools.context_gathering import ContextGatherer
+    from ..tools.deadline import DeadlineExceeded, degrade
 except ImportError:
-    from models.llm import get_chat_model_for_conversation
+    from models.llm import get_chat_model_for_conversation, invoke_model
     from models.schemas import WorkspaceAssistantOutput
     from prompts.agent_prompts import WORKSPACE_ASSISTANT_PROMPT
+    from prompts.budget import PromptSection, estimate_tokens, fit_sections
     from tools.rag_tools import search_workspace_context
     from tools.backend_tools import get_workspace_stats
+    from tools.context_gathering import ContextGatherer
+    from tools.deadline import DeadlineExceeded, degrade
 from langchain_core.messages import HumanMessage, AIMessage
 
 
@@ -31,50 +37,77 @@ async def workspace_assistant_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     workspace_id = state.get("workspace_id")
     user_message = state.get("user_message", "")
     
-    # Get workspace context via RAG
-    workspace_context_results = await search_workspace_context(
-        workspace_id,
-        user_message,
-        top_k=5
+    # Gather RAG context and workspace stats (for the task summary) concurrently;
+    # both are skipped when the request deadline is close
+    gatherer = ContextGatherer("workspace_assistant")
+    gatherer.start(
+        "workspace_context",
+        lambda: search_workspace_context.ainvoke({"workspace_id": workspace_id, "query": user_message, "top_k": 5}),
+        fallback=[],
+        optional=True
     )
-    workspace_context = "\n".join([
-        f"- {r.get('text', '')[:300]}"
-        for r in workspace_context_results
-    ]) if workspace_context_results else "No relevant context found"
-    
-    # Get workspace stats for task summary
-    stats = await get_workspace_stats(workspace_id)
+    gatherer.start("workspace_stats", lambda: get_workspace_stats(workspace_id), fallback={}, optional=True)
+    context = await gatherer.results()
+    workspace_context_results = context["workspace_context"]
+    stats = context["workspace_stats"]
     task_summary = f"""
     Total Tasks: {stats.get('total_tasks', 0)}
+    Open: {stats.get('open_tasks', 0)} (Overdue: {stats.get('overdue_tasks', 0)}, Unassigned: {stats.get('unassigned_open_tasks', 0)})
     By Status: {stats.get('tasks_by_status', {})}
     By Priority: {stats.get('tasks_by_priority', {})}
     """
     
-    # Build chat history
-    chat_history = state.get("chat_history", [])
+    # Fit the message, RAG snippets and chat history into the token budget:
+    # history goes first (oldest messages dropped), then the least relevant snippets
+    chat_history = [
+        msg for msg in state.get("chat_history") or []
+        if msg.get("role") in ("user", "assistant")
+    ]
+    fitted = fit_sections("workspace_assistant", [
+        PromptSection("user_message", user_message, priority=3, strategy="truncate"),
+        PromptSection(
+            "workspace_context",
+            [f"- {r.get('text', '')[:300]}" for r in workspace_context_results or []],
+            priority=2,
+            strategy="rank",
+            scores=[-i for i in range(len(workspace_context_results or []))]
+        ),
+        PromptSection(
+            "chat_history",
+            chat_history,
+            priority=1,
+            strategy="keep_last",
+            render=lambda msg: msg.get("content", "")
+        ),
+    ], template=WORKSPACE_ASSISTANT_PROMPT, reserved_tokens=estimate_tokens(task_summary))
+    user_message = fitted["user_message"]
+    workspace_context = "\n".join(fitted["workspace_context"]) or "No relevant context found"
     messages = []
     
     # Convert chat history to LangChain messages
-    for msg in chat_history[-10:]:  # Last 10 messages
+    for msg in fitted["chat_history"]:
         if msg.get("role") == "user":
             messages.append(HumanMessage(content=msg.get("content", "")))
         elif msg.get("role") == "assistant":
             messages.append(AIMessage(content=msg.get("content", "")))
     
-    # Prepare prompt
+    # Prepare prompt (chat history fills the template's history placeholder)
     prompt = WORKSPACE_ASSISTANT_PROMPT.format_messages(
+        chat_history=messages,
         user_message=user_message,
         workspace_context=workspace_context,
         task_summary=task_summary
     )
     
-    # Insert chat history before the last human message
-    if messages:
-        prompt = prompt[:-1] + messages + prompt[-1:]
-    
     # Call LLM
-    response = await llm.ainvoke(prompt)
-    answer = response.content
+    try:
+        response = await invoke_model(llm, prompt, agent="workspace_assistant")
+        answer = response.content
+    except DeadlineExceeded as e:
+        print(f"Workspace assistant cut short: {e}")
+        degrade(state, "fallback:workspace_assistant")
+        # Fallback: say so rather than failing the request
+        answer = "Sorry, I couldn't finish answering in time. Please try again or ask a narrower question."
     
     # Create response object
     assistant_response = WorkspaceAssistantOutput(
@@ -1,6 +1,6 @@
 """Configuration management for Orbix AI Orchestrator."""
 import os
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -29,10 +29,163 @@ class Settings(BaseSettings):
     
     # Backend API Authentication (if backend requires API key)
     backend_api_key: Optional[str] = Field(default=None, env="BACKEND_API_KEY")
+
+    # Backend HTTP connection pool
+    backend_max_connections: int = Field(default=100, env="BACKEND_MAX_CONNECTIONS")
+    backend_max_keepalive_connections: int = Field(default=20, env="BACKEND_MAX_KEEPALIVE_CONNECTIONS")
+    backend_keepalive_expiry: float = Field(default=30.0, env="BACKEND_KEEPALIVE_EXPIRY")
+    backend_http2: bool = Field(default=False, env="BACKEND_HTTP2")
+    backend_timeout: float = Field(default=30.0, env="BACKEND_TIMEOUT")
+    backend_connect_timeout: float = Field(default=5.0, env="BACKEND_CONNECT_TIMEOUT")
+
+    # Backend resilience (per-endpoint timeouts, GET retries, circuit breaker)
+    backend_read_timeout: float = Field(default=5.0, env="BACKEND_READ_TIMEOUT")
+    backend_write_timeout: float = Field(default=15.0, env="BACKEND_WRITE_TIMEOUT")
+    # JSON map of route -> seconds, e.g. {"GET /api/workspaces/{id}/tasks": 10}
+    backend_endpoint_timeouts: Dict[str, float] = Field(default_factory=dict, env="BACKEND_ENDPOINT_TIMEOUTS")
+    backend_retry_attempts: int = Field(default=2, env="BACKEND_RETRY_ATTEMPTS")
+    backend_retry_base_delay: float = Field(default=0.1, env="BACKEND_RETRY_BASE_DELAY")
+    backend_retry_max_delay: float = Field(default=1.0, env="BACKEND_RETRY_MAX_DELAY")
+    backend_breaker_failure_threshold: int = Field(default=5, env="BACKEND_BREAKER_FAILURE_THRESHOLD")
+    backend_breaker_reset_seconds: float = Field(default=30.0, env="BACKEND_BREAKER_RESET_SECONDS")
+
+    # Conditional GET cache (ETag / Last-Modified revalidation)
+    backend_conditional_cache_enabled: bool = Field(default=True, env="BACKEND_CONDITIONAL_CACHE_ENABLED")
+    backend_conditional_cache_max_entries: int = Field(default=512, env="BACKEND_CONDITIONAL_CACHE_MAX_ENTRIES")
+
+    # Page size requested when streaming task listings (unset = backend default)
+    backend_task_page_size: Optional[int] = Field(default=None, env="BACKEND_TASK_PAGE_SIZE")
+
+    # Tasks buffered per vectorized flush when computing workspace stats
+    stats_chunk_size: int = Field(default=4096, env="STATS_CHUNK_SIZE")
+    # Event-fed stats views (POST /ai/events)
+    stats_view_max_workspaces: int = Field(default=1000, env="STATS_VIEW_MAX_WORKSPACES")
+    stats_view_reconcile_seconds: float = Field(default=300.0, env="STATS_VIEW_RECONCILE_SECONDS")
+
+    # Workspace/channel config cache
+    config_cache_max_size: int = Field(default=1024, env="CONFIG_CACHE_MAX_SIZE")
+    config_cache_ttl_seconds: float = Field(default=60.0, env="CONFIG_CACHE_TTL_SECONDS")
+    config_cache_stale_seconds: float = Field(default=300.0, env="CONFIG_CACHE_STALE_SECONDS")
+
+    # Background side effects (bot messages, notifications)
+    side_effect_workers: int = Field(default=4, env="SIDE_EFFECT_WORKERS")
+    side_effect_queue_size: int = Field(default=1000, env="SIDE_EFFECT_QUEUE_SIZE")
+    side_effect_max_attempts: int = Field(default=3, env="SIDE_EFFECT_MAX_ATTEMPTS")
+    side_effect_retry_base_delay: float = Field(default=0.5, env="SIDE_EFFECT_RETRY_BASE_DELAY")
+    side_effect_shutdown_timeout: float = Field(default=10.0, env="SIDE_EFFECT_SHUTDOWN_TIMEOUT")
+
+    # Background summarization / RAG indexing after Ask Orbix and Task Help responses
+    summarization_queue_size: int = Field(default=500, env="SUMMARIZATION_QUEUE_SIZE")
+    summarization_batch_size: int = Field(default=8, env="SUMMARIZATION_BATCH_SIZE")
+    summarization_batch_window_seconds: float = Field(default=2.0, env="SUMMARIZATION_BATCH_WINDOW_SECONDS")
+    # Recently summarized content hashes remembered to skip repeats before the index lookup
+    summarization_seen_max_entries: int = Field(default=4096, env="SUMMARIZATION_SEEN_MAX_ENTRIES")
+    summarization_shutdown_timeout: float = Field(default=10.0, env="SUMMARIZATION_SHUTDOWN_TIMEOUT")
+    # Index users' Ask Orbix exchanges and Task Help answers (visible to the whole workspace)
+    summarization_index_conversations: bool = Field(default=False, env="SUMMARIZATION_INDEX_CONVERSATIONS")
+
+    # Durable outbox feeding the side-effect dispatcher
+    outbox_path: str = Field(default="data/outbox.sqlite3", env="OUTBOX_PATH")
+    outbox_batch_size: int = Field(default=50, env="OUTBOX_BATCH_SIZE")
+    outbox_poll_seconds: float = Field(default=1.0, env="OUTBOX_POLL_SECONDS")
+    outbox_lease_seconds: float = Field(default=30.0, env="OUTBOX_LEASE_SECONDS")
+    outbox_max_attempts: int = Field(default=10, env="OUTBOX_MAX_ATTEMPTS")
+    outbox_retention_seconds: float = Field(default=86400.0, env="OUTBOX_RETENTION_SECONDS")
+
+    # Assignment workload collection ("per_member" fan-out or one "bulk" listing)
+    assignment_workload_mode: str = Field(default="per_member", env="ASSIGNMENT_WORKLOAD_MODE")
+    assignment_workload_concurrency: int = Field(default=10, env="ASSIGNMENT_WORKLOAD_CONCURRENCY")
+    assignment_workload_deadline_seconds: float = Field(default=5.0, env="ASSIGNMENT_WORKLOAD_DEADLINE_SECONDS")
     
+    # Context lookups gathered concurrently before agent LLM calls (seconds each;
+    # JSON map of lookup name -> seconds overrides, e.g. {"workspace_context": 2})
+    context_lookup_timeout_seconds: float = Field(default=5.0, env="CONTEXT_LOOKUP_TIMEOUT_SECONDS")
+    context_lookup_timeouts: Dict[str, float] = Field(default_factory=dict, env="CONTEXT_LOOKUP_TIMEOUTS")
+
+    # Request deadlines (requests may send deadline_ms; JSON map of endpoint -> ms
+    # overrides the default, e.g. {"ask_orbix": 10000})
+    request_deadline_ms: float = Field(default=30000.0, env="REQUEST_DEADLINE_MS")
+    request_deadlines_ms: Dict[str, float] = Field(default_factory=dict, env="REQUEST_DEADLINES_MS")
+    # Degrade as the deadline nears: skip optional lookups (RAG, stats, workloads,
+    # related tasks), switch to GEMINI_FAST_MODEL, then skip LLM calls for fallback output
+    deadline_skip_optional_ms: float = Field(default=3000.0, env="DEADLINE_SKIP_OPTIONAL_MS")
+    deadline_fast_model_ms: float = Field(default=8000.0, env="DEADLINE_FAST_MODEL_MS")
+    deadline_skip_llm_ms: float = Field(default=1000.0, env="DEADLINE_SKIP_LLM_MS")
+
     # Model Configuration
     gemini_model: str = Field(default="gemini-pro", env="GEMINI_MODEL")
     gemini_temperature: float = Field(default=0.7, env="GEMINI_TEMPERATURE")
+
+    # Cheap-first cascade: listed agents try the fast model (unset = disabled) and
+    # escalate to GEMINI_MODEL on invalid output or confidence below the threshold
+    gemini_fast_model: Optional[str] = Field(default=None, env="GEMINI_FAST_MODEL")
+    model_cascade_agents: List[str] = Field(
+        default_factory=lambda: ["message_understanding", "task_extraction"],
+        env="MODEL_CASCADE_AGENTS"
+    )
+    model_cascade_confidence_threshold: float = Field(default=0.7, env="MODEL_CASCADE_CONFIDENCE_THRESHOLD")
+
+    # LLM response cache: JSON map of agent -> TTL seconds (agents not listed are not cached)
+    llm_cache_agent_ttls: Dict[str, float] = Field(
+        default_factory=lambda: {
+            "message_understanding": 86400.0,
+            "task_extraction": 3600.0,
+            "task_helper": 600.0,
+        },
+        env="LLM_CACHE_AGENT_TTLS"
+    )
+    llm_cache_max_entries: int = Field(default=2048, env="LLM_CACHE_MAX_ENTRIES")
+    llm_cache_path: str = Field(default="data/llm_cache.sqlite3", env="LLM_CACHE_PATH")
+
+    # chat_to_task pipeline: "two_call" (understanding, then extraction), "fused" (one call)
+    # or "speculative" (extraction started alongside understanding for likely tasks)
+    chat_pipeline_mode: str = Field(default="two_call", env="CHAT_PIPELINE_MODE")
+    # Pre-filter task probability at or above which speculative mode starts extraction early
+    # (messages with explicit task cues always qualify)
+    speculative_extraction_threshold: float = Field(default=0.5, env="SPECULATIVE_EXTRACTION_THRESHOLD")
+    # Fraction of fused calls re-run through the two-call path to measure agreement
+    chat_pipeline_shadow_rate: float = Field(default=0.0, env="CHAT_PIPELINE_SHADOW_RATE")
+
+    # Local pre-filter ahead of message understanding
+    prefilter_enabled: bool = Field(default=True, env="PREFILTER_ENABLED")
+    # Skip the LLM when the model's task probability is below this
+    prefilter_threshold: float = Field(default=0.05, env="PREFILTER_THRESHOLD")
+    prefilter_model_path: Optional[str] = Field(default=None, env="PREFILTER_MODEL_PATH")
+    # JSONL log of LLM classifications used to train the model (unset = no logging)
+    prefilter_outcome_log: Optional[str] = Field(default=None, env="PREFILTER_OUTCOME_LOG")
+
+    # Micro-batching of concurrent message classifications
+    message_batch_enabled: bool = Field(default=False, env="MESSAGE_BATCH_ENABLED")
+    message_batch_max_size: int = Field(default=16, env="MESSAGE_BATCH_MAX_SIZE")
+    message_batch_window_ms: float = Field(default=50.0, env="MESSAGE_BATCH_WINDOW_MS")
+
+    # LLM call governor (0 disables the requests/tokens-per-minute limits)
+    llm_max_concurrency: int = Field(default=16, env="LLM_MAX_CONCURRENCY")
+    llm_requests_per_minute: int = Field(default=0, env="LLM_REQUESTS_PER_MINUTE")
+    llm_tokens_per_minute: int = Field(default=0, env="LLM_TOKENS_PER_MINUTE")
+    # Expected response size, charged against the token budget before the call
+    llm_output_tokens_estimate: int = Field(default=512, env="LLM_OUTPUT_TOKENS_ESTIMATE")
+    llm_rate_limit_retries: int = Field(default=3, env="LLM_RATE_LIMIT_RETRIES")
+    llm_backoff_base_seconds: float = Field(default=1.0, env="LLM_BACKOFF_BASE_SECONDS")
+    llm_backoff_max_seconds: float = Field(default=60.0, env="LLM_BACKOFF_MAX_SECONDS")
+    # Endpoints whose LLM calls are served ahead of everything else
+    llm_interactive_endpoints: List[str] = Field(
+        default_factory=lambda: ["ask_orbix", "task_help"],
+        env="LLM_INTERACTIVE_ENDPOINTS"
+    )
+
+    # Prompt token budgets: JSON map of agent -> estimated tokens (others use the default)
+    prompt_token_budgets: Dict[str, int] = Field(
+        default_factory=lambda: {
+            "message_understanding": 2000,
+            "understanding_extraction": 2500,
+            "task_extraction": 2000,
+            "assignment": 3000,
+            "workspace_assistant": 6000,
+        },
+        env="PROMPT_TOKEN_BUDGETS"
+    )
+    prompt_token_budget_default: int = Field(default=8000, env="PROMPT_TOKEN_BUDGET_DEFAULT")
     
     # RAG Configuration
     vector_search_collection: str = Field(
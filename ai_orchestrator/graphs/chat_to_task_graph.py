@@ -1,20 +1,55 @@
 """Graph 1: Chat to Task Workflow."""
+import uuid
 from typing import Dict, Any, Literal
 from langgraph.graph import StateGraph, END
 try:
     from ..agents.safety import safety_policy_agent
+    from ..agents.prefilter import prefilter_agent
     from ..agents.message_understanding import message_understanding_agent
     from ..agents.task_extraction import task_extraction_agent
+    from ..agents.understanding_extraction import understanding_extraction_agent, speculative_understanding_agent, likely_task, resolve_pipeline_mode, timed_stage
     from ..agents.assignment import assignment_agent
     from ..modes import apply_mode_logic
     from ..tools.backend_tools import create_task, create_task_proposal, post_bot_message, send_notification
+    from ..tools.outbox import outbox
 except ImportError:
     from agents.safety import safety_policy_agent
+    from agents.prefilter import prefilter_agent
     from agents.message_understanding import message_understanding_agent
     from agents.task_extraction import task_extraction_agent
+    from agents.understanding_extraction import understanding_extraction_agent, speculative_understanding_agent, likely_task, resolve_pipeline_mode, timed_stage
     from agents.assignment import assignment_agent
     from modes import apply_mode_logic
     from tools.backend_tools import create_task, create_task_proposal, post_bot_message, send_notification
+    from tools.outbox import outbox
+
+
+# Side effects of execute_action, delivered from the durable outbox
+# (payloads are the tools' arguments)
+outbox.register_handler("post_bot_message", post_bot_message.ainvoke)
+outbox.register_handler("send_notification", send_notification.ainvoke)
+
+
+def should_continue_after_prefilter(
+    state: Dict[str, Any]
+) -> Literal["understand", "understand_and_extract", "understand_speculatively", "end"]:
+    """Skip the LLM for messages the pre-filter rejected; otherwise pick the pipeline mode."""
+    if state.get("prefilter", {}).get("skip", False):
+        return "end"
+    mode = resolve_pipeline_mode(state)
+    if mode == "fused":
+        return "understand_and_extract"
+    if mode == "speculative" and likely_task(state):
+        return "understand_speculatively"
+    return "understand"
+
+
+def should_continue_after_fused(state: Dict[str, Any]) -> Literal["assign", "end"]:
+    """Task candidates from the fused or speculative call already have their extraction."""
+    understanding = state.get("message_understanding", {})
+    if understanding.get("is_task_candidate", False):
+        return "assign"
+    return "end"
 
 
 def should_continue_after_understanding(state: Dict[str, Any]) -> Literal["extract_task", "end"]:
@@ -26,7 +61,14 @@ def should_continue_after_understanding(state: Dict[str, Any]) -> Literal["extra
 
 
 async def execute_action(state: Dict[str, Any]) -> Dict[str, Any]:
-    """Execute the action based on mode decision."""
+    """
+    Execute the action based on mode decision.
+    
+    Only the task (or proposal) is created inline. The bot message and
+    notification are recorded in the durable outbox (keyed by message ID,
+    so a replayed request doesn't duplicate them) and delivered in the
+    background, so the response returns as soon as the task exists.
+    """
     action_decision = state.get("action_decision", {})
     workspace_id = state.get("workspace_id")
     channel_id = state.get("channel_id")
@@ -38,8 +80,11 @@ async def execute_action(state: Dict[str, Any]) -> Dict[str, Any]:
         "task_created": False,
         "proposal_created": False,
         "task_id": None,
-        "bot_message_posted": False
+        "bot_message_queued": False
     }
+    # Idempotency key prefix for outbox entries
+    effect_key = state.get("message_id") or str(uuid.uuid4())
+    effects = []
     
     try:
         if action_decision.get("should_create_task"):
@@ -54,7 +99,7 @@ async def execute_action(state: Dict[str, Any]) -> Dict[str, Any]:
                 "aiAssignmentReason": assignment.get("ai_assignment_reason") if action_decision.get("should_assign") else None
             }
             
-            created_task = await create_task(workspace_id, task_data)
+            created_task = await create_task.ainvoke({"workspace_id": workspace_id, "task_data": task_data})
             result["task_created"] = True
             result["task_id"] = str(created_task.get("_id", ""))
             
@@ -62,18 +107,21 @@ async def execute_action(state: Dict[str, Any]) -> Dict[str, Any]:
             bot_message = f"✅ Created task: {task_extraction.get('title')}"
             if action_decision.get("should_assign") and assignment.get("suggested_assignee_id"):
                 bot_message += f" (assigned)"
-            await post_bot_message(workspace_id, channel_id, bot_message)
-            result["bot_message_posted"] = True
+            effects.append((f"{effect_key}:post_bot_message", "post_bot_message", {
+                "workspace_id": workspace_id,
+                "channel_id": channel_id,
+                "content": bot_message
+            }))
             
             # Send notification if assigned
             if action_decision.get("should_assign") and assignment.get("suggested_assignee_id"):
-                await send_notification(
-                    user_id=assignment.get("suggested_assignee_id"),
-                    workspace_id=workspace_id,
-                    notification_type="TASK_ASSIGNED",
-                    entity_id=result["task_id"],
-                    message=f"You've been assigned: {task_extraction.get('title')}"
-                )
+                effects.append((f"{effect_key}:send_notification", "send_notification", {
+                    "user_id": assignment.get("suggested_assignee_id"),
+                    "workspace_id": workspace_id,
+                    "notification_type": "TASK_ASSIGNED",
+                    "entity_id": result["task_id"],
+                    "message": f"You've been assigned: {task_extraction.get('title')}"
+                }))
         
         elif action_decision.get("should_create_proposal"):
             # Create proposal
@@ -85,14 +133,21 @@ async def execute_action(state: Dict[str, Any]) -> Dict[str, Any]:
                 "aiNotes": f"AI-generated proposal - {action_decision.get('reason', '')}"
             }
             
-            created_proposal = await create_task_proposal(workspace_id, proposal_data)
+            created_proposal = await create_task_proposal.ainvoke({"workspace_id": workspace_id, "proposal_data": proposal_data})
             result["proposal_created"] = True
             result["task_id"] = str(created_proposal.get("_id", ""))
             
             # Post bot message
             bot_message = f"💡 Task proposal created: {task_extraction.get('title')} (pending review)"
-            await post_bot_message(workspace_id, channel_id, bot_message)
-            result["bot_message_posted"] = True
+            effects.append((f"{effect_key}:post_bot_message", "post_bot_message", {
+                "workspace_id": workspace_id,
+                "channel_id": channel_id,
+                "content": bot_message
+            }))
+        
+        if effects:
+            await outbox.record(effects)
+            result["bot_message_queued"] = True
     
     except Exception as e:
         print(f"Error executing action: {e}")
@@ -110,8 +165,11 @@ def create_chat_to_task_graph():
     
     # Add nodes
     workflow.add_node("safety_check", safety_policy_agent)
-    workflow.add_node("message_understanding", message_understanding_agent)
-    workflow.add_node("task_extraction", task_extraction_agent)
+    workflow.add_node("prefilter", prefilter_agent)
+    workflow.add_node("message_understanding", timed_stage("understanding", message_understanding_agent))
+    workflow.add_node("task_extraction", timed_stage("extraction", task_extraction_agent))
+    workflow.add_node("understanding_extraction", understanding_extraction_agent)
+    workflow.add_node("speculative_understanding", speculative_understanding_agent)
     workflow.add_node("assignment", assignment_agent)
     async def apply_mode_wrapper(state: Dict[str, Any]) -> Dict[str, Any]:
         """Wrapper to get mode from state and apply logic."""
@@ -125,7 +183,33 @@ def create_chat_to_task_graph():
     workflow.set_entry_point("safety_check")
     
     # Add edges
-    workflow.add_edge("safety_check", "message_understanding")
+    workflow.add_edge("safety_check", "prefilter")
+    workflow.add_conditional_edges(
+        "prefilter",
+        should_continue_after_prefilter,
+        {
+            "understand": "message_understanding",
+            "understand_and_extract": "understanding_extraction",
+            "understand_speculatively": "speculative_understanding",
+            "end": END
+        }
+    )
+    workflow.add_conditional_edges(
+        "understanding_extraction",
+        should_continue_after_fused,
+        {
+            "assign": "assignment",
+            "end": END
+        }
+    )
+    workflow.add_conditional_edges(
+        "speculative_understanding",
+        should_continue_after_fused,
+        {
+            "assign": "assignment",
+            "end": END
+        }
+    )
     workflow.add_conditional_edges(
         "message_understanding",
         should_continue_after_understanding,
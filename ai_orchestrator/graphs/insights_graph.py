@@ -24,7 +24,7 @@ async def check_omni_role(state: Dict[str, Any]) -> Dict[str, Any]:
         }
     
     # Get workspace members
-    members = await get_workspace_members(workspace_id)
+    members = await get_workspace_members.ainvoke({"workspace_id": workspace_id})
     
     # Check if user is omni
     user_member = next(
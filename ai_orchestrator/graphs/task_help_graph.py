@@ -3,11 +3,11 @@ from langgraph.graph import StateGraph, END
 try:
     from ..agents.safety import safety_policy_agent
     from ..agents.task_helper import task_helper_agent
-    from ..agents.summarization import summarization_agent
+    from ..agents.summarization import queue_summarization_agent
 except ImportError:
     from agents.safety import safety_policy_agent
     from agents.task_helper import task_helper_agent
-    from agents.summarization import summarization_agent
+    from agents.summarization import queue_summarization_agent
 
 
 def create_task_help_graph():
@@ -17,7 +17,8 @@ def create_task_help_graph():
     # Add nodes
     workflow.add_node("safety_check", safety_policy_agent)
     workflow.add_node("task_helper", task_helper_agent)
-    workflow.add_node("summarization", summarization_agent)
+    # Summarization runs in the background after the response
+    workflow.add_node("summarization", queue_summarization_agent)
     
     # Set entry point
     workflow.set_entry_point("safety_check")
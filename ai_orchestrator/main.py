@@ -1,28 +1,73 @@
 """FastAPI main application for Orbix AI Orchestrator."""
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Header, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator, Literal
+import json
 import os
 try:
     from .config import settings
+    from .metrics import collect_metrics
+    from .tools.http_client import start_http_client, close_http_client
+    from .tools.request_cache import request_scope
+    from .tools.deadline import Deadline, deadline_scope
+    from .tools.config_cache import invalidate_config
+    from .tools.stats_view import stats_views
+    from .tools.side_effects import side_effects
+    from .tools.outbox import outbox
     from .graphs.chat_to_task_graph import chat_to_task_graph
     from .graphs.task_help_graph import task_help_graph
     from .graphs.ask_orbix_chat_graph import ask_orbix_chat_graph
+    from .agents.summarization import summarization_queue
     from .graphs.insights_graph import insights_graph
 except ImportError:
     # For direct execution
     from config import settings
+    from metrics import collect_metrics
+    from tools.http_client import start_http_client, close_http_client
+    from tools.request_cache import request_scope
+    from tools.deadline import Deadline, deadline_scope
+    from tools.config_cache import invalidate_config
+    from tools.stats_view import stats_views
+    from tools.side_effects import side_effects
+    from tools.outbox import outbox
     from graphs.chat_to_task_graph import chat_to_task_graph
     from graphs.task_help_graph import task_help_graph
     from graphs.ask_orbix_chat_graph import ask_orbix_chat_graph
+    from agents.summarization import summarization_queue
     from graphs.insights_graph import insights_graph
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Manage shared resources for the lifetime of the app."""
+    # Shared, pooled HTTP client for backend calls
+    await start_http_client()
+    # Workers for bot messages/notifications queued off the response path
+    side_effects.start()
+    # Summarization/RAG indexing queued after Ask Orbix and Task Help responses
+    summarization_queue.start()
+    # Redeliver anything left in the outbox by a previous run
+    outbox.start()
+    try:
+        yield
+    finally:
+        # Stop claiming outbox entries, drain queued side effects while the
+        # HTTP client is still open, then acknowledge what was delivered
+        await outbox.stop()
+        await summarization_queue.stop(settings.summarization_shutdown_timeout)
+        await side_effects.stop(settings.side_effect_shutdown_timeout)
+        await outbox.close()
+        await close_http_client()
+
+
 app = FastAPI(
     title="Orbix AI Orchestrator",
     description="LangGraph-based AI service for workspace intelligence",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -46,6 +91,10 @@ class ChatToTaskRequest(BaseModel):
     sender_name: Optional[str] = None
     channel_name: Optional[str] = None
     thread_context: Optional[str] = None
+    # "two_call", "fused" or "speculative" (overrides the workspace/default pipeline mode)
+    pipeline_mode: Optional[Literal["two_call", "fused", "speculative"]] = None
+    # Latency budget in ms (defaults to REQUEST_DEADLINES_MS / REQUEST_DEADLINE_MS)
+    deadline_ms: Optional[int] = None
 
 
 class ChatToTaskResponse(BaseModel):
@@ -55,6 +104,8 @@ class ChatToTaskResponse(BaseModel):
     task_id: Optional[str] = None
     reason: Optional[str] = None
     error: Optional[str] = None
+    # Degradations applied to meet the deadline, e.g. "skipped:workspace_context"
+    degradations: List[str] = []
 
 
 class TaskHelpRequest(BaseModel):
@@ -63,6 +114,7 @@ class TaskHelpRequest(BaseModel):
     task_id: str
     user_id: str
     question: Optional[str] = None
+    deadline_ms: Optional[int] = None
 
 
 class TaskHelpResponse(BaseModel):
@@ -73,6 +125,7 @@ class TaskHelpResponse(BaseModel):
     risk_notes: List[str]
     related_context: Optional[str] = None
     error: Optional[str] = None
+    degradations: List[str] = []
 
 
 class AskOrbixRequest(BaseModel):
@@ -81,6 +134,7 @@ class AskOrbixRequest(BaseModel):
     user_id: str
     message: str
     history: Optional[List[Dict[str, str]]] = None
+    deadline_ms: Optional[int] = None
 
 
 class AskOrbixResponse(BaseModel):
@@ -90,12 +144,14 @@ class AskOrbixResponse(BaseModel):
     sources: List[str] = []
     suggested_actions: Optional[List[str]] = None
     error: Optional[str] = None
+    degradations: List[str] = []
 
 
 class InsightsRequest(BaseModel):
     """Request for insights endpoint."""
     workspace_id: str
     user_id: str
+    deadline_ms: Optional[int] = None
 
 
 class InsightsResponse(BaseModel):
@@ -105,6 +161,45 @@ class InsightsResponse(BaseModel):
     actionable_suggestions: List[str]
     metrics: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
+    degradations: List[str] = []
+
+
+class CacheInvalidateRequest(BaseModel):
+    """Request for cache invalidation endpoint."""
+    workspace_id: Optional[str] = None
+    channel_id: Optional[str] = None
+
+
+class CacheInvalidateResponse(BaseModel):
+    """Response from cache invalidation endpoint."""
+    success: bool
+    invalidated: Dict[str, int]
+
+
+class WorkspaceEvent(BaseModel):
+    """A task or member change pushed by the backend."""
+    type: Literal[
+        "task.created", "task.updated", "task.deleted",
+        "member.added", "member.updated", "member.removed"
+    ]
+    seq: Optional[int] = None  # Per-workspace sequence number, for gap detection
+    task: Optional[Dict[str, Any]] = None
+    task_id: Optional[str] = None
+    member: Optional[Dict[str, Any]] = None
+    member_id: Optional[str] = None
+
+
+class WorkspaceEventsRequest(BaseModel):
+    """Request for event ingest endpoint."""
+    workspace_id: str
+    events: List[WorkspaceEvent]
+
+
+class WorkspaceEventsResponse(BaseModel):
+    """Response from event ingest endpoint."""
+    success: bool
+    applied: int
+    skipped: int
 
 
 # Authentication dependency
@@ -128,6 +223,48 @@ async def health_check():
     return {"status": "ok", "service": "orbix-ai-orchestrator"}
 
 
+@app.get("/ai/metrics")
+async def metrics_endpoint(_: bool = Depends(verify_api_key)):
+    """Runtime metrics (connection pool usage, caches, queues) for scraping."""
+    return collect_metrics()
+
+
+@app.post("/ai/cache/invalidate", response_model=CacheInvalidateResponse)
+async def cache_invalidate_endpoint(
+    request: CacheInvalidateRequest,
+    _: bool = Depends(verify_api_key)
+):
+    """
+    Invalidate cached workspace/channel configuration.
+    
+    Called by the backend when a workspace or channel setting changes.
+    With neither ID set, all cached configuration is dropped.
+    """
+    invalidated = invalidate_config(
+        workspace_id=request.workspace_id,
+        channel_id=request.channel_id
+    )
+    return CacheInvalidateResponse(success=True, invalidated=invalidated)
+
+
+@app.post("/ai/events", response_model=WorkspaceEventsResponse)
+async def events_endpoint(
+    request: WorkspaceEventsRequest,
+    _: bool = Depends(verify_api_key)
+):
+    """
+    Ingest task and member change events from the backend.
+    
+    Events keep an in-memory stats view per workspace up to date so
+    /ai/insights and /ai/ask_orbix read stats without a full fetch.
+    """
+    result = stats_views.apply_events(
+        request.workspace_id,
+        [event.dict() for event in request.events]
+    )
+    return WorkspaceEventsResponse(success=True, **result)
+
+
 @app.post("/ai/chat_to_task", response_model=ChatToTaskResponse)
 async def chat_to_task_endpoint(
     request: ChatToTaskRequest,
@@ -138,6 +275,7 @@ async def chat_to_task_endpoint(
     
     Triggered when a new message is created in an AI-active channel.
     """
+    deadline = Deadline("chat_to_task", request.deadline_ms)
     try:
         # Prepare initial state
         initial_state = {
@@ -149,12 +287,16 @@ async def chat_to_task_endpoint(
             "sender_name": request.sender_name or "Unknown",
             "channel_name": request.channel_name or "Unknown",
             "thread_context": request.thread_context,
+            "pipeline_mode": request.pipeline_mode,
             "is_dm": False,  # Channel-based, not DM
-            "explicit_consent": True  # Channel messages are public
+            "explicit_consent": True,  # Channel messages are public
+            "deadline": deadline
         }
         
-        # Run graph
-        result = await chat_to_task_graph.ainvoke(initial_state)
+        # Run graph (backend reads are memoized for this request)
+        with deadline_scope(deadline):
+            async with request_scope("chat_to_task"):
+                result = await chat_to_task_graph.ainvoke(initial_state)
         
         # Check safety
         safety_check = result.get("safety_check", {})
@@ -162,7 +304,8 @@ async def chat_to_task_endpoint(
             return ChatToTaskResponse(
                 success=False,
                 action_taken="blocked",
-                reason=safety_check.get("reason", "Safety check failed")
+                reason=safety_check.get("reason", "Safety check failed"),
+                degradations=deadline.degradations
             )
         
         # Check if task candidate
@@ -171,7 +314,8 @@ async def chat_to_task_endpoint(
             return ChatToTaskResponse(
                 success=True,
                 action_taken="no_action",
-                reason="Message is not a task candidate"
+                reason="Message is not a task candidate",
+                degradations=deadline.degradations
             )
         
         # Get action result
@@ -182,21 +326,24 @@ async def chat_to_task_endpoint(
                 success=True,
                 action_taken="task_created",
                 task_id=action_result.get("task_id"),
-                reason=result.get("action_decision", {}).get("reason", "Task created")
+                reason=result.get("action_decision", {}).get("reason", "Task created"),
+                degradations=deadline.degradations
             )
         elif action_result.get("proposal_created"):
             return ChatToTaskResponse(
                 success=True,
                 action_taken="proposal_created",
                 task_id=action_result.get("task_id"),
-                reason=result.get("action_decision", {}).get("reason", "Proposal created")
+                reason=result.get("action_decision", {}).get("reason", "Proposal created"),
+                degradations=deadline.degradations
             )
         else:
             return ChatToTaskResponse(
                 success=False,
                 action_taken="no_action",
                 reason="No action taken",
-                error=action_result.get("error")
+                error=action_result.get("error"),
+                degradations=deadline.degradations
             )
     
     except Exception as e:
@@ -204,7 +351,8 @@ async def chat_to_task_endpoint(
         return ChatToTaskResponse(
             success=False,
             action_taken="error",
-            error=str(e)
+            error=str(e),
+            degradations=deadline.degradations
         )
 
 
@@ -218,6 +366,7 @@ async def task_help_endpoint(
     
     Triggered when user clicks "Ask Orbix" on a task.
     """
+    deadline = Deadline("task_help", request.deadline_ms)
     try:
         # Prepare initial state
         initial_state = {
@@ -226,11 +375,14 @@ async def task_help_endpoint(
             "user_id": request.user_id,
             "user_question": request.question or "How can I complete this task?",
             "is_dm": False,
-            "explicit_consent": True
+            "explicit_consent": True,
+            "deadline": deadline
         }
         
-        # Run graph
-        result = await task_help_graph.ainvoke(initial_state)
+        # Run graph (backend reads are memoized for this request)
+        with deadline_scope(deadline):
+            async with request_scope("task_help"):
+                result = await task_help_graph.ainvoke(initial_state)
         
         # Check safety
         safety_check = result.get("safety_check", {})
@@ -240,7 +392,8 @@ async def task_help_endpoint(
                 explanation="",
                 step_by_step_plan=[],
                 risk_notes=[],
-                error=safety_check.get("reason", "Safety check failed")
+                error=safety_check.get("reason", "Safety check failed"),
+                degradations=deadline.degradations
             )
         
         # Get task help
@@ -251,7 +404,8 @@ async def task_help_endpoint(
             explanation=task_help.get("explanation", ""),
             step_by_step_plan=task_help.get("step_by_step_plan", []),
             risk_notes=task_help.get("risk_notes", []),
-            related_context=task_help.get("related_context")
+            related_context=task_help.get("related_context"),
+            degradations=deadline.degradations
         )
     
     except Exception as e:
@@ -261,7 +415,8 @@ async def task_help_endpoint(
             explanation="",
             step_by_step_plan=[],
             risk_notes=[],
-            error=str(e)
+            error=str(e),
+            degradations=deadline.degradations
         )
 
 
@@ -275,6 +430,7 @@ async def ask_orbix_endpoint(
     
     Triggered when user asks Orbix a question in chat.
     """
+    deadline = Deadline("ask_orbix", request.deadline_ms)
     try:
         # Prepare initial state
         initial_state = {
@@ -283,11 +439,14 @@ async def ask_orbix_endpoint(
             "user_message": request.message,
             "chat_history": request.history or [],
             "is_dm": False,
-            "explicit_consent": True
+            "explicit_consent": True,
+            "deadline": deadline
         }
         
-        # Run graph
-        result = await ask_orbix_chat_graph.ainvoke(initial_state)
+        # Run graph (backend reads are memoized for this request)
+        with deadline_scope(deadline):
+            async with request_scope("ask_orbix"):
+                result = await ask_orbix_chat_graph.ainvoke(initial_state)
         
         # Check safety
         safety_check = result.get("safety_check", {})
@@ -295,7 +454,8 @@ async def ask_orbix_endpoint(
             return AskOrbixResponse(
                 success=False,
                 answer="",
-                error=safety_check.get("reason", "Safety check failed")
+                error=safety_check.get("reason", "Safety check failed"),
+                degradations=deadline.degradations
             )
         
         # Get assistant response
@@ -305,7 +465,8 @@ async def ask_orbix_endpoint(
             success=True,
             answer=assistant_response.get("answer", ""),
             sources=assistant_response.get("sources", []),
-            suggested_actions=assistant_response.get("suggested_actions")
+            suggested_actions=assistant_response.get("suggested_actions"),
+            degradations=deadline.degradations
         )
     
     except Exception as e:
@@ -313,10 +474,88 @@ async def ask_orbix_endpoint(
         return AskOrbixResponse(
             success=False,
             answer="",
-            error=str(e)
+            error=str(e),
+            degradations=deadline.degradations
         )
 
 
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _ask_orbix_events(initial_state: Dict[str, Any]) -> AsyncIterator[str]:
+    """Run the Ask Orbix graph, yielding answer tokens as they are generated."""
+    deadline = initial_state["deadline"]
+    final_state: Dict[str, Any] = {}
+    streamed = False
+    try:
+        with deadline_scope(deadline):
+            async with request_scope("ask_orbix"):
+                async for mode, chunk in ask_orbix_chat_graph.astream(
+                    initial_state,
+                    stream_mode=["messages", "updates"]
+                ):
+                    if mode == "messages":
+                        message, metadata = chunk
+                        if metadata.get("langgraph_node") == "workspace_assistant" and isinstance(message.content, str) and message.content:
+                            streamed = True
+                            yield _sse("token", {"text": message.content})
+                        continue
+                    
+                    for node, update in chunk.items():
+                        final_state = update or final_state
+                        if node == "safety_check":
+                            safety_check = final_state.get("safety_check", {})
+                            if not safety_check.get("allowed", False):
+                                yield _sse("error", {
+                                    "error": safety_check.get("reason", "Safety check failed"),
+                                    "degradations": deadline.degradations
+                                })
+                                return
+    except Exception as e:
+        print(f"Error in ask_orbix stream: {e}")
+        yield _sse("error", {"error": str(e), "degradations": deadline.degradations})
+        return
+    
+    assistant_response = final_state.get("assistant_response", {})
+    if not streamed:
+        # The model answered without streaming (e.g. a cached response)
+        yield _sse("token", {"text": assistant_response.get("answer", "")})
+    yield _sse("sources", {"sources": assistant_response.get("sources", [])})
+    yield _sse("suggested_actions", {"suggested_actions": assistant_response.get("suggested_actions")})
+    yield _sse("done", {"success": True, "degradations": deadline.degradations})
+
+
+@app.post("/ai/ask_orbix/stream")
+async def ask_orbix_stream_endpoint(
+    request: AskOrbixRequest,
+    _: bool = Depends(verify_api_key)
+):
+    """
+    Streaming variant of /ai/ask_orbix (Server-Sent Events).
+    
+    Emits "token" events with answer text as it is generated, then
+    "sources", "suggested_actions" and "done". Failures and safety
+    blocks end the stream with an "error" event. Summarization runs
+    in the background after the stream ends.
+    """
+    initial_state = {
+        "workspace_id": request.workspace_id,
+        "user_id": request.user_id,
+        "user_message": request.message,
+        "chat_history": request.history or [],
+        "is_dm": False,
+        "explicit_consent": True,
+        "deadline": Deadline("ask_orbix", request.deadline_ms)
+    }
+    return StreamingResponse(
+        _ask_orbix_events(initial_state),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/ai/insights", response_model=InsightsResponse)
 async def insights_endpoint(
     request: InsightsRequest,
@@ -327,17 +566,21 @@ async def insights_endpoint(
     
     Triggered when Omni user requests insights.
     """
+    deadline = Deadline("insights", request.deadline_ms)
     try:
         # Prepare initial state
         initial_state = {
             "workspace_id": request.workspace_id,
             "user_id": request.user_id,
             "is_dm": False,
-            "explicit_consent": True
+            "explicit_consent": True,
+            "deadline": deadline
         }
         
-        # Run graph
-        result = await insights_graph.ainvoke(initial_state)
+        # Run graph (backend reads are memoized for this request)
+        with deadline_scope(deadline):
+            async with request_scope("insights"):
+                result = await insights_graph.ainvoke(initial_state)
         
         # Check safety
         safety_check = result.get("safety_check", {})
@@ -346,7 +589,8 @@ async def insights_endpoint(
                 success=False,
                 summary="",
                 actionable_suggestions=[],
-                error=safety_check.get("reason", "Safety check failed")
+                error=safety_check.get("reason", "Safety check failed"),
+                degradations=deadline.degradations
             )
         
         # Check Omni role
@@ -355,7 +599,8 @@ async def insights_endpoint(
                 success=False,
                 summary="",
                 actionable_suggestions=[],
-                error="Omni role required"
+                error="Omni role required",
+                degradations=deadline.degradations
             )
         
         # Get insights
@@ -365,7 +610,8 @@ async def insights_endpoint(
             success=True,
             summary=insights.get("summary", ""),
             actionable_suggestions=insights.get("actionable_suggestions", []),
-            metrics=insights.get("metrics")
+            metrics=insights.get("metrics"),
+            degradations=deadline.degradations
         )
     
     except Exception as e:
@@ -374,7 +620,8 @@ async def insights_endpoint(
             success=False,
             summary="",
             actionable_suggestions=[],
-            error=str(e)
+            error=str(e),
+            degradations=deadline.degradations
         )
 
 
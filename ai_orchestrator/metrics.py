@@ -0,0 +1,34 @@
+"""Runtime metrics registry exposed through the /ai/metrics endpoint."""
+from typing import Any, Callable, Dict
+
+
+# Registered metric providers: section name -> callable returning a dict
+_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register_metrics(name: str, provider: Callable[[], Dict[str, Any]]) -> None:
+    """
+    Register a metrics provider under a section name.
+
+    Args:
+        name: Section name in the metrics payload
+        provider: Callable returning a JSON-serialisable dict
+    """
+    _providers[name] = provider
+
+
+def collect_metrics() -> Dict[str, Any]:
+    """
+    Collect a snapshot from every registered provider.
+
+    Returns:
+        Dictionary keyed by section name
+    """
+    snapshot = {}
+    for name, provider in _providers.items():
+        try:
+            snapshot[name] = provider()
+        except Exception as e:
+            print(f"Error collecting metrics for {name}: {e}")
+            snapshot[name] = {"error": str(e)}
+    return snapshot
@@ -0,0 +1,100 @@
+"""Async micro-batching of concurrent model calls."""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Optional, Set, Tuple, TypeVar
+try:
+    from ..metrics import register_metrics
+except ImportError:
+    from metrics import register_metrics
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Collects items submitted concurrently and processes them together.
+
+    A batch is flushed when it reaches max_batch_size or window_seconds
+    after its first item arrived, whichever comes first. process_batch
+    receives the items in submission order and must return one result
+    per item; each submitter gets its own result (or the batch's error).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        process_batch: Callable[[List[T]], Awaitable[List[R]]],
+        max_batch_size: int,
+        window_seconds: float
+    ):
+        self.name = name
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.window_seconds = window_seconds
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._stats = {"items": 0, "batches": 0, "max_batch": 0, "errors": 0}
+        # The loop only holds weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, item: T) -> R:
+        """Add an item to the current batch and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        self._stats["items"] += 1
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """Start processing everything pending as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[T, asyncio.Future]]) -> None:
+        self._stats["batches"] += 1
+        self._stats["max_batch"] = max(self._stats["max_batch"], len(batch))
+        try:
+            results = await self.process_batch([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"{self.name}: expected {len(batch)} results, got {len(results)}")
+        except Exception as e:
+            self._stats["errors"] += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch counts and sizes."""
+        batches = self._stats["batches"]
+        return {
+            **self._stats,
+            "avg_batch": round(self._stats["items"] / batches, 2) if batches else 0.0,
+        }
+
+
+_batchers: List[MicroBatcher] = []
+
+
+def register_batcher(batcher: MicroBatcher) -> MicroBatcher:
+    """Include a batcher in /ai/metrics."""
+    _batchers.append(batcher)
+    return batcher
+
+
+register_metrics("llm_batching", lambda: {b.name: b.stats() for b in _batchers})
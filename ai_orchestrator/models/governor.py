@@ -0,0 +1,257 @@
+"""Global scheduler for LLM calls: rate limits, priority lanes and 429 backoff."""
+import asyncio
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Optional, Sequence, Tuple
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+try:
+    from ..config import settings
+    from ..metrics import register_metrics
+    from ..prompts.budget import estimate_message_tokens
+    from ..tools.request_cache import current_request_cache
+except ImportError:
+    from config import settings
+    from metrics import register_metrics
+    from prompts.budget import estimate_message_tokens
+    from tools.request_cache import current_request_cache
+
+
+LANES = ("interactive", "background")
+
+_lane_override: ContextVar[Optional[str]] = ContextVar("llm_lane", default=None)
+
+
+@contextmanager
+def llm_lane(lane: str):
+    """Run LLM calls made inside the block in the given lane."""
+    token = _lane_override.set(lane)
+    try:
+        yield
+    finally:
+        _lane_override.reset(token)
+
+
+def current_lane() -> str:
+    """Lane for the current call: explicit override, else by endpoint."""
+    lane = _lane_override.get()
+    if lane in LANES:
+        return lane
+    scope = current_request_cache()
+    if scope is not None and scope.name in settings.llm_interactive_endpoints:
+        return "interactive"
+    return "background"
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Whether an exception is a provider rate-limit (HTTP 429) response."""
+    for attr in ("code", "status_code"):
+        if getattr(error, attr, None) == 429:
+            return True
+    text = str(error)
+    return "429" in text or "RESOURCE_EXHAUSTED" in text or "Resource has been exhausted" in text
+
+
+class TokenBucket:
+    """Refills at capacity per minute; a capacity of 0 means unlimited."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self._updated = time.monotonic()
+
+    def _refill(self, rate_factor: float) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.capacity * rate_factor / 60)
+        self._updated = now
+
+    def wait_time(self, amount: float, rate_factor: float) -> float:
+        """Seconds until amount is available (0 if it is now)."""
+        if not self.capacity:
+            return 0.0
+        self._refill(rate_factor)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60 / (self.capacity * rate_factor)
+
+    def take(self, amount: float) -> None:
+        if self.capacity:
+            self.level -= min(amount, self.capacity)
+
+    def adjust(self, amount: float) -> None:
+        """Charge (or refund, if negative) the difference from an estimate."""
+        if self.capacity:
+            self.level = min(self.capacity, self.level - amount)
+
+
+class LLMGovernor:
+    """
+    Admits LLM calls under concurrency, request-rate and token-rate limits.
+
+    Waiting calls queue per lane; the interactive lane is always served
+    before the background lane, FIFO within a lane. Token use is charged
+    from an estimate up front and corrected from the response's usage
+    metadata. A 429 from the provider pauses all admissions with
+    exponential backoff and halves the admitted rate, which then
+    recovers gradually as calls succeed.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        output_tokens_estimate: int,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float
+    ):
+        self.max_concurrency = max_concurrency
+        self.output_tokens_estimate = output_tokens_estimate
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._waiters: Dict[str, Deque[Tuple[asyncio.Future, int]]] = {lane: deque() for lane in LANES}
+        self._in_flight = 0
+        self._rate_factor = 1.0
+        self._backoff = 0.0
+        self._paused_until = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._stats = {
+            lane: {"calls": 0, "wait_ms": 0.0, "max_wait_ms": 0.0, "max_queue": 0}
+            for lane in LANES
+        }
+        self._rate_limited = 0
+        self._retries = 0
+
+    async def invoke(self, llm: BaseChatModel, prompt: Sequence[BaseMessage]) -> BaseMessage:
+        """Call llm.ainvoke(prompt) once admitted, retrying on rate limits."""
+        lane = current_lane()
+        estimate = estimate_message_tokens(prompt) + self.output_tokens_estimate
+        attempt = 0
+        while True:
+            await self._acquire(lane, estimate)
+            try:
+                response = await llm.ainvoke(prompt)
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+                self._on_rate_limited()
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self._retries += 1
+                continue
+            finally:
+                self._release()
+            self._on_success(response, estimate)
+            return response
+
+    async def _acquire(self, lane: str, tokens: int) -> None:
+        started = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        queue = self._waiters[lane]
+        queue.append((future, tokens))
+        stats = self._stats[lane]
+        stats["max_queue"] = max(stats["max_queue"], len(queue))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just as the caller was cancelled: give the slot back
+                self._release()
+            else:
+                try:
+                    queue.remove((future, tokens))
+                except ValueError:
+                    pass
+            raise
+        waited = (time.perf_counter() - started) * 1000
+        stats["calls"] += 1
+        stats["wait_ms"] += waited
+        stats["max_wait_ms"] = max(stats["max_wait_ms"], waited)
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Admit queued calls while limits allow; otherwise retry when they will."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._in_flight < self.max_concurrency:
+            queue = next((self._waiters[lane] for lane in LANES if self._waiters[lane]), None)
+            if queue is None:
+                return
+            future, tokens = queue[0]
+            if future.done():
+                queue.popleft()
+                continue
+            wait = max(
+                self._paused_until - time.monotonic(),
+                self._requests.wait_time(1, self._rate_factor),
+                self._tokens.wait_time(tokens, self._rate_factor),
+            )
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            queue.popleft()
+            self._requests.take(1)
+            self._tokens.take(tokens)
+            self._in_flight += 1
+            future.set_result(None)
+
+    def _on_rate_limited(self) -> None:
+        self._rate_limited += 1
+        self._backoff = min(self.backoff_max, self._backoff * 2 if self._backoff else self.backoff_base)
+        self._paused_until = max(self._paused_until, time.monotonic() + self._backoff)
+        self._rate_factor = max(0.1, self._rate_factor / 2)
+        print(f"LLM rate limited; pausing {self._backoff:.1f}s (rate factor {self._rate_factor:.2f})")
+
+    def _on_success(self, response: BaseMessage, estimate: int) -> None:
+        usage = getattr(response, "usage_metadata", None)
+        if usage and usage.get("total_tokens"):
+            self._tokens.adjust(usage["total_tokens"] - estimate)
+        self._backoff = 0.0
+        self._rate_factor = min(1.0, self._rate_factor + 0.05)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and admission wait times per lane, plus backoff state."""
+        lanes = {}
+        for lane, s in self._stats.items():
+            lanes[lane] = {
+                **s,
+                "queue_depth": len(self._waiters[lane]),
+                "wait_ms": round(s["wait_ms"], 3),
+                "max_wait_ms": round(s["max_wait_ms"], 3),
+                "avg_wait_ms": round(s["wait_ms"] / s["calls"], 3) if s["calls"] else 0.0,
+            }
+        return {
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "rate_factor": round(self._rate_factor, 3),
+            "rate_limited": self._rate_limited,
+            "retries": self._retries,
+            "paused_for_seconds": round(max(0.0, self._paused_until - time.monotonic()), 3),
+            "lanes": lanes,
+        }
+
+
+llm_governor = LLMGovernor(
+    max_concurrency=settings.llm_max_concurrency,
+    requests_per_minute=settings.llm_requests_per_minute,
+    tokens_per_minute=settings.llm_tokens_per_minute,
+    output_tokens_estimate=settings.llm_output_tokens_estimate,
+    max_retries=settings.llm_rate_limit_retries,
+    backoff_base=settings.llm_backoff_base_seconds,
+    backoff_max=settings.llm_backoff_max_seconds,
+)
+
+register_metrics("llm_governor", llm_governor.stats)
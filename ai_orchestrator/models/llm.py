@@ -1,34 +1,157 @@
 """LangChain Gemini model wrappers."""
-from typing import Optional
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Sequence, Tuple
+from uuid import UUID
 from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.callbacks import AsyncCallbackHandler
 from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
 try:
     from ..config import settings
+    from ..metrics import register_metrics
+    from .llm_cache import cache_keys, llm_response_cache
+    from ..prompts.budget import record_prompt_size
+    from .governor import llm_governor
+    from ..tools.deadline import Deadline, DeadlineExceeded, current_deadline
 except ImportError:
     from config import settings
+    from metrics import register_metrics
+    from models.llm_cache import cache_keys, llm_response_cache
+    from prompts.budget import record_prompt_size
+    from models.governor import llm_governor
+    from tools.deadline import Deadline, DeadlineExceeded, current_deadline
+
+
+class _ModelStats(AsyncCallbackHandler):
+    """Per-client construction time, first-call (warm-up) latency and call counts."""
+
+    def __init__(self, construct_ms: float, shared_transport: bool):
+        self.construct_ms = construct_ms
+        self.shared_transport = shared_transport
+        self.first_call_ms: Optional[float] = None
+        self.calls = 0
+        self._started: Dict[UUID, float] = {}
+
+    async def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self.calls += 1
+        if self.first_call_ms is None:
+            self._started[run_id] = time.perf_counter()
+
+    async def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._started.pop(run_id, None)
+        if started is not None and self.first_call_ms is None:
+            self.first_call_ms = (time.perf_counter() - started) * 1000
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started.pop(run_id, None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "construct_ms": round(self.construct_ms, 3),
+            "first_call_ms": round(self.first_call_ms, 3) if self.first_call_ms is not None else None,
+            "shared_transport": self.shared_transport,
+            "calls": self.calls,
+        }
+
+
+class ModelRegistry:
+    """
+    Builds each (model, temperature, options) client once and reuses it.
+
+    Clients for the same model and options share one underlying API
+    client (and its connection pool); other temperatures are cheap
+    copies of the first one built. Chat models are stateless between
+    calls, so a shared instance is safe for concurrent async use.
+    """
+
+    def __init__(self):
+        self._models: Dict[Hashable, BaseChatModel] = {}
+        self._stats: Dict[Hashable, _ModelStats] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_name: str, temperature: float, **options: Any) -> BaseChatModel:
+        """Get the shared client for a model, temperature and extra options."""
+        key = (model_name, temperature, tuple(sorted(options.items())))
+        llm = self._models.get(key)
+        if llm is not None:
+            return llm
+        with self._lock:
+            llm = self._models.get(key)
+            if llm is None:
+                llm = self._build(key, model_name, temperature, options)
+        return llm
+
+    def _build(
+        self,
+        key: Tuple,
+        model_name: str,
+        temperature: float,
+        options: Dict[str, Any]
+    ) -> BaseChatModel:
+        started = time.perf_counter()
+        base = next(
+            (m for k, m in self._models.items() if k[0] == model_name and k[2] == key[2]),
+            None
+        )
+        if base is not None:
+            # Reuses base.client, so no new transport is created
+            llm = base.model_copy(update={"temperature": temperature})
+        else:
+            llm = ChatGoogleGenerativeAI(
+                model=model_name,
+                google_api_key=settings.gemini_api_key,
+                temperature=temperature,
+                **options,
+            )
+        stats = _ModelStats((time.perf_counter() - started) * 1000, shared_transport=base is not None)
+        llm.callbacks = [stats]
+        self._models[key] = llm
+        self._stats[key] = stats
+        return llm
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-client construction and warm-up timings."""
+        return {
+            "clients": len(self._models),
+            "models": {
+                f"{model}@{temperature}" + (f" {dict(options)}" if options else ""): s.to_dict()
+                for (model, temperature, options), s in self._stats.items()
+            },
+        }
+
+
+model_registry = ModelRegistry()
+
+register_metrics("llm_models", model_registry.stats)
 
 
 def get_chat_model(
     temperature: Optional[float] = None,
-    model_name: Optional[str] = None
+    model_name: Optional[str] = None,
+    **options: Any
 ) -> BaseChatModel:
     """
-    Get a Gemini chat model instance.
+    Get a shared Gemini chat model instance.
     
     Args:
         temperature: Model temperature (defaults to config)
         model_name: Model name (defaults to config)
+        **options: Extra ChatGoogleGenerativeAI options (part of the cache key)
     
     Returns:
         ChatGoogleGenerativeAI instance
     """
-    return ChatGoogleGenerativeAI(
-        model=model_name or settings.gemini_model,
-        google_api_key=settings.gemini_api_key,
-        temperature=temperature or settings.gemini_temperature,
+    return model_registry.get(
+        model_name or settings.gemini_model,
+        temperature if temperature is not None else settings.gemini_temperature,
+        **options,
     )
 
 
+CLASSIFICATION_TEMPERATURE = 0.3
+
+
 def get_classification_model() -> BaseChatModel:
     """
     Get a model optimized for classification tasks (lower temperature).
@@ -36,7 +159,7 @@ def get_classification_model() -> BaseChatModel:
     Returns:
         ChatGoogleGenerativeAI instance with lower temperature
     """
-    return get_chat_model(temperature=0.3)
+    return get_chat_model(temperature=CLASSIFICATION_TEMPERATURE)
 
 
 def get_reasoning_model() -> BaseChatModel:
@@ -58,3 +181,210 @@ def get_chat_model_for_conversation() -> BaseChatModel:
     """
     return get_chat_model(temperature=0.7)
 
+
+def _short_deadline() -> Optional[Deadline]:
+    """The request deadline, if it is close enough to switch to GEMINI_FAST_MODEL."""
+    deadline = current_deadline()
+    if (
+        deadline is not None
+        and settings.gemini_fast_model
+        and deadline.remaining_ms() < settings.deadline_fast_model_ms
+    ):
+        return deadline
+    return None
+
+
+async def invoke_model(
+    llm: BaseChatModel,
+    prompt: Sequence[BaseMessage],
+    agent: str,
+    call: Optional[Callable[[Sequence[BaseMessage]], Awaitable[BaseMessage]]] = None,
+    validate: Optional[Callable[[str], Any]] = None
+) -> BaseMessage:
+    """
+    Call a model on behalf of an agent.
+    
+    Agents listed in LLM_CACHE_AGENT_TTLS are answered from the response
+    cache when the same prompt was seen within their TTL. Responses that
+    fail validate are returned but not cached. The prompt's
+    estimated size is recorded per agent. Model calls are admitted by
+    the LLM governor (rate limits, priority lanes, 429 backoff).
+    
+    Under a request deadline the call is bounded by the time left. With
+    less than DEADLINE_FAST_MODEL_MS left it goes to GEMINI_FAST_MODEL
+    (if set), and with less than DEADLINE_SKIP_LLM_MS left it is not
+    made at all.
+    
+    Args:
+        llm: Chat model to call
+        prompt: Formatted prompt messages
+        agent: Calling agent name (selects cache opt-in and TTL)
+        call: Optional replacement for the governed llm.ainvoke (e.g. a
+            micro-batched call); its result is cached under this prompt
+        validate: Optional check of the response text (e.g. the caller's
+            parser); raising ValueError (incl. JSONDecodeError) or
+            TypeError keeps the response out of the cache
+    
+    Returns:
+        The model's response message
+    
+    Raises:
+        DeadlineExceeded: Too little time was left, or the call ran past
+            the deadline
+    """
+    deadline = current_deadline()
+    if deadline is not None and deadline.remaining_ms() < settings.deadline_skip_llm_ms:
+        raise DeadlineExceeded(f"{agent}: {deadline.remaining_ms():.0f}ms left, LLM call skipped")
+    if call is None and _short_deadline() is not None and getattr(llm, "model", None) != settings.gemini_fast_model:
+        deadline.degrade(f"fast_model:{agent}")
+        llm = get_chat_model(temperature=getattr(llm, "temperature", None), model_name=settings.gemini_fast_model)
+    
+    record_prompt_size(agent, prompt)
+    if call is None:
+        async def call(messages: Sequence[BaseMessage]) -> BaseMessage:
+            return await llm_governor.invoke(llm, messages)
+    if deadline is not None:
+        unbounded = call
+        
+        async def call(messages: Sequence[BaseMessage]) -> BaseMessage:
+            return await deadline.bound(unbounded(messages), f"{agent} LLM call")
+    ttl = settings.llm_cache_agent_ttls.get(agent)
+    if not ttl:
+        return await call(prompt)
+    
+    model_name = getattr(llm, "model", None) or getattr(llm, "model_name", "")
+    keys = cache_keys(model_name, getattr(llm, "temperature", None), prompt)
+    cached = await llm_response_cache.get(agent, keys)
+    if cached is not None:
+        return AIMessage(content=cached)
+    
+    response = await call(prompt)
+    if isinstance(response.content, str) and response.content:
+        if validate is not None:
+            try:
+                validate(response.content)
+            except (ValueError, TypeError):
+                return response
+        await llm_response_cache.set(agent, keys, response.content, ttl)
+    return response
+
+
+_routing: Dict[str, Dict[str, int]] = {}
+
+
+def _routing_stats(agent: str) -> Dict[str, int]:
+    stats = _routing.get(agent)
+    if stats is None:
+        stats = _routing[agent] = {
+            "calls": 0, "fast_accepted": 0, "escalated_low_confidence": 0,
+            "escalated_invalid": 0, "escalated_error": 0, "primary_only": 0,
+            "fast_only_deadline": 0, "fast_kept_deadline": 0
+        }
+    return stats
+
+
+def cascade_enabled(agent: str) -> bool:
+    """Whether an agent's calls go to the fast model first."""
+    return bool(settings.gemini_fast_model) and agent in settings.model_cascade_agents
+
+
+def get_first_tier_model(agent: str, temperature: float) -> BaseChatModel:
+    """The model an agent's call is sent to first (the fast model when cascading)."""
+    if cascade_enabled(agent):
+        return get_chat_model(temperature=temperature, model_name=settings.gemini_fast_model)
+    return get_chat_model(temperature=temperature)
+
+
+async def invoke_cascade(
+    prompt: Sequence[BaseMessage],
+    agent: str,
+    parse: Callable[[str], Tuple[Any, Optional[float]]],
+    temperature: float,
+    call: Optional[Callable[[Sequence[BaseMessage]], Awaitable[BaseMessage]]] = None
+) -> Any:
+    """
+    Call the fast model first and escalate to the primary model if needed.
+    
+    Agents not in MODEL_CASCADE_AGENTS (or with no GEMINI_FAST_MODEL set)
+    call the primary model directly. Otherwise the fast model's answer
+    is kept unless it fails to parse, its confidence is below
+    MODEL_CASCADE_CONFIDENCE_THRESHOLD, or the call errors. Near the
+    request deadline (see invoke_model) the fast model's answer is final,
+    and a low-confidence answer is returned if the deadline cuts off
+    its escalation.
+    
+    Args:
+        prompt: Formatted prompt messages
+        agent: Calling agent name
+        parse: Turns response text into (output, confidence or None);
+            raises ValueError (incl. JSONDecodeError) on invalid output
+        temperature: Sampling temperature for both tiers
+        call: Optional replacement call for the first tier (e.g. micro-batched)
+    
+    Returns:
+        The parsed output. Errors from the primary model's call or parse
+        (or the fast model's, when it is final) propagate to the caller.
+    """
+    stats = _routing_stats(agent)
+    stats["calls"] += 1
+    fast_output = None
+    if cascade_enabled(agent):
+        fast = get_first_tier_model(agent, temperature)
+        deadline = _short_deadline()
+        if deadline is not None:
+            stats["fast_only_deadline"] += 1
+            deadline.degrade(f"fast_model:{agent}")
+            response = await invoke_model(fast, prompt, agent=agent, call=call, validate=parse)
+            return parse(response.content)[0]
+        try:
+            response = await invoke_model(fast, prompt, agent=agent, call=call, validate=parse)
+            output, confidence = parse(response.content)
+        except DeadlineExceeded:
+            raise
+        except ValueError as e:
+            stats["escalated_invalid"] += 1
+            print(f"{agent}: fast model output invalid, escalating: {e}")
+        except Exception as e:
+            stats["escalated_error"] += 1
+            print(f"{agent}: fast model call failed, escalating: {e}")
+        else:
+            if confidence is None or confidence >= settings.model_cascade_confidence_threshold:
+                stats["fast_accepted"] += 1
+                return output
+            stats["escalated_low_confidence"] += 1
+            fast_output = output
+        call = None
+    else:
+        stats["primary_only"] += 1
+    
+    try:
+        response = await invoke_model(
+            get_chat_model(temperature=temperature), prompt, agent=agent, call=call, validate=parse
+        )
+    except DeadlineExceeded:
+        # A low-confidence answer beats none when the deadline cuts the escalation off
+        if fast_output is None:
+            raise
+        stats["fast_kept_deadline"] += 1
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.degrade(f"fast_model:{agent}")
+        return fast_output
+    return parse(response.content)[0]
+
+
+def get_routing_stats() -> Dict[str, Any]:
+    """Per-agent routing decisions and escalation rates."""
+    result = {}
+    for agent, s in _routing.items():
+        cascaded = s["calls"] - s["primary_only"]
+        escalated = s["escalated_low_confidence"] + s["escalated_invalid"] + s["escalated_error"]
+        result[agent] = {**s, "escalation_rate": round(escalated / cascaded, 3) if cascaded else None}
+    return {
+        "fast_model": settings.gemini_fast_model,
+        "confidence_threshold": settings.model_cascade_confidence_threshold,
+        "agents": result,
+    }
+
+
+register_metrics("llm_routing", get_routing_stats)
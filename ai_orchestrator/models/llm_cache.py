@@ -0,0 +1,192 @@
+"""Persistent cache of LLM responses keyed by model, temperature and prompt."""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import string
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from langchain_core.messages import BaseMessage
+try:
+    from ..config import settings
+    from ..metrics import register_metrics
+except ImportError:
+    from config import settings
+    from metrics import register_metrics
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = string.punctuation
+
+
+def _normalize(text: str) -> str:
+    """Case-fold, collapse whitespace and strip punctuation around words."""
+    tokens = (token.strip(_EDGE_PUNCTUATION) for token in _WHITESPACE.split(text.casefold()))
+    return " ".join(token for token in tokens if token)
+
+
+def cache_keys(model: str, temperature: Any, messages: Sequence[BaseMessage]) -> Tuple[str, str]:
+    """
+    Build the exact and normalized cache keys for a prompt.
+
+    Args:
+        model: Model name
+        temperature: Sampling temperature
+        messages: Formatted prompt messages
+
+    Returns:
+        (exact key, normalized key)
+    """
+    exact = [(m.type, m.content) for m in messages]
+    normalized = [
+        (m.type, _normalize(m.content) if isinstance(m.content, str) else m.content)
+        for m in messages
+    ]
+
+    def digest(kind: str, payload: List) -> str:
+        body = json.dumps([model, temperature, payload], ensure_ascii=False, sort_keys=True, default=str)
+        return f"{kind}:{hashlib.sha256(body.encode('utf-8')).hexdigest()}"
+
+    return digest("exact", exact), digest("norm", normalized)
+
+
+class LLMResponseCache:
+    """
+    Two-tier response cache: a bounded in-memory LRU in front of SQLite.
+
+    Entries carry an expiry time (per-agent TTL). Lookups try the exact
+    prompt key, then a normalized one (case, whitespace and punctuation
+    around words ignored), so "ok thanks" and "Ok, thanks!" share an
+    entry. The SQLite tier survives restarts and is shared by workers
+    on the same host.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._agents: Dict[str, Dict[str, int]] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _db_get(self, keys: Sequence[str]) -> Optional[Tuple[str, str, float]]:
+        with self._db_lock:
+            conn = self._connect()
+            for key in keys:
+                row = conn.execute(
+                    "SELECT content, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?",
+                    (key, time.time())
+                ).fetchone()
+                if row is not None:
+                    return key, row[0], row[1]
+        return None
+
+    def _db_set(self, keys: Sequence[str], content: str, expires_at: float) -> None:
+        with self._db_lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO llm_cache (key, content, expires_at) VALUES (?, ?, ?)",
+                [(key, content, expires_at) for key in keys]
+            )
+            conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+
+    def _remember(self, key: str, content: str, expires_at: float) -> None:
+        self._memory[key] = (content, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _agent_stats(self, agent: str) -> Dict[str, int]:
+        stats = self._agents.get(agent)
+        if stats is None:
+            stats = self._agents[agent] = {
+                "exact_hits": 0, "normalized_hits": 0, "disk_hits": 0, "misses": 0, "errors": 0
+            }
+        return stats
+
+    async def get(self, agent: str, keys: Tuple[str, str]) -> Optional[str]:
+        """Look up a response by exact, then normalized key."""
+        stats = self._agent_stats(agent)
+        now = time.time()
+        for key in keys:
+            entry = self._memory.get(key)
+            if entry is not None:
+                content, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    stats["exact_hits" if key == keys[0] else "normalized_hits"] += 1
+                    return content
+                del self._memory[key]
+
+        try:
+            found = await asyncio.to_thread(self._db_get, keys)
+        except sqlite3.Error as e:
+            stats["errors"] += 1
+            print(f"Error reading LLM response cache: {e}")
+            found = None
+        if found is None:
+            stats["misses"] += 1
+            return None
+
+        key, content, expires_at = found
+        stats["disk_hits"] += 1
+        stats["exact_hits" if key == keys[0] else "normalized_hits"] += 1
+        for k in keys:
+            self._remember(k, content, expires_at)
+        return content
+
+    async def set(self, agent: str, keys: Tuple[str, str], content: str, ttl: float) -> None:
+        """Store a response under both keys for ttl seconds."""
+        expires_at = time.time() + ttl
+        for key in keys:
+            self._remember(key, content, expires_at)
+        try:
+            await asyncio.to_thread(self._db_set, keys, content, expires_at)
+        except sqlite3.Error as e:
+            self._agent_stats(agent)["errors"] += 1
+            print(f"Error writing LLM response cache: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-agent hit rates."""
+        agents = {}
+        for agent, s in self._agents.items():
+            hits = s["exact_hits"] + s["normalized_hits"]
+            lookups = hits + s["misses"]
+            agents[agent] = {**s, "hit_rate": round(hits / lookups, 3) if lookups else 0.0}
+        return {
+            "memory_entries": len(self._memory),
+            "enabled_agents": sorted(settings.llm_cache_agent_ttls),
+            "agents": agents,
+        }
+
+
+llm_response_cache = LLMResponseCache(
+    path=settings.llm_cache_path,
+    max_entries=settings.llm_cache_max_entries,
+)
+
+register_metrics("llm_response_cache", llm_response_cache.stats)
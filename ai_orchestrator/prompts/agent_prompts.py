@@ -34,6 +34,38 @@ Provide your analysis as JSON.""")
 ])
 
 
+# Agent 1 (batched): classifies several concurrent messages in one call
+MESSAGE_UNDERSTANDING_BATCH_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an expert at analyzing team communication messages to identify actionable work items.
+
+Your task is to classify each message independently and determine if it represents a potential task.
+
+Guidelines:
+- Be conservative: only mark as task_candidate if there's a clear action item
+- Categories: bug, feature, request, info, chitchat, question, other
+- Urgency: low (nice to have), medium (should be done), high (critical/blocking)
+- Clean the text: remove filler words, normalize formatting
+- Messages are unrelated to each other; never let one message influence another's analysis
+
+Output must be a valid JSON array with exactly one object per message, in the same order:
+[
+    {{
+        "index": integer (the message's [index]),
+        "is_task_candidate": boolean,
+        "category": string (one of: bug, feature, request, info, chitchat, question, other),
+        "urgency_estimate": string (one of: low, medium, high),
+        "cleaned_text": string,
+        "confidence": float (0.0-1.0)
+    }}
+]"""),
+    ("human", """Analyze these {count} messages:
+
+{messages}
+
+Provide your analysis as a JSON array.""")
+])
+
+
 # Agent 2: Task Extraction
 TASK_EXTRACTION_PROMPT = ChatPromptTemplate.from_messages([
     ("system", """You are an expert at extracting structured task information from natural language.
@@ -65,6 +97,52 @@ Provide structured task data as JSON.""")
 ])
 
 
+# Agents 1 + 2 fused: understanding and extraction in one call
+MESSAGE_UNDERSTANDING_EXTRACTION_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an expert at analyzing team communication messages and turning actionable ones into structured tasks.
+
+First classify the message and decide if it represents a potential task. If, and only if, it is a task candidate, extract structured task information from the cleaned text.
+
+Classification guidelines:
+- Be conservative: only mark as task_candidate if there's a clear action item
+- Categories: bug, feature, request, info, chitchat, question, other
+- Urgency: low (nice to have), medium (should be done), high (critical/blocking)
+- Clean the text: remove filler words, normalize formatting
+
+Extraction guidelines:
+- Create clear, actionable titles (max 100 chars)
+- Write detailed descriptions with context
+- Assign appropriate priority: P0 (critical), P1 (high), P2 (medium), P3 (low)
+- Classify task type accurately
+
+Output must be valid JSON matching this schema:
+{{
+    "understanding": {{
+        "is_task_candidate": boolean,
+        "category": string (one of: bug, feature, request, info, chitchat, question, other),
+        "urgency_estimate": string (one of: low, medium, high),
+        "cleaned_text": string,
+        "confidence": float (0.0-1.0)
+    }},
+    "extraction": {{
+        "title": string,
+        "description": string,
+        "suggested_priority": string (one of: P0, P1, P2, P3),
+        "task_type": string (one of: bug, feature, deployment, documentation, refactor, other),
+        "estimated_effort": string (optional, one of: small, medium, large)
+    }} or null when not a task candidate
+}}"""),
+    ("human", """Analyze this message:
+
+Message: {message_text}
+Sender: {sender_name}
+Channel: {channel_name}
+Thread Context: {thread_context}
+
+Provide your analysis as JSON.""")
+])
+
+
 # Agent 3: Assignment
 ASSIGNMENT_PROMPT = ChatPromptTemplate.from_messages([
     ("system", """You are an expert at assigning tasks to team members based on workload, skills, and context.
@@ -194,6 +272,34 @@ Provide summary as JSON.""")
 ])
 
 
+
+# Agent 6 (batched): summarizes several independent items in one call
+SUMMARIZATION_BATCH_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an expert at summarizing team communication and work activity.
+
+Create concise, informative summaries that capture:
+- Key decisions and actions
+- Important context
+- Next steps or blockers
+
+Items are unrelated to each other; summarize each one on its own.
+
+Output must be a valid JSON array with exactly one object per item, in the same order:
+[
+    {{
+        "index": integer (the item's [index]),
+        "summary": string,
+        "key_points": array of strings,
+        "metadata": object
+    }}
+]"""),
+    ("human", """Summarize these {count} items:
+
+{items}
+
+Provide the summaries as a JSON array.""")
+])
+
 # Agent 7: Insights
 INSIGHTS_PROMPT = ChatPromptTemplate.from_messages([
     ("system", """You are an expert at analyzing team processes and providing constructive insights.
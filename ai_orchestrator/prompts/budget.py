@@ -0,0 +1,239 @@
+"""Token-budgeted prompt assembly."""
+import math
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from langchain_core.messages import BaseMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+try:
+    from ..config import settings
+    from ..metrics import register_metrics
+except ImportError:
+    from config import settings
+    from metrics import register_metrics
+
+
+# Gemini averages roughly four characters per token for English text
+_CHARS_PER_TOKEN = 4
+_TRUNCATED = " …[truncated]"
+
+_template_tokens: Dict[int, int] = {}
+_stats: Dict[str, Dict[str, Any]] = {}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (no tokenizer or API call)."""
+    return math.ceil(len(text) / _CHARS_PER_TOKEN) if text else 0
+
+
+def estimate_message_tokens(messages: Sequence[BaseMessage]) -> int:
+    """Token estimate for formatted prompt messages (plus a small per-message overhead)."""
+    return sum(estimate_tokens(m.content if isinstance(m.content, str) else str(m.content)) + 4 for m in messages)
+
+
+def template_tokens(template: ChatPromptTemplate) -> int:
+    """Tokens used by a prompt template's fixed text (its variables left empty)."""
+    key = id(template)
+    if key not in _template_tokens:
+        placeholders = {m.variable_name for m in template.messages if isinstance(m, MessagesPlaceholder)}
+        empty = {name: [] if name in placeholders else "" for name in template.input_variables}
+        _template_tokens[key] = estimate_message_tokens(template.format_messages(**empty))
+    return _template_tokens[key]
+
+
+class PromptSection:
+    """
+    One variable part of a prompt.
+
+    Content is a string or a list of items. When the prompt is over
+    budget, sections with the lowest priority are cut first, never
+    below min_tokens, using the section's strategy:
+
+    - "truncate": keep the beginning of a string (or the first items)
+    - "keep_last": keep the end of a string (or the most recent items)
+    - "rank": keep the highest-scoring items, in their original order
+
+    For lists, summarize (if given) turns the dropped items into one
+    short line that is kept in their place when it fits.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        content: Union[str, List[Any]],
+        priority: int = 0,
+        strategy: str = "truncate",
+        min_tokens: int = 0,
+        render: Callable[[Any], str] = str,
+        scores: Optional[List[float]] = None,
+        summarize: Optional[Callable[[List[Any]], str]] = None
+    ):
+        self.name = name
+        self.content = content
+        self.priority = priority
+        self.strategy = strategy
+        self.min_tokens = min_tokens
+        self.render = render
+        self.scores = scores
+        self.summarize = summarize
+
+    def tokens(self) -> int:
+        if isinstance(self.content, str):
+            return estimate_tokens(self.content)
+        return sum(estimate_tokens(self.render(item)) + 1 for item in self.content)
+
+    def fit(self, budget: int) -> Union[str, List[Any]]:
+        """Shrink the content to about budget tokens."""
+        if isinstance(self.content, str):
+            return self._fit_text(budget)
+        return self._fit_items(budget)
+
+    def _fit_text(self, budget: int) -> str:
+        text = self.content
+        if estimate_tokens(text) <= budget:
+            return text
+        keep = budget * _CHARS_PER_TOKEN - len(_TRUNCATED)
+        if keep <= 0:
+            return ""
+        if self.strategy == "keep_last":
+            return _TRUNCATED.strip() + " " + text[-keep:].lstrip()
+        return text[:keep].rstrip() + _TRUNCATED
+
+    def _fit_items(self, budget: int) -> List[Any]:
+        items = self.content
+        costs = [estimate_tokens(self.render(item)) + 1 for item in items]
+        if self.strategy == "keep_last":
+            order = list(range(len(items) - 1, -1, -1))
+        elif self.strategy == "rank" and self.scores is not None:
+            order = sorted(range(len(items)), key=lambda i: self.scores[i], reverse=True)
+        else:
+            order = list(range(len(items)))
+
+        kept, used = [], 0
+        for i in order:
+            if used + costs[i] > budget:
+                break
+            kept.append(i)
+            used += costs[i]
+
+        summary = None
+        if len(kept) < len(items) and self.summarize is not None:
+            summary = self.summarize([item for i, item in enumerate(items) if i not in kept])
+            # Make room for the summary line by dropping the least important kept items
+            while kept and used + estimate_tokens(summary) + 1 > budget:
+                used -= costs[kept.pop()]
+                summary = self.summarize([item for i, item in enumerate(items) if i not in kept])
+
+        kept_set = set(kept)
+        fitted = [item for i, item in enumerate(items) if i in kept_set]
+        if summary is not None:
+            if used + estimate_tokens(summary) + 1 <= budget:
+                if self.strategy == "keep_last":
+                    fitted.insert(0, summary)
+                else:
+                    fitted.append(summary)
+        return fitted
+
+
+def fit_sections(
+    agent: str,
+    sections: List[PromptSection],
+    template: Optional[ChatPromptTemplate] = None,
+    reserved_tokens: int = 0
+) -> Dict[str, Union[str, List[Any]]]:
+    """
+    Fit prompt sections into the agent's token budget.
+
+    Args:
+        agent: Agent name (selects the budget from PROMPT_TOKEN_BUDGETS)
+        sections: Variable prompt parts
+        template: Prompt template whose fixed text counts against the budget
+        reserved_tokens: Other fixed tokens (e.g. short fields left unbudgeted)
+
+    Returns:
+        Fitted content keyed by section name (same type as the input)
+    """
+    budget = settings.prompt_token_budgets.get(agent, settings.prompt_token_budget_default)
+    reserved = reserved_tokens + (template_tokens(template) if template is not None else 0)
+    available = max(budget - reserved, 0)
+
+    sizes = {s.name: s.tokens() for s in sections}
+    excess = sum(sizes.values()) - available
+    stats = _agent_stats(agent)
+    if excess <= 0:
+        return {s.name: s.content for s in sections}
+
+    # Cut the least important sections first, down to their minimum
+    stats["fitted"] += 1
+    allocation = dict(sizes)
+    for section in sorted(sections, key=lambda s: s.priority):
+        cut = min(excess, max(allocation[section.name] - section.min_tokens, 0))
+        allocation[section.name] -= cut
+        excess -= cut
+        if cut:
+            stats["sections_cut"][section.name] = stats["sections_cut"].get(section.name, 0) + 1
+        if excess <= 0:
+            break
+    return {
+        s.name: s.fit(allocation[s.name]) if allocation[s.name] < sizes[s.name] else s.content
+        for s in sections
+    }
+
+
+def fit_message_context(
+    agent: str,
+    template: ChatPromptTemplate,
+    message_text: str,
+    thread_context: str,
+    reserved_tokens: int = 0
+) -> Tuple[str, str]:
+    """
+    Fit a chat message and its thread context into the agent's budget.
+
+    The thread context is cut first, keeping its most recent end; the
+    message itself is only truncated if it alone exceeds the budget.
+
+    Returns:
+        (message_text, thread_context)
+    """
+    # Non-string values (e.g. None) render as the template would show them
+    message_text = message_text if isinstance(message_text, str) else str(message_text)
+    thread_context = thread_context if isinstance(thread_context, str) else str(thread_context)
+    fitted = fit_sections(agent, [
+        PromptSection("message_text", message_text, priority=2, strategy="truncate"),
+        PromptSection("thread_context", thread_context, priority=1, strategy="keep_last"),
+    ], template=template, reserved_tokens=reserved_tokens)
+    return fitted["message_text"], fitted["thread_context"]
+
+
+def _agent_stats(agent: str) -> Dict[str, Any]:
+    stats = _stats.get(agent)
+    if stats is None:
+        stats = _stats[agent] = {"prompts": 0, "total_tokens": 0, "max_tokens": 0, "fitted": 0, "sections_cut": {}}
+    return stats
+
+
+def record_prompt_size(agent: str, messages: Sequence[BaseMessage]) -> int:
+    """Record the estimated size of a final prompt. Returns the estimate."""
+    tokens = estimate_message_tokens(messages)
+    stats = _agent_stats(agent)
+    stats["prompts"] += 1
+    stats["total_tokens"] += tokens
+    stats["max_tokens"] = max(stats["max_tokens"], tokens)
+    return tokens
+
+
+def get_prompt_stats() -> Dict[str, Any]:
+    """Estimated prompt sizes per agent and how often budgets had to cut content."""
+    return {
+        agent: {
+            "prompts": s["prompts"],
+            "avg_tokens": round(s["total_tokens"] / s["prompts"], 1) if s["prompts"] else 0.0,
+            "max_tokens": s["max_tokens"],
+            "budget": settings.prompt_token_budgets.get(agent, settings.prompt_token_budget_default),
+            "fitted": s["fitted"],
+            "sections_cut": dict(s["sections_cut"]),
+        }
+        for agent, s in _stats.items()
+    }
+
+
+register_metrics("prompt_budget", get_prompt_stats)
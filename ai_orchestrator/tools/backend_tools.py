@@ -1,11 +1,33 @@
 """Tools for calling the Orbix backend API."""
+import asyncio
+from contextlib import aclosing
+from typing import AsyncIterator, List, Dict, Optional, Any
 import httpx
-from typing import List, Dict, Optional, Any
 from langchain.tools import tool
 try:
     from ..config import settings
+    from .http_client import send, open_stream
+    from .http_cache import conditional_cache
+    from .json_stream import iter_json_array
+    from .request_cache import current_request_cache
+    from .deadline import DeadlineExceeded, current_deadline
+    from .single_flight import backend_single_flight
+    from .resilience import call_with_resilience, get_breaker, route_key, timeout_for, is_backend_failure
+    from .config_cache import workspace_config_cache, channel_config_cache
+    from .workspace_stats import WorkspaceStatsAccumulator, task_assignee_id
+    from .stats_view import stats_views, WorkspaceStatsView
 except ImportError:
     from config import settings
+    from tools.http_client import send, open_stream
+    from tools.http_cache import conditional_cache
+    from tools.json_stream import iter_json_array
+    from tools.request_cache import current_request_cache
+    from tools.deadline import DeadlineExceeded, current_deadline
+    from tools.single_flight import backend_single_flight
+    from tools.resilience import call_with_resilience, get_breaker, route_key, timeout_for, is_backend_failure
+    from tools.config_cache import workspace_config_cache, channel_config_cache
+    from tools.workspace_stats import WorkspaceStatsAccumulator, task_assignee_id
+    from tools.stats_view import stats_views, WorkspaceStatsView
 
 
 # Base HTTP client
@@ -13,27 +35,139 @@ async def _make_request(
     method: str,
     endpoint: str,
     data: Optional[Dict] = None,
-    params: Optional[Dict] = None
+    params: Optional[Dict] = None,
+    timeout: Optional[float] = None
 ) -> Dict[str, Any]:
-    """Make HTTP request to backend."""
-    url = f"{settings.orbix_backend_url}{endpoint}"
-    headers = {}
-    
-    if settings.backend_api_key:
-        headers["Authorization"] = f"Bearer {settings.backend_api_key}"
-    
-    async with httpx.AsyncClient() as client:
-        response = await client.request(
-            method=method,
-            url=url,
+    """
+    Make HTTP request to backend over the shared connection pool.
+
+    GETs are memoized for the current API request, and identical GETs
+    in flight across requests share one upstream call. Any write clears
+    the request cache so later reads in the same run see fresh data.
+    Calls run behind per-endpoint timeouts, GET retries and a circuit
+    breaker that fails fast while the backend is degraded. GETs are
+    sent as conditional requests when a validated copy is cached, and a
+    304 reuses the cached parsed body. Under a request deadline, a GET
+    raises DeadlineExceeded once the deadline passes (a shared upstream
+    call carries on for other callers). Writes are not cut short, since
+    a write that timed out may still have been applied.
+    """
+    async def attempt(call_timeout: float) -> Dict[str, Any]:
+        if method.upper() == "GET" and settings.backend_conditional_cache_enabled:
+            return await conditional_cache.get(endpoint, params=params, timeout=call_timeout)
+        response = await send(
+            method,
+            endpoint,
             json=data,
             params=params,
-            headers=headers,
-            timeout=30.0
+            timeout=call_timeout
         )
         response.raise_for_status()
         return response.json()
 
+    async def fetch() -> Dict[str, Any]:
+        return await call_with_resilience(method, endpoint, attempt, timeout=timeout)
+
+    cache = current_request_cache()
+    if method.upper() != "GET":
+        if cache is not None:
+            cache.clear()
+        return await fetch()
+
+    key = (endpoint, tuple(sorted((params or {}).items())))
+
+    async def fetch_shared() -> Dict[str, Any]:
+        return await backend_single_flight.do(key, fetch)
+
+    if cache is None:
+        read = fetch_shared()
+    else:
+        read = cache.get_or_fetch(key, fetch_shared)
+    deadline = current_deadline()
+    if deadline is None:
+        return await read
+    try:
+        return await deadline.bound(read, f"GET {endpoint}")
+    except DeadlineExceeded:
+        deadline.degrade(f"timeout:{route_key('GET', endpoint)}")
+        raise
+
+
+async def iter_workspace_tasks(workspace_id: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream a workspace's tasks, parsing the listing incrementally.
+    
+    Tasks are yielded one at a time without materializing the whole
+    response. If the backend returns a "nextCursor", following pages are
+    requested with ?cursor=... until it is exhausted. The stream goes
+    through the route's circuit breaker but is not retried. Under a
+    request deadline, each page's timeout is cut to the time left.
+    
+    Args:
+        workspace_id: The workspace ID
+    
+    Yields:
+        Task objects
+    
+    Raises:
+        DeadlineExceeded: The request deadline passed before the listing ended
+    """
+    endpoint = f"/api/workspaces/{workspace_id}/tasks"
+    route = route_key("GET", endpoint)
+    breaker = get_breaker(route)
+    deadline = current_deadline()
+    cursor = None
+    
+    def cut_off() -> DeadlineExceeded:
+        deadline.degrade(f"timeout:{route}")
+        return DeadlineExceeded(f"GET {endpoint} cut off by the {deadline.name} deadline")
+    
+    while True:
+        if deadline is not None and deadline.expired():
+            raise cut_off()
+        timeout = timeout_for("GET", route)
+        if deadline is not None:
+            timeout = deadline.clamp(timeout)
+        
+        params = {}
+        if settings.backend_task_page_size:
+            params["limit"] = settings.backend_task_page_size
+        if cursor:
+            params["cursor"] = cursor
+        
+        meta = {}
+        breaker.before_call()
+        try:
+            async with open_stream(
+                "GET",
+                endpoint,
+                params=params or None,
+                timeout=timeout
+            ) as response:
+                response.raise_for_status()
+                async for task in iter_json_array(response.aiter_text(), "tasks", meta):
+                    if deadline is not None and deadline.expired():
+                        raise cut_off()
+                    yield task
+        except (asyncio.CancelledError, GeneratorExit, DeadlineExceeded):
+            breaker.release()
+            raise
+        except Exception as e:
+            if deadline is not None and deadline.expired() and isinstance(e, httpx.TimeoutException):
+                # Timed out on the clamped timeout: not the backend's fault
+                breaker.release()
+                raise cut_off() from e
+            if is_backend_failure(e):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+        breaker.record_success()
+        
+        cursor = meta.get("nextCursor")
+        if not cursor:
+            return
+
 
 @tool
 async def get_workspace_members(workspace_id: str) -> List[Dict[str, Any]]:
@@ -60,6 +194,49 @@ async def get_workspace_members(workspace_id: str) -> List[Dict[str, Any]]:
         return []
 
 
+def _empty_workload() -> Dict[str, Any]:
+    """Workload summary for a member with no tasks."""
+    return {
+        "total_tasks": 0,
+        "todo": 0,
+        "in_progress": 0,
+        "done": 0,
+        "high_priority": 0
+    }
+
+
+def _add_to_workload(workload: Dict[str, Any], task: Dict[str, Any]) -> None:
+    """Count one task into a workload summary."""
+    workload["total_tasks"] += 1
+    status = task.get("status")
+    if status in ("todo", "in_progress", "done"):
+        workload[status] += 1
+    if task.get("priority") in ("P0", "P1"):
+        workload["high_priority"] += 1
+
+
+async def fetch_member_workload(workspace_id: str, user_id: str) -> Dict[str, Any]:
+    """
+    Fetch a member's current workload (raises on failure).
+    
+    Args:
+        workspace_id: The workspace ID
+        user_id: The user ID
+    
+    Returns:
+        Dictionary with workload information
+    """
+    result = await _make_request(
+        "GET",
+        f"/api/workspaces/{workspace_id}/tasks/my",
+        params={"userId": user_id}
+    )
+    workload = _empty_workload()
+    for task in result.get("tasks", []):
+        _add_to_workload(workload, task)
+    return workload
+
+
 @tool
 async def get_member_workload(workspace_id: str, user_id: str) -> Dict[str, Any]:
     """
@@ -73,35 +250,65 @@ async def get_member_workload(workspace_id: str, user_id: str) -> Dict[str, Any]
         Dictionary with workload information
     """
     try:
-        # Get user's tasks
-        result = await _make_request(
-            "GET",
-            f"/api/workspaces/{workspace_id}/tasks/my",
-            params={"userId": user_id}
-        )
-        tasks = result.get("tasks", [])
-        
-        # Count by status
-        todo_count = sum(1 for t in tasks if t.get("status") == "todo")
-        in_progress_count = sum(1 for t in tasks if t.get("status") == "in_progress")
-        done_count = sum(1 for t in tasks if t.get("status") == "done")
-        
-        return {
-            "total_tasks": len(tasks),
-            "todo": todo_count,
-            "in_progress": in_progress_count,
-            "done": done_count,
-            "high_priority": sum(1 for t in tasks if t.get("priority") in ["P0", "P1"])
-        }
+        return await fetch_member_workload(workspace_id, user_id)
     except Exception as e:
         print(f"Error fetching member workload: {e}")
-        return {
-            "total_tasks": 0,
-            "todo": 0,
-            "in_progress": 0,
-            "done": 0,
-            "high_priority": 0
-        }
+        return _empty_workload()
+
+
+async def get_workspace_workloads(workspace_id: str, user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Get workloads for many members from a single workspace task listing.
+    
+    Args:
+        workspace_id: The workspace ID
+        user_ids: The user IDs to report on
+    
+    Returns:
+        Dictionary mapping user ID to workload information, or an empty
+        dictionary if the listing failed (partial counts are not returned)
+    """
+    workloads = {user_id: _empty_workload() for user_id in user_ids}
+    try:
+        # Single streamed pass over all tasks, bucketed by assignee
+        async with aclosing(iter_workspace_tasks(workspace_id)) as tasks:
+            async for task in tasks:
+                workload = workloads.get(task_assignee_id(task))
+                if workload is not None:
+                    _add_to_workload(workload, task)
+    except Exception as e:
+        print(f"Error fetching workspace workloads: {e}")
+        return {}
+    return workloads
+
+
+async def _fetch_workspace_config(workspace_id: str) -> Dict[str, Any]:
+    """Fetch workspace configuration from the backend (raises on failure)."""
+    result = await _make_request(
+        "GET",
+        f"/api/workspaces/{workspace_id}"
+    )
+    workspace = result.get("workspace", {})
+    
+    # Default to assist mode if not set
+    return {
+        "workspace_id": workspace_id,
+        "ai_automation_mode": workspace.get("aiAutomationMode", "assist"),
+        "ai_pipeline_mode": workspace.get("aiPipelineMode"),  # Optional chat_to_task pipeline override
+        "name": workspace.get("name", ""),
+        "purpose": workspace.get("purpose", "")
+    }
+
+
+async def _fetch_channel_config(channel_id: str) -> Dict[str, Any]:
+    """Fetch channel configuration (raises on failure)."""
+    # This would need to be added to the backend
+    # For now, we'll need to get it from the channel endpoint
+    # Placeholder - actual implementation depends on backend API
+    return {
+        "channel_id": channel_id,
+        "ai_mode": "active"  # Default, should be fetched from backend
+    }
 
 
 @tool
@@ -109,6 +316,9 @@ async def get_workspace_config(workspace_id: str) -> Dict[str, Any]:
     """
     Get workspace configuration including AI automation mode.
     
+    Served from the process-level config cache; the backend invalidates
+    entries via POST /ai/cache/invalidate when settings change.
+    
     Args:
         workspace_id: The workspace ID
     
@@ -116,21 +326,10 @@ async def get_workspace_config(workspace_id: str) -> Dict[str, Any]:
         Dictionary with workspace config including aiAutomationMode
     """
     try:
-        # This would need to be added to the backend
-        # For now, return default
-        result = await _make_request(
-            "GET",
-            f"/api/workspaces/{workspace_id}"
+        return await workspace_config_cache.get_or_load(
+            workspace_id,
+            lambda: _fetch_workspace_config(workspace_id)
         )
-        workspace = result.get("workspace", {})
-        
-        # Default to assist mode if not set
-        return {
-            "workspace_id": workspace_id,
-            "ai_automation_mode": workspace.get("aiAutomationMode", "assist"),
-            "name": workspace.get("name", ""),
-            "purpose": workspace.get("purpose", "")
-        }
     except Exception as e:
         print(f"Error fetching workspace config: {e}")
         return {
@@ -144,6 +343,8 @@ async def get_channel_config(channel_id: str) -> Dict[str, Any]:
     """
     Get channel configuration including AI mode.
     
+    Served from the process-level config cache.
+    
     Args:
         channel_id: The channel ID
     
@@ -151,13 +352,10 @@ async def get_channel_config(channel_id: str) -> Dict[str, Any]:
         Dictionary with channel config including aiMode
     """
     try:
-        # This would need to be added to the backend
-        # For now, we'll need to get it from the channel endpoint
-        # Placeholder - actual implementation depends on backend API
-        return {
-            "channel_id": channel_id,
-            "ai_mode": "active"  # Default, should be fetched from backend
-        }
+        return await channel_config_cache.get_or_load(
+            channel_id,
+            lambda: _fetch_channel_config(channel_id)
+        )
     except Exception as e:
         print(f"Error fetching channel config: {e}")
         return {
@@ -212,7 +410,7 @@ async def create_task_proposal(workspace_id: str, proposal_data: Dict[str, Any])
             "assigneeId": None,  # Proposals are unassigned
             "aiNotes": "AI-generated proposal - pending approval"
         }
-        return await create_task(workspace_id, task_data)
+        return await create_task.ainvoke({"workspace_id": workspace_id, "task_data": task_data})
     except Exception as e:
         print(f"Error creating task proposal: {e}")
         raise
@@ -281,48 +479,61 @@ async def get_related_tasks(task_id: str, workspace_id: str) -> List[Dict[str, A
         List of related tasks
     """
     try:
-        # Get all tasks in workspace and filter by similarity
-        result = await _make_request(
-            "GET",
-            f"/api/workspaces/{workspace_id}/tasks"
-        )
-        tasks = result.get("tasks", [])
+        # Stream workspace tasks and stop once we have enough
         # Simple implementation - could be enhanced with semantic similarity
-        return tasks[:5]  # Return first 5 as placeholder
+        related = []
+        async with aclosing(iter_workspace_tasks(workspace_id)) as tasks:
+            async for task in tasks:
+                related.append(task)
+                if len(related) >= 5:  # Return first 5 as placeholder
+                    break
+        return related
     except Exception as e:
         print(f"Error fetching related tasks: {e}")
         return []
 
 
-@tool
+async def _load_stats_view(workspace_id: str, view: WorkspaceStatsView) -> None:
+    """Fill a stats view from a full task and member fetch (raises on failure)."""
+    async with aclosing(iter_workspace_tasks(workspace_id)) as tasks:
+        async for task in tasks:
+            view.upsert_task(task)
+    
+    members_result = await _make_request(
+        "GET",
+        f"/api/workspaces/{workspace_id}/members"
+    )
+    for member in members_result.get("members", []):
+        view.upsert_member(member)
+
+
 async def get_workspace_stats(workspace_id: str) -> Dict[str, Any]:
     """
     Get workspace statistics for insights.
     
+    Workspaces the backend pushes events for (POST /ai/events) are served
+    from an incrementally maintained view; others are computed in a
+    single pass over the streamed task listing.
+    
     Args:
         workspace_id: The workspace ID
     
     Returns:
-        Dictionary with workspace statistics
+        Dictionary with workspace statistics (totals, status/priority
+        counts, priority-by-status crosstab, open load per assignee,
+        overdue and unassigned counts, member roles)
     """
     try:
-        # Get all tasks
-        tasks_result = await _make_request(
-            "GET",
-            f"/api/workspaces/{workspace_id}/tasks"
-        )
-        tasks = tasks_result.get("tasks", [])
-        
-        # Calculate stats
-        total_tasks = len(tasks)
-        by_status = {}
-        by_priority = {}
+        if stats_views.is_tracked(workspace_id):
+            return await stats_views.get_stats(
+                workspace_id,
+                lambda view: _load_stats_view(workspace_id, view)
+            )
         
-        for task in tasks:
-            status = task.get("status", "todo")
-            priority = task.get("priority", "P2")
-            by_status[status] = by_status.get(status, 0) + 1
-            by_priority[priority] = by_priority.get(priority, 0) + 1
+        accumulator = WorkspaceStatsAccumulator()
+        async with aclosing(iter_workspace_tasks(workspace_id)) as tasks:
+            async for task in tasks:
+                accumulator.add(task)
         
         # Get members
         members_result = await _make_request(
@@ -331,16 +542,7 @@ async def get_workspace_stats(workspace_id: str) -> Dict[str, Any]:
         )
         members = members_result.get("members", [])
         
-        return {
-            "total_tasks": total_tasks,
-            "tasks_by_status": by_status,
-            "tasks_by_priority": by_priority,
-            "total_members": len(members),
-            "members_by_role": {
-                m.get("role", "crew"): sum(1 for mem in members if mem.get("role") == m.get("role"))
-                for m in members
-            }
-        }
+        return accumulator.result(members)
     except Exception as e:
         print(f"Error fetching workspace stats: {e}")
         return {}
@@ -0,0 +1,162 @@
+"""Process-level TTL/LRU cache for workspace and channel configuration."""
+import asyncio
+import contextvars
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+try:
+    from ..config import settings
+    from ..metrics import register_metrics
+except ImportError:
+    from config import settings
+    from metrics import register_metrics
+
+
+class TTLCache:
+    """
+    Bounded LRU cache with per-entry TTL and stale-while-revalidate.
+
+    A fresh entry is returned directly. An entry past its TTL but within
+    the stale window is returned immediately while a single background
+    refresh runs. Anything older (or missing) is loaded inline.
+    """
+
+    def __init__(self, name: str, max_size: int, ttl: float, stale_ttl: float):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._refreshing: Set[str] = set()
+        # The loop only holds weak references to tasks
+        self._refresh_tasks: Set[asyncio.Task] = set()
+        # Bumped on invalidation so in-flight loads don't store old values
+        self._generation = 0
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refresh_errors": 0, "invalidations": 0}
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Get a value, loading it with loader when missing or expired.
+
+        Errors from an inline load propagate and are not cached.
+        """
+        entry = self._entries.get(key)
+        now = time.monotonic()
+
+        if entry is not None:
+            value, stored_at = entry
+            age = now - stored_at
+            if age < self.ttl:
+                self._stats["hits"] += 1
+                self._entries.move_to_end(key)
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self._stats["stale_hits"] += 1
+                self._entries.move_to_end(key)
+                self._schedule_refresh(key, loader)
+                return value
+
+        self._stats["misses"] += 1
+        generation = self._generation
+        value = await loader()
+        self.set(key, value, generation)
+        return value
+
+    def set(self, key: str, value: Any, generation: Optional[int] = None) -> None:
+        """Store a value, evicting the least recently used entry if full."""
+        if generation is not None and generation != self._generation:
+            return
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: str) -> bool:
+        """Drop one entry. Returns True if it was cached."""
+        self._stats["invalidations"] += 1
+        self._generation += 1
+        return self._entries.pop(key, None) is not None
+
+    def clear(self) -> int:
+        """Drop all entries. Returns the number removed."""
+        count = len(self._entries)
+        self._entries.clear()
+        self._stats["invalidations"] += 1
+        self._generation += 1
+        return count
+
+    def _schedule_refresh(self, key: str, loader: Callable[[], Awaitable[Any]]) -> None:
+        """Refresh a stale entry in the background (at most once per key)."""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        generation = self._generation
+
+        async def refresh() -> None:
+            try:
+                self.set(key, await loader(), generation)
+            except Exception as e:
+                self._stats["refresh_errors"] += 1
+                print(f"Error refreshing {self.name} cache entry {key}: {e}")
+            finally:
+                self._refreshing.discard(key)
+
+        # Run detached from the triggering request's context
+        loop = asyncio.get_running_loop()
+        task = contextvars.Context().run(loop.create_task, refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache size and hit counters."""
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "stale_seconds": self.stale_ttl,
+            **self._stats,
+        }
+
+
+workspace_config_cache = TTLCache(
+    "workspace_config",
+    max_size=settings.config_cache_max_size,
+    ttl=settings.config_cache_ttl_seconds,
+    stale_ttl=settings.config_cache_stale_seconds,
+)
+channel_config_cache = TTLCache(
+    "channel_config",
+    max_size=settings.config_cache_max_size,
+    ttl=settings.config_cache_ttl_seconds,
+    stale_ttl=settings.config_cache_stale_seconds,
+)
+
+
+def invalidate_config(
+    workspace_id: Optional[str] = None,
+    channel_id: Optional[str] = None
+) -> Dict[str, int]:
+    """
+    Invalidate cached configuration.
+
+    With no arguments, both caches are cleared.
+
+    Returns:
+        Number of entries removed per cache
+    """
+    removed = {"workspace_config": 0, "channel_config": 0}
+    if workspace_id is None and channel_id is None:
+        removed["workspace_config"] = workspace_config_cache.clear()
+        removed["channel_config"] = channel_config_cache.clear()
+        return removed
+    if workspace_id is not None:
+        removed["workspace_config"] = int(workspace_config_cache.invalidate(workspace_id))
+    if channel_id is not None:
+        removed["channel_config"] = int(channel_config_cache.invalidate(channel_id))
+    return removed
+
+
+register_metrics("config_cache", lambda: {
+    "workspace_config": workspace_config_cache.stats(),
+    "channel_config": channel_config_cache.stats(),
+})
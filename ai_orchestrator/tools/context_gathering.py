@@ -0,0 +1,153 @@
+"""Concurrent context lookups with per-lookup timeouts and fallbacks."""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+try:
+    from ..config import settings
+    from ..metrics import register_metrics
+    from .deadline import current_deadline
+except ImportError:
+    from config import settings
+    from metrics import register_metrics
+    from tools.deadline import current_deadline
+
+
+_stats: Dict[str, Dict[str, Any]] = {}
+
+
+def _stage_stats(stage: str) -> Dict[str, Any]:
+    stats = _stats.get(stage)
+    if stats is None:
+        stats = _stats[stage] = {"runs": 0, "wall_ms": 0.0, "sequential_ms": 0.0, "lookups": {}}
+    return stats
+
+
+def _lookup_stats(stage: str, name: str) -> Dict[str, Any]:
+    return _stage_stats(stage)["lookups"].setdefault(
+        name, {"calls": 0, "timeouts": 0, "errors": 0, "skipped": 0, "total_ms": 0.0, "max_ms": 0.0}
+    )
+
+
+class ContextGatherer:
+    """
+    Runs an agent's context lookups concurrently.
+
+    Each lookup starts immediately, is bounded by its own timeout, and
+    resolves to its fallback on timeout or error, so awaiting it never
+    raises. A lookup that needs another's result names it as after=;
+    it starts (and its timeout begins) once that result is available.
+
+    Timeouts are cut to the time left before the request deadline, and
+    optional lookups are skipped outright when little of it remains.
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._started = time.perf_counter()
+        self._tasks: Dict[str, asyncio.Future] = {}
+        self._elapsed_ms: Dict[str, float] = {}
+
+    def start(
+        self,
+        name: str,
+        fetch: Callable[..., Awaitable[Any]],
+        fallback: Any,
+        timeout: Optional[float] = None,
+        after: Optional["asyncio.Future[Any]"] = None,
+        optional: bool = False
+    ) -> "asyncio.Future[Any]":
+        """
+        Start a lookup.
+
+        Args:
+            name: Lookup name (also selects its CONTEXT_LOOKUP_TIMEOUTS entry)
+            fetch: Coroutine function performing the lookup
+            fallback: Result used on timeout or error
+            timeout: Seconds (defaults to the configured timeout)
+            after: Lookup task whose result is passed to fetch
+            optional: Skip the lookup (use fallback) when less than
+                DEADLINE_SKIP_OPTIONAL_MS of the request deadline is left
+
+        Returns:
+            Future resolving to the lookup's result or fallback
+        """
+        if timeout is None:
+            timeout = settings.context_lookup_timeouts.get(name, settings.context_lookup_timeout_seconds)
+        deadline = current_deadline()
+        if optional and deadline is not None and deadline.remaining_ms() < settings.deadline_skip_optional_ms:
+            _lookup_stats(self.stage, name)["skipped"] += 1
+            deadline.degrade(f"skipped:{name}")
+            task = asyncio.get_running_loop().create_future()
+            task.set_result(fallback)
+        else:
+            task = asyncio.ensure_future(self._run(name, fetch, fallback, timeout, after))
+        self._tasks[name] = task
+        return task
+
+    async def _run(
+        self,
+        name: str,
+        fetch: Callable[..., Awaitable[Any]],
+        fallback: Any,
+        timeout: float,
+        after: Optional["asyncio.Future[Any]"]
+    ) -> Any:
+        stats = _lookup_stats(self.stage, name)
+        # Shielded so cancelling this lookup leaves the one it depends on running
+        args = () if after is None else (await asyncio.shield(after),)
+        deadline = current_deadline()
+        if deadline is not None:
+            timeout = deadline.clamp(timeout)
+        started = time.perf_counter()
+        try:
+            return await asyncio.wait_for(fetch(*args), timeout)
+        except asyncio.TimeoutError:
+            stats["timeouts"] += 1
+            if deadline is not None:
+                deadline.degrade(f"timeout:{name}")
+            print(f"[{self.stage}] {name} lookup exceeded {timeout:.3f}s; using fallback")
+            return fallback
+        except Exception as e:
+            stats["errors"] += 1
+            print(f"[{self.stage}] {name} lookup failed: {e}")
+            return fallback
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self._elapsed_ms[name] = elapsed
+            stats["calls"] += 1
+            stats["total_ms"] += elapsed
+            stats["max_ms"] = max(stats["max_ms"], elapsed)
+
+    async def results(self) -> Dict[str, Any]:
+        """Wait for every lookup and return results by name."""
+        values = await asyncio.gather(*self._tasks.values())
+        stats = _stage_stats(self.stage)
+        stats["runs"] += 1
+        stats["wall_ms"] += (time.perf_counter() - self._started) * 1000
+        stats["sequential_ms"] += sum(self._elapsed_ms.values())
+        return dict(zip(self._tasks, values))
+
+
+def get_context_gathering_stats() -> Dict[str, Any]:
+    """Per-stage wall time against the sum of lookup times, and per-lookup timings."""
+    result = {}
+    for stage, s in _stats.items():
+        runs = s["runs"]
+        result[stage] = {
+            "runs": runs,
+            "avg_wall_ms": round(s["wall_ms"] / runs, 3) if runs else 0.0,
+            # Time the same lookups would have taken one after another
+            "avg_sequential_ms": round(s["sequential_ms"] / runs, 3) if runs else 0.0,
+            "lookups": {
+                name: {
+                    **{k: v for k, v in l.items() if k != "total_ms"},
+                    "max_ms": round(l["max_ms"], 3),
+                    "avg_ms": round(l["total_ms"] / l["calls"], 3) if l["calls"] else 0.0,
+                }
+                for name, l in s["lookups"].items()
+            },
+        }
+    return result
+
+
+register_metrics("context_gathering", get_context_gathering_stats)
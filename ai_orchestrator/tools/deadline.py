@@ -0,0 +1,144 @@
+"""Per-request deadlines and the degradations applied to meet them."""
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Dict, List, Optional, TypeVar
+try:
+    from ..config import settings
+    from ..metrics import register_metrics
+except ImportError:
+    from config import settings
+    from metrics import register_metrics
+
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """Raised when a call is skipped or cut off because the request deadline is (nearly) up."""
+
+
+class Deadline:
+    """
+    Latency budget for one API request.
+
+    Created by the endpoint and carried in graph state (as "deadline")
+    and in a context variable, so nodes and tools can bound their calls
+    by the time left and record what they gave up to stay within it.
+    """
+
+    def __init__(self, name: str, budget_ms: Optional[float] = None):
+        self.name = name
+        if budget_ms is None:
+            budget_ms = settings.request_deadlines_ms.get(name, settings.request_deadline_ms)
+        self.budget_ms = budget_ms
+        self.expires_at = time.monotonic() + budget_ms / 1000
+        self.degradations: List[str] = []
+
+    def remaining(self) -> float:
+        """Seconds left (never negative)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def remaining_ms(self) -> float:
+        """Milliseconds left (never negative)."""
+        return self.remaining() * 1000
+
+    def expired(self) -> bool:
+        """Whether the budget is used up."""
+        return time.monotonic() >= self.expires_at
+
+    def clamp(self, timeout: Optional[float]) -> float:
+        """A timeout (seconds, None = unbounded) cut to the time left."""
+        if timeout is None:
+            return self.remaining()
+        return min(timeout, self.remaining())
+
+    def degrade(self, what: str) -> None:
+        """
+        Record a degradation, e.g. "skipped:workspace_context".
+
+        Kinds used: skipped:<lookup>, timeout:<lookup or backend route>,
+        fast_model:<agent> and fallback:<agent>.
+        """
+        if what not in self.degradations:
+            self.degradations.append(what)
+
+    async def bound(self, awaitable: Awaitable[T], what: str) -> T:
+        """
+        Await within the time left.
+
+        Raises:
+            DeadlineExceeded: The deadline passed first
+        """
+        try:
+            return await asyncio.wait_for(awaitable, self.remaining())
+        except asyncio.TimeoutError:
+            if self.expired():
+                raise DeadlineExceeded(f"{what} cut off by the {self.name} deadline") from None
+            raise
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("request_deadline", default=None)
+
+# Aggregated outcomes per endpoint
+_totals: Dict[str, Dict[str, Any]] = {}
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Get the deadline of the request being served, if any."""
+    return _current.get()
+
+
+def get_deadline(state: Optional[Dict[str, Any]] = None) -> Optional[Deadline]:
+    """The deadline carried in graph state, else the current request's."""
+    if state is not None and state.get("deadline") is not None:
+        return state["deadline"]
+    return current_deadline()
+
+
+def budget_below(state: Optional[Dict[str, Any]], threshold_ms: float) -> Optional[Deadline]:
+    """The deadline, if less than threshold_ms of it is left."""
+    deadline = get_deadline(state)
+    if deadline is not None and deadline.remaining_ms() < threshold_ms:
+        return deadline
+    return None
+
+
+def degrade(state: Optional[Dict[str, Any]], what: str) -> None:
+    """Record a degradation on the deadline, if there is one."""
+    deadline = get_deadline(state)
+    if deadline is not None:
+        deadline.degrade(what)
+
+
+@contextmanager
+def deadline_scope(deadline: Deadline):
+    """
+    Make a deadline current for the duration of a graph run.
+
+    Args:
+        deadline: Deadline created by the endpoint
+    """
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+        totals = _totals.setdefault(deadline.name, {"requests": 0, "expired": 0, "degraded": 0, "degradations": {}})
+        totals["requests"] += 1
+        totals["expired"] += deadline.expired()
+        totals["degraded"] += bool(deadline.degradations)
+        for what in deadline.degradations:
+            totals["degradations"][what] = totals["degradations"].get(what, 0) + 1
+
+
+def get_deadline_stats() -> Dict[str, Any]:
+    """Per-endpoint request counts, deadlines missed and degradations applied."""
+    return {
+        name: {**totals, "degradations": dict(totals["degradations"])}
+        for name, totals in _totals.items()
+    }
+
+
+register_metrics("deadlines", get_deadline_stats)
@@ -0,0 +1,157 @@
+"""Conditional GET (ETag / Last-Modified) cache for backend reads."""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+try:
+    from ..config import settings
+    from ..metrics import register_metrics
+    from .http_client import send
+    from .resilience import route_key
+except ImportError:
+    from config import settings
+    from metrics import register_metrics
+    from tools.http_client import send
+    from tools.resilience import route_key
+
+
+class _CachedResponse:
+    """Validators and parsed body of a cacheable response."""
+
+    __slots__ = ("etag", "last_modified", "body", "size")
+
+    def __init__(self, etag: Optional[str], last_modified: Optional[str], body: Any, size: int):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.body = body
+        self.size = size
+
+
+class _RouteStats:
+    """Per-route counters used to report what revalidation saved."""
+
+    def __init__(self):
+        self.full_responses = 0
+        self.full_bytes = 0
+        self.full_ms = 0.0
+        self.not_modified = 0
+        self.not_modified_ms = 0.0
+        self.bytes_saved = 0
+        self.latency_saved_ms = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        requests = self.full_responses + self.not_modified
+        return {
+            "requests": requests,
+            "not_modified": self.not_modified,
+            "revalidation_rate": round(self.not_modified / requests, 3) if requests else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "latency_saved_ms": round(self.latency_saved_ms, 3),
+            "avg_full_ms": round(self.full_ms / self.full_responses, 3) if self.full_responses else 0.0,
+            "avg_not_modified_ms": round(self.not_modified_ms / self.not_modified, 3) if self.not_modified else 0.0,
+        }
+
+
+class ConditionalCache:
+    """
+    LRU store of response validators and parsed bodies.
+
+    A GET with a cached entry is sent with If-None-Match /
+    If-Modified-Since. On 304 the cached parsed body is reused, skipping
+    the download and JSON parse. Every read still reaches the backend, so
+    writes never need to invalidate anything here.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, _CachedResponse]" = OrderedDict()
+        self._routes: Dict[str, _RouteStats] = {}
+
+    def _route_stats(self, route: str) -> _RouteStats:
+        stats = self._routes.get(route)
+        if stats is None:
+            stats = self._routes[route] = _RouteStats()
+        return stats
+
+    async def get(
+        self,
+        endpoint: str,
+        params: Optional[Dict] = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        """
+        GET an endpoint, revalidating a cached body when there is one.
+
+        Args:
+            endpoint: Path relative to the backend base URL
+            params: Query parameters
+            timeout: Per-call timeout in seconds
+
+        Returns:
+            Parsed JSON body
+
+        Raises:
+            httpx.HTTPStatusError: On error responses
+        """
+        key = (endpoint, tuple(sorted((params or {}).items())))
+        route = route_key("GET", endpoint)
+        stats = self._route_stats(route)
+        cached = self._entries.get(key)
+
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        started = time.perf_counter()
+        response = await send("GET", endpoint, params=params, headers=headers or None, timeout=timeout)
+
+        if response.status_code == 304 and cached is not None:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            stats.not_modified += 1
+            stats.not_modified_ms += elapsed_ms
+            stats.bytes_saved += cached.size
+            if stats.full_responses:
+                stats.latency_saved_ms += max(stats.full_ms / stats.full_responses - elapsed_ms, 0.0)
+            self._entries.move_to_end(key)
+            return cached.body
+
+        response.raise_for_status()
+        body = response.json()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        stats.full_responses += 1
+        stats.full_bytes += len(response.content)
+        stats.full_ms += elapsed_ms
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if (etag or last_modified) and "no-store" not in response.headers.get("Cache-Control", ""):
+            self._entries[key] = _CachedResponse(etag, last_modified, body, len(response.content))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.pop(key, None)
+        return body
+
+    def clear(self) -> int:
+        """Drop all entries. Returns the number removed."""
+        count = len(self._entries)
+        self._entries.clear()
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count plus per-route savings."""
+        return {
+            "entries": len(self._entries),
+            "cached_bytes": sum(entry.size for entry in self._entries.values()),
+            "bytes_saved": sum(s.bytes_saved for s in self._routes.values()),
+            "latency_saved_ms": round(sum(s.latency_saved_ms for s in self._routes.values()), 3),
+            "routes": {route: s.to_dict() for route, s in self._routes.items()},
+        }
+
+
+conditional_cache = ConditionalCache(max_entries=settings.backend_conditional_cache_max_entries)
+
+register_metrics("backend_conditional_cache", conditional_cache.stats)
@@ -0,0 +1,217 @@
+"""Shared, pooled HTTP client for calls to the Orbix backend."""
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+import httpx
+try:
+    from ..config import settings
+    from ..metrics import register_metrics
+except ImportError:
+    from config import settings
+    from metrics import register_metrics
+
+
+# App-wide client, created in the FastAPI lifespan hook
+_client: Optional[httpx.AsyncClient] = None
+_transport: Optional[httpx.AsyncHTTPTransport] = None
+
+# Pool usage counters
+_stats = {
+    "requests": 0,
+    "in_flight": 0,
+    "pool_wait_total_ms": 0.0,
+    "pool_wait_max_ms": 0.0,
+}
+
+# httpcore trace events that mark a connection being handed to a request
+_ACQUIRED_EVENTS = (
+    "connection.connect_tcp.started",
+    "connection.connect_unix_socket.started",
+    "http11.send_request_headers.started",
+    "http2.send_request_headers.started",
+)
+
+
+def _http2_available() -> bool:
+    """Check whether the optional h2 package is installed."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _build_client() -> httpx.AsyncClient:
+    """Build a pooled client from settings."""
+    global _transport
+
+    http2 = settings.backend_http2
+    if http2 and not _http2_available():
+        print("BACKEND_HTTP2 is enabled but the 'h2' package is not installed; using HTTP/1.1")
+        http2 = False
+
+    limits = httpx.Limits(
+        max_connections=settings.backend_max_connections,
+        max_keepalive_connections=settings.backend_max_keepalive_connections,
+        keepalive_expiry=settings.backend_keepalive_expiry,
+    )
+    _transport = httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+
+    headers = {}
+    if settings.backend_api_key:
+        headers["Authorization"] = f"Bearer {settings.backend_api_key}"
+
+    return httpx.AsyncClient(
+        base_url=settings.orbix_backend_url,
+        headers=headers,
+        transport=_transport,
+        timeout=httpx.Timeout(
+            settings.backend_timeout,
+            connect=settings.backend_connect_timeout,
+        ),
+    )
+
+
+async def start_http_client() -> httpx.AsyncClient:
+    """Create the shared client (called on application startup)."""
+    global _client
+    # Always build a fresh client bound to the app's event loop
+    _client = _build_client()
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the shared client and its pooled connections (called on shutdown)."""
+    global _client, _transport
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _transport = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared client.
+
+    Falls back to lazy creation so tools still work outside the FastAPI
+    app (scripts, tests).
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def send(
+    method: str,
+    endpoint: str,
+    *,
+    json: Optional[Dict] = None,
+    params: Optional[Dict] = None,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+) -> httpx.Response:
+    """
+    Send a request through the shared pool, recording pool wait time.
+
+    Args:
+        method: HTTP method
+        endpoint: Path relative to the backend base URL
+        json: JSON body
+        params: Query parameters
+        headers: Extra request headers
+        timeout: Per-call timeout in seconds (defaults to the client timeout)
+
+    Returns:
+        The httpx response
+    """
+    client = get_http_client()
+    started = time.perf_counter()
+    acquired = {}
+
+    async def trace(event_name: str, info: Dict[str, Any]) -> None:
+        if "wait" not in acquired and event_name in _ACQUIRED_EVENTS:
+            acquired["wait"] = (time.perf_counter() - started) * 1000
+
+    kwargs: Dict[str, Any] = {}
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+
+    _stats["requests"] += 1
+    _stats["in_flight"] += 1
+    try:
+        return await client.request(
+            method=method,
+            url=endpoint,
+            json=json,
+            params=params,
+            headers=headers,
+            extensions={"trace": trace},
+            **kwargs,
+        )
+    finally:
+        _stats["in_flight"] -= 1
+        wait = acquired.get("wait")
+        if wait is not None:
+            _stats["pool_wait_total_ms"] += wait
+            _stats["pool_wait_max_ms"] = max(_stats["pool_wait_max_ms"], wait)
+
+
+@asynccontextmanager
+async def open_stream(
+    method: str,
+    endpoint: str,
+    *,
+    params: Optional[Dict] = None,
+    timeout: Optional[float] = None,
+) -> AsyncIterator[httpx.Response]:
+    """
+    Open a streaming response through the shared pool.
+
+    The body is not read up front; iterate it with response.aiter_text().
+    The connection returns to the pool when the context exits.
+    """
+    client = get_http_client()
+    kwargs: Dict[str, Any] = {}
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+
+    _stats["requests"] += 1
+    _stats["in_flight"] += 1
+    try:
+        async with client.stream(method, endpoint, params=params, **kwargs) as response:
+            yield response
+    finally:
+        _stats["in_flight"] -= 1
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Get connection pool usage.
+
+    Returns:
+        Dictionary with active/idle connection counts and pool wait times
+    """
+    connections = []
+    pool = getattr(_transport, "_pool", None)
+    if pool is not None:
+        connections = pool.connections
+
+    idle = sum(1 for c in connections if c.is_idle())
+    requests = _stats["requests"]
+    return {
+        "open": _client is not None and not _client.is_closed,
+        "http2": bool(pool is not None and getattr(pool, "_http2", False)),
+        "max_connections": settings.backend_max_connections,
+        "max_keepalive_connections": settings.backend_max_keepalive_connections,
+        "connections": len(connections),
+        "active_connections": len(connections) - idle,
+        "idle_connections": idle,
+        "in_flight_requests": _stats["in_flight"],
+        "requests": requests,
+        "pool_wait_avg_ms": round(_stats["pool_wait_total_ms"] / requests, 3) if requests else 0.0,
+        "pool_wait_max_ms": round(_stats["pool_wait_max_ms"], 3),
+    }
+
+
+register_metrics("backend_http_pool", get_pool_stats)
@@ -0,0 +1,124 @@
+"""Incremental parsing of large JSON list responses."""
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+# Drop consumed text once this many characters have been parsed
+_COMPACT_AFTER = 64 * 1024
+
+
+class _StreamBuffer:
+    """Text buffer fed from an async iterator of chunks."""
+
+    def __init__(self, chunks: AsyncIterator[str]):
+        self._chunks = chunks
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    async def fill(self) -> bool:
+        """Read the next chunk. Returns False at end of stream."""
+        if self.eof:
+            return False
+        if self.pos > _COMPACT_AFTER:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        try:
+            self.text += await self._chunks.__anext__()
+        except StopAsyncIteration:
+            self.eof = True
+            return False
+        return True
+
+    async def peek(self) -> str:
+        """Next non-whitespace character ('' at end of stream)."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not await self.fill():
+                return ""
+
+    async def expect(self, char: str) -> None:
+        """Consume one expected structural character."""
+        found = await self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON stream, found {found!r}")
+        self.pos += 1
+
+    async def decode(self) -> Any:
+        """Decode one complete JSON value at the current position."""
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if await self.fill():
+                    continue
+                raise
+            # A number at the very end of the buffer may continue in the next chunk
+            if (
+                end == len(self.text)
+                and isinstance(value, (int, float))
+                and not isinstance(value, bool)
+                and await self.fill()
+            ):
+                continue
+            self.pos = end
+            return value
+
+
+async def iter_json_array(
+    chunks: AsyncIterator[str],
+    key: str,
+    meta: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[Any]:
+    """
+    Lazily yield the items of one array inside a top-level JSON object.
+
+    Only one item is materialized at a time, so memory stays flat no
+    matter how long the array is. Other top-level fields are decoded
+    into meta (e.g. a pagination cursor), including those that follow
+    the array once iteration completes.
+
+    Args:
+        chunks: Async iterator of response text chunks
+        key: Top-level key holding the array (e.g. "tasks")
+        meta: Optional dict receiving the other top-level fields
+
+    Yields:
+        Array items in order
+    """
+    buffer = _StreamBuffer(chunks)
+    await buffer.expect("{")
+    first = True
+
+    while True:
+        if await buffer.peek() == "}":
+            return
+        if not first:
+            await buffer.expect(",")
+            await buffer.peek()
+        first = False
+
+        name = await buffer.decode()
+        await buffer.expect(":")
+
+        if name == key and await buffer.peek() == "[":
+            buffer.pos += 1
+            first_item = True
+            while await buffer.peek() != "]":
+                if not first_item:
+                    await buffer.expect(",")
+                    await buffer.peek()
+                first_item = False
+                yield await buffer.decode()
+            buffer.pos += 1
+            continue
+
+        await buffer.peek()
+        value = await buffer.decode()
+        if meta is not None:
+            meta[name] = value
@@ -0,0 +1,324 @@
+"""Durable SQLite outbox for side effects of handled requests."""
+import asyncio
+import contextvars
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+try:
+    from ..config import settings
+    from ..metrics import register_metrics
+    from .side_effects import side_effects
+except ImportError:
+    from config import settings
+    from metrics import register_metrics
+    from tools.side_effects import side_effects
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    delivered_at REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (status, available_at);
+"""
+
+# (idempotency key, kind, payload)
+OutboxEntry = Tuple[str, str, Dict[str, Any]]
+
+
+class Outbox:
+    """
+    Write-ahead outbox backed by a local SQLite file.
+
+    Side effects are recorded before the request is acknowledged and
+    delivered afterwards by a drain loop, so they survive a crash or a
+    backend outage (at-least-once delivery). Each entry has an
+    idempotency key; recording the same key again (a replayed request)
+    is a no-op.
+
+    The drain loop claims due entries in batches, leasing them for
+    `lease_seconds`, and hands each to the side-effect dispatcher.
+    Successful deliveries are acknowledged in batches; anything not
+    acknowledged when its lease expires is claimed again, until
+    `max_attempts` is reached. Deliveries failing permanently (an error
+    other than a degraded backend, e.g. a 4xx or a bad payload) are
+    marked dead without waiting for their remaining attempts.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int,
+        poll_seconds: float,
+        lease_seconds: float,
+        max_attempts: int,
+        retention_seconds: float
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._acked: List[int] = []
+        self._failed: List[int] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stats = {"recorded": 0, "duplicates": 0, "claimed": 0, "delivered": 0, "dead": 0, "errors": 0}
+
+    def register_handler(self, kind: str, handler: Callable[[Dict[str, Any]], Awaitable[Any]]) -> None:
+        """Register the coroutine function delivering entries of a kind."""
+        self._handlers[kind] = handler
+
+    # SQLite access (runs in a worker thread)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _insert(self, entries: List[OutboxEntry]) -> int:
+        now = time.time()
+        with self._db_lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                inserted = 0
+                for key, kind, payload in entries:
+                    cursor = conn.execute(
+                        "INSERT OR IGNORE INTO outbox (idempotency_key, kind, payload, available_at, created_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (key, kind, json.dumps(payload), now, now)
+                    )
+                    inserted += cursor.rowcount
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return inserted
+
+    def _claim(self) -> List[Tuple[int, str, Dict[str, Any], int]]:
+        now = time.time()
+        with self._db_lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                dead = conn.execute(
+                    "UPDATE outbox SET status = 'dead' "
+                    "WHERE status = 'pending' AND available_at <= ? AND attempts >= ?",
+                    (now, self.max_attempts)
+                ).rowcount
+                rows = conn.execute(
+                    "SELECT id, kind, payload, attempts FROM outbox "
+                    "WHERE status = 'pending' AND available_at <= ? ORDER BY id LIMIT ?",
+                    (now, self.batch_size)
+                ).fetchall()
+                conn.executemany(
+                    "UPDATE outbox SET attempts = attempts + 1, available_at = ? WHERE id = ?",
+                    [(now + self.lease_seconds, row[0]) for row in rows]
+                )
+                conn.execute(
+                    "DELETE FROM outbox WHERE status = 'delivered' AND delivered_at < ?",
+                    (now - self.retention_seconds,)
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        self._stats["dead"] += dead
+        if dead:
+            print(f"Outbox: {dead} entries exceeded {self.max_attempts} attempts and were given up")
+        return [(row[0], row[1], json.loads(row[2]), row[3] + 1) for row in rows]
+
+    def _ack(self, ids: List[int]) -> None:
+        now = time.time()
+        with self._db_lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "UPDATE outbox SET status = 'delivered', delivered_at = ? WHERE id = ?",
+                    [(now, entry_id) for entry_id in ids]
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _mark_dead(self, ids: List[int]) -> None:
+        with self._db_lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "UPDATE outbox SET status = 'dead' WHERE id = ? AND status = 'pending'",
+                    [(entry_id,) for entry_id in ids]
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _pending_count(self) -> int:
+        with self._db_lock:
+            return self._connect().execute(
+                "SELECT COUNT(*) FROM outbox WHERE status = 'pending'"
+            ).fetchone()[0]
+
+    # Async API
+
+    async def record(self, entries: List[OutboxEntry]) -> int:
+        """
+        Durably record side effects (one transaction) and wake the drain loop.
+
+        Args:
+            entries: (idempotency key, kind, payload) tuples
+
+        Returns:
+            Number of new entries (replayed keys are ignored)
+        """
+        inserted = await asyncio.to_thread(self._insert, entries)
+        self._stats["recorded"] += inserted
+        self._stats["duplicates"] += len(entries) - inserted
+        self.start()
+        self._wakeup.set()
+        return inserted
+
+    def start(self) -> None:
+        """Start the drain loop on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._task = contextvars.Context().run(loop.create_task, self._drain_loop())
+
+    async def stop(self) -> None:
+        """Stop claiming new entries. Entries already handed off keep running."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def close(self) -> None:
+        """Acknowledge finished deliveries and close the database."""
+        await self._flush_acks()
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    async def _flush_acks(self) -> None:
+        if self._acked:
+            ids, self._acked = self._acked, []
+            try:
+                await asyncio.to_thread(self._ack, ids)
+            except Exception as e:
+                # Unacknowledged entries are redelivered after their lease
+                self._stats["errors"] += 1
+                print(f"Error acknowledging outbox entries: {e}")
+            else:
+                self._stats["delivered"] += len(ids)
+        if self._failed:
+            ids, self._failed = self._failed, []
+            try:
+                await asyncio.to_thread(self._mark_dead, ids)
+            except Exception as e:
+                self._stats["errors"] += 1
+                print(f"Error marking outbox entries dead: {e}")
+            else:
+                self._stats["dead"] += len(ids)
+                print(f"Outbox: {len(ids)} entries failed permanently and were given up")
+
+    async def _drain_loop(self) -> None:
+        while True:
+            # Cleared before claiming so records arriving meanwhile aren't missed
+            self._wakeup.clear()
+            try:
+                await self._flush_acks()
+                batch = await asyncio.to_thread(self._claim)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._stats["errors"] += 1
+                print(f"Error draining outbox: {e}")
+                batch = []
+
+            self._stats["claimed"] += len(batch)
+            for entry_id, kind, payload, attempt in batch:
+                handler = self._handlers.get(kind)
+                if handler is None:
+                    print(f"Outbox: no handler for {kind}; will retry after lease")
+                    continue
+                side_effects.submit(
+                    f"outbox:{kind}",
+                    self._delivery(entry_id, handler, payload),
+                    on_permanent_failure=self._give_up(entry_id)
+                )
+
+            if len(batch) < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+    def _delivery(
+        self,
+        entry_id: int,
+        handler: Callable[[Dict[str, Any]], Awaitable[Any]],
+        payload: Dict[str, Any]
+    ) -> Callable[[], Awaitable[None]]:
+        """Job for the dispatcher: deliver, then queue the acknowledgement."""
+        async def deliver() -> None:
+            await handler(payload)
+            self._acked.append(entry_id)
+            self._wakeup.set()
+        return deliver
+
+    def _give_up(self, entry_id: int) -> Callable[[Exception], None]:
+        """Failure callback for the dispatcher: queue marking the entry dead."""
+        def give_up(error: Exception) -> None:
+            self._failed.append(entry_id)
+            self._wakeup.set()
+        return give_up
+
+    def stats(self) -> Dict[str, Any]:
+        """Delivery counters plus the current pending backlog."""
+        try:
+            pending = self._pending_count() if self._conn is not None else None
+        except sqlite3.Error:
+            pending = None
+        return {"pending": pending, "awaiting_ack": len(self._acked), **self._stats}
+
+
+outbox = Outbox(
+    path=settings.outbox_path,
+    batch_size=settings.outbox_batch_size,
+    poll_seconds=settings.outbox_poll_seconds,
+    lease_seconds=settings.outbox_lease_seconds,
+    max_attempts=settings.outbox_max_attempts,
+    retention_seconds=settings.outbox_retention_seconds,
+)
+
+register_metrics("outbox", outbox.stats)
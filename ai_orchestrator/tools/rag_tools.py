@@ -1,4 +1,5 @@
 """RAG tools for vector search and context retrieval."""
+import asyncio
 from typing import List, Dict, Any, Optional
 from langchain.tools import tool
 from pymongo import MongoClient
@@ -74,7 +75,8 @@ async def search_workspace_context(
             }
         ]
         
-        results = list(collection.aggregate(pipeline))
+        # pymongo is blocking: run it off the event loop
+        results = await asyncio.to_thread(lambda: list(collection.aggregate(pipeline)))
         return results
     except Exception as e:
         print(f"Error in vector search: {e}")
@@ -124,9 +126,85 @@ async def index_workspace_context(
             "embedding": embedding or []  # Would need to generate embedding
         }
         
-        result = collection.insert_one(doc)
+        result = await asyncio.to_thread(collection.insert_one, doc)
         return {"success": True, "id": str(result.inserted_id)}
     except Exception as e:
         print(f"Error indexing context: {e}")
         return {"success": False, "reason": str(e)}
 
+
+
+async def get_indexed_content_hashes(
+    workspace_id: str,
+    content_hashes: List[str]
+) -> List[str]:
+    """
+    Find which content hashes are already indexed for a workspace.
+    
+    Args:
+        workspace_id: The workspace ID
+        content_hashes: Hashes stored as metadata.contentHash when indexing
+    
+    Returns:
+        The subset of content_hashes already present
+    """
+    if not settings.mongodb_uri or not content_hashes:
+        return []
+    
+    try:
+        client = get_mongo_client()
+        if not client:
+            return []
+        
+        collection = client.get_database()[settings.vector_search_collection]
+        query = {"workspaceId": workspace_id, "metadata.contentHash": {"$in": content_hashes}}
+        docs = await asyncio.to_thread(
+            lambda: list(collection.find(query, {"metadata.contentHash": 1}))
+        )
+        return [doc["metadata"]["contentHash"] for doc in docs]
+    except Exception as e:
+        print(f"Error checking indexed context: {e}")
+        return []
+
+
+async def index_workspace_contexts(
+    workspace_id: str,
+    documents: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Index several workspace context documents in one write.
+    
+    Args:
+        workspace_id: The workspace ID
+        documents: Items with text, context_type, metadata (optional)
+            and embedding (optional)
+    
+    Returns:
+        Indexed document IDs
+    """
+    if not settings.mongodb_uri:
+        return {"success": False, "reason": "MongoDB not configured"}
+    if not documents:
+        return {"success": True, "ids": []}
+    
+    try:
+        client = get_mongo_client()
+        if not client:
+            return {"success": False, "reason": "MongoDB client not available"}
+        
+        collection = client.get_database()[settings.vector_search_collection]
+        docs = [
+            {
+                "workspaceId": workspace_id,
+                "type": d.get("context_type", "general"),
+                "text": d.get("text", ""),
+                "metadata": d.get("metadata") or {},
+                "embedding": d.get("embedding") or []  # Would need to generate embedding
+            }
+            for d in documents
+        ]
+        result = await asyncio.to_thread(collection.insert_many, docs)
+        return {"success": True, "ids": [str(i) for i in result.inserted_ids]}
+    except Exception as e:
+        print(f"Error indexing context: {e}")
+        return {"success": False, "reason": str(e)}
@@ -0,0 +1,107 @@
+"""Request-scoped memoization of backend reads."""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+try:
+    from ..metrics import register_metrics
+except ImportError:
+    from metrics import register_metrics
+
+
+class RequestCache:
+    """
+    Memoizes backend reads for the lifetime of one API request.
+
+    Entries are stored as futures so concurrent lookups of the same key
+    inside a request share a single fetch. Failed fetches are not cached.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Hashable, asyncio.Future] = {}
+
+    async def get_or_fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Return the cached result for key, fetching it on first use."""
+        future = self._entries.get(key)
+        if future is not None:
+            self.hits += 1
+            return await asyncio.shield(future)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._entries[key] = future
+        try:
+            result = await fetch()
+        except asyncio.CancelledError:
+            self._entries.pop(key, None)
+            future.cancel()
+            raise
+        except Exception as e:
+            self._entries.pop(key, None)
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure is not logged
+            future.exception()
+            raise
+        future.set_result(result)
+        return result
+
+    def clear(self) -> None:
+        """Drop all entries (after a write in the same request)."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counts for this request."""
+        return {"hits": self.hits, "misses": self.misses}
+
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar[Optional[RequestCache]] = ContextVar("backend_request_cache", default=None)
+
+# Aggregated hit/miss counts per endpoint
+_totals: Dict[str, Dict[str, int]] = {}
+
+
+def current_request_cache() -> Optional[RequestCache]:
+    """Get the cache for the request being served, if any."""
+    return _current.get()
+
+
+@asynccontextmanager
+async def request_scope(name: str):
+    """
+    Open a request-scoped read cache for the duration of a graph run.
+
+    The request's hits and misses are logged at INFO when the scope
+    exits and added to the per-endpoint totals in /ai/metrics.
+
+    Args:
+        name: Endpoint name used when reporting hits and misses
+    """
+    cache = RequestCache(name)
+    token = _current.set(cache)
+    try:
+        yield cache
+    finally:
+        _current.reset(token)
+        totals = _totals.setdefault(name, {"requests": 0, "hits": 0, "misses": 0})
+        totals["requests"] += 1
+        totals["hits"] += cache.hits
+        totals["misses"] += cache.misses
+        logger.info("backend_read_cache endpoint=%s hits=%d misses=%d", name, cache.hits, cache.misses)
+
+
+def get_request_cache_stats() -> Dict[str, Any]:
+    """Aggregated request-cache hit/miss counts per endpoint."""
+    return {name: dict(totals) for name, totals in _totals.items()}
+
+
+register_metrics("backend_request_cache", get_request_cache_stats)
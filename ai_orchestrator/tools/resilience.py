@@ -0,0 +1,200 @@
+"""Timeouts, retries and circuit breaking for backend calls."""
+import asyncio
+import random
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+import httpx
+try:
+    from ..config import settings
+    from ..metrics import register_metrics
+except ImportError:
+    from config import settings
+    from metrics import register_metrics
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because its circuit is open."""
+
+
+def route_key(method: str, endpoint: str) -> str:
+    """
+    Normalize a request to a route key, replacing IDs with "{id}".
+
+    Path segments made only of lowercase letters, "_" and "-" are kept
+    (e.g. "tasks", "my"); anything else is treated as an ID.
+
+    Example:
+        route_key("GET", "/api/workspaces/65f0a1/tasks") -> "GET /api/workspaces/{id}/tasks"
+    """
+    segments = [
+        segment if re.fullmatch(r"[a-z_-]*", segment) else "{id}"
+        for segment in endpoint.split("?")[0].split("/")
+    ]
+    return f"{method.upper()} {'/'.join(segments)}"
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Closed: calls pass. After failure_threshold consecutive failures the
+    breaker opens and rejects calls for reset_timeout seconds, then lets
+    a single probe through (half-open). A successful probe closes it; a
+    failed one opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self.rejected = 0
+        self._probe_in_flight = False
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError if the call should fail fast."""
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                raise CircuitOpenError(f"Circuit open for {self.name}")
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._probe_in_flight:
+                self.rejected += 1
+                raise CircuitOpenError(f"Circuit half-open for {self.name}, probe in flight")
+            self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        """Record a successful call."""
+        self._probe_in_flight = False
+        self.consecutive_failures = 0
+        self.state = "closed"
+
+    def record_failure(self) -> None:
+        """Record a failed call, tripping the breaker when needed."""
+        self._probe_in_flight = False
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.trips += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Release a probe slot without recording an outcome (e.g. on cancellation)."""
+        self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        """Breaker state and counters."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_retry_stats = {"retries": 0, "retries_exhausted": 0}
+
+
+def get_breaker(route: str) -> CircuitBreaker:
+    """Get (or create) the breaker for a route."""
+    breaker = _breakers.get(route)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            route,
+            failure_threshold=settings.backend_breaker_failure_threshold,
+            reset_timeout=settings.backend_breaker_reset_seconds,
+        )
+        _breakers[route] = breaker
+    return breaker
+
+
+def timeout_for(method: str, route: str) -> float:
+    """Per-endpoint timeout: explicit override, else the read/write default."""
+    override = settings.backend_endpoint_timeouts.get(route)
+    if override is not None:
+        return override
+    if method.upper() == "GET":
+        return settings.backend_read_timeout
+    return settings.backend_write_timeout
+
+
+def is_backend_failure(error: Exception) -> bool:
+    """Whether an error indicates a degraded backend (vs. a client error)."""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    return isinstance(error, httpx.TransportError)
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff."""
+    cap = min(settings.backend_retry_max_delay, settings.backend_retry_base_delay * (2 ** attempt))
+    return random.uniform(0, cap)
+
+
+async def call_with_resilience(
+    method: str,
+    endpoint: str,
+    call: Callable[[float], Awaitable[Any]],
+    timeout: Optional[float] = None
+) -> Any:
+    """
+    Run a backend call behind its route's circuit breaker.
+
+    Idempotent GETs are retried with jittered backoff on backend
+    failures; writes are attempted once.
+
+    Args:
+        method: HTTP method
+        endpoint: Request path
+        call: Coroutine function performing the request with a timeout
+        timeout: Explicit timeout overriding the per-endpoint default
+
+    Returns:
+        The call's result
+    """
+    route = route_key(method, endpoint)
+    breaker = get_breaker(route)
+    attempts = 1 + (settings.backend_retry_attempts if method.upper() == "GET" else 0)
+    call_timeout = timeout if timeout is not None else timeout_for(method, route)
+
+    for attempt in range(attempts):
+        breaker.before_call()
+        try:
+            result = await call(call_timeout)
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            if not is_backend_failure(e):
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if attempt + 1 >= attempts:
+                if attempts > 1:
+                    _retry_stats["retries_exhausted"] += 1
+                raise
+            _retry_stats["retries"] += 1
+            await asyncio.sleep(_backoff_delay(attempt))
+            continue
+        breaker.record_success()
+        return result
+
+
+def get_resilience_stats() -> Dict[str, Any]:
+    """Breaker state per route plus retry counters."""
+    return {
+        **_retry_stats,
+        "open_circuits": sum(1 for b in _breakers.values() if b.state == "open"),
+        "breakers": {route: b.stats() for route, b in _breakers.items()},
+    }
+
+
+register_metrics("backend_resilience", get_resilience_stats)
@@ -0,0 +1,151 @@
+"""Background dispatcher for side effects that callers don't wait on."""
+import asyncio
+import contextvars
+import random
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+try:
+    from ..config import settings
+    from ..metrics import register_metrics
+    from .resilience import CircuitOpenError, is_backend_failure
+except ImportError:
+    from config import settings
+    from metrics import register_metrics
+    from tools.resilience import CircuitOpenError, is_backend_failure
+
+
+# (job name, coroutine function, callback for a permanent failure)
+_Job = Tuple[str, Callable[[], Awaitable[Any]], Optional[Callable[[Exception], None]]]
+
+
+class SideEffectDispatcher:
+    """
+    Bounded in-process queue drained by a pool of worker tasks.
+
+    Jobs are independent, so several run concurrently (one per worker).
+    A job failing because the backend is degraded is retried with
+    jittered backoff; other errors are logged and reported to the job's
+    on_permanent_failure callback, if any. When the queue
+    is full, new jobs are rejected rather than blocking the request.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_queue: int,
+        max_attempts: int,
+        retry_base_delay: float
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stats = {"submitted": 0, "completed": 0, "retries": 0, "failed": 0, "rejected": 0}
+
+    def start(self) -> None:
+        """Start the workers on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._tasks and self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        # Workers run in a clean context so no request-scoped state leaks into jobs
+        context = contextvars.Context()
+        self._tasks = [
+            context.run(loop.create_task, self._worker())
+            for _ in range(self.workers)
+        ]
+
+    async def stop(self, timeout: float) -> None:
+        """Let queued jobs finish (up to timeout seconds), then stop the workers."""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"Side-effect queue not drained on shutdown; {self._queue.qsize()} jobs dropped")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._loop = None
+
+    def submit(
+        self,
+        name: str,
+        fn: Callable[[], Awaitable[Any]],
+        on_permanent_failure: Optional[Callable[[Exception], None]] = None
+    ) -> bool:
+        """
+        Queue a side effect without waiting for it.
+
+        Args:
+            name: Job name, for logs
+            fn: Coroutine function performing the side effect
+            on_permanent_failure: Called with the error when the job fails
+                in a way retrying won't fix (not a degraded backend)
+
+        Returns:
+            True if queued, False if the queue is full
+        """
+        self.start()
+        try:
+            self._queue.put_nowait((name, fn, on_permanent_failure))
+        except asyncio.QueueFull:
+            self._stats["rejected"] += 1
+            print(f"Side-effect queue full; dropping {name}")
+            return False
+        self._stats["submitted"] += 1
+        return True
+
+    async def _worker(self) -> None:
+        queue = self._queue
+        while True:
+            job = await queue.get()
+            try:
+                await self._run(job)
+            finally:
+                queue.task_done()
+
+    async def _run(self, job: _Job) -> None:
+        name, fn, on_permanent_failure = job
+        for attempt in range(self.max_attempts):
+            try:
+                await fn()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                retryable = isinstance(e, CircuitOpenError) or is_backend_failure(e)
+                if retryable and attempt + 1 < self.max_attempts:
+                    self._stats["retries"] += 1
+                    await asyncio.sleep(random.uniform(0, self.retry_base_delay * (2 ** attempt)))
+                    continue
+                self._stats["failed"] += 1
+                print(f"Error running side effect {name}: {e}")
+                if not retryable and on_permanent_failure is not None:
+                    on_permanent_failure(e)
+                return
+            self._stats["completed"] += 1
+            return
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and job counters."""
+        return {
+            "workers": len(self._tasks),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            **self._stats,
+        }
+
+
+side_effects = SideEffectDispatcher(
+    workers=settings.side_effect_workers,
+    max_queue=settings.side_effect_queue_size,
+    max_attempts=settings.side_effect_max_attempts,
+    retry_base_delay=settings.side_effect_retry_base_delay,
+)
+
+register_metrics("side_effects", side_effects.stats)
@@ -0,0 +1,52 @@
+"""Single-flight coalescing of identical in-flight backend requests."""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+try:
+    from ..metrics import register_metrics
+except ImportError:
+    from metrics import register_metrics
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one upstream call.
+
+    The first caller for a key starts the call; callers arriving while it
+    is in flight await the same result (or exception). The upstream call
+    runs as its own task, so one caller being cancelled does not cancel
+    it for the others.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self._stats = {"calls": 0, "upstream_calls": 0, "collapsed": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn for key, or join the identical call already in flight."""
+        self._stats["calls"] += 1
+        task = self._in_flight.get(key)
+        if task is not None:
+            self._stats["collapsed"] += 1
+        else:
+            self._stats["upstream_calls"] += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        """Forget a finished call."""
+        self._in_flight.pop(key, None)
+        if not task.cancelled():
+            # Mark retrieved in case every caller was cancelled
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Collapse counters."""
+        return {"in_flight": len(self._in_flight), **self._stats}
+
+
+# Shared instance for backend GETs
+backend_single_flight = SingleFlight()
+
+register_metrics("backend_single_flight", backend_single_flight.stats)
@@ -0,0 +1,286 @@
+"""Incrementally maintained workspace statistics fed by backend events."""
+import asyncio
+import bisect
+import contextvars
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+try:
+    from ..config import settings
+    from ..metrics import register_metrics
+    from .workspace_stats import DONE_STATUS, build_stats, parse_due_date, task_assignee_id
+except ImportError:
+    from config import settings
+    from metrics import register_metrics
+    from tools.workspace_stats import DONE_STATUS, build_stats, parse_due_date, task_assignee_id
+
+
+# (status, priority, assignee_id, due timestamp)
+_TaskRow = Tuple[str, str, Optional[str], Optional[float]]
+
+
+class WorkspaceStatsView:
+    """
+    Materialized statistics for one workspace.
+
+    Keeps a compact row per task plus running aggregates, so applying an
+    event and reading a snapshot are both O(1) in the number of tasks
+    (overdue counting is a bisect over open due dates).
+    """
+
+    def __init__(self):
+        self.tasks: Dict[str, _TaskRow] = {}
+        self.member_roles: Dict[str, str] = {}
+        self.priority_by_status: Counter = Counter()
+        self.open_by_assignee: Counter = Counter()
+        self.members_by_role: Counter = Counter()
+        self.unassigned_open = 0
+        # Sorted (due timestamp, task_id) for open tasks with a due date
+        self.open_due: List[Tuple[float, str]] = []
+        self.built_at = time.monotonic()
+
+    def _remove_task(self, task_id: str) -> None:
+        row = self.tasks.pop(task_id, None)
+        if row is None:
+            return
+        status, priority, assignee, due = row
+        self.priority_by_status[(priority, status)] -= 1
+        if status != DONE_STATUS:
+            if assignee:
+                self.open_by_assignee[assignee] -= 1
+            else:
+                self.unassigned_open -= 1
+            if due is not None:
+                index = bisect.bisect_left(self.open_due, (due, task_id))
+                if index < len(self.open_due) and self.open_due[index] == (due, task_id):
+                    self.open_due.pop(index)
+
+    def upsert_task(self, task: Dict[str, Any]) -> None:
+        """Add or replace a task."""
+        task_id = str(task.get("_id", ""))
+        if not task_id:
+            return
+        self._remove_task(task_id)
+
+        due_date = parse_due_date(task.get("dueDate"))
+        row = (
+            task.get("status", "todo"),
+            task.get("priority", "P2"),
+            task_assignee_id(task),
+            due_date.timestamp() if due_date else None,
+        )
+        status, priority, assignee, due = row
+        self.tasks[task_id] = row
+        self.priority_by_status[(priority, status)] += 1
+        if status != DONE_STATUS:
+            if assignee:
+                self.open_by_assignee[assignee] += 1
+            else:
+                self.unassigned_open += 1
+            if due is not None:
+                bisect.insort(self.open_due, (due, task_id))
+
+    def delete_task(self, task_id: str) -> None:
+        """Remove a task."""
+        self._remove_task(str(task_id))
+
+    def upsert_member(self, member: Dict[str, Any]) -> None:
+        """Add or replace a member."""
+        member_id = str(member.get("_id", ""))
+        if not member_id:
+            return
+        self.remove_member(member_id)
+        role = member.get("role", "crew")
+        self.member_roles[member_id] = role
+        self.members_by_role[role] += 1
+
+    def remove_member(self, member_id: str) -> None:
+        """Remove a member."""
+        role = self.member_roles.pop(str(member_id), None)
+        if role is not None:
+            self.members_by_role[role] -= 1
+
+    def apply_event(self, event: Dict[str, Any]) -> None:
+        """Apply one task or member event."""
+        event_type = event.get("type")
+        if event_type in ("task.created", "task.updated"):
+            self.upsert_task(event.get("task") or {})
+        elif event_type == "task.deleted":
+            self.delete_task(event.get("task_id") or (event.get("task") or {}).get("_id", ""))
+        elif event_type in ("member.added", "member.updated"):
+            self.upsert_member(event.get("member") or {})
+        elif event_type == "member.removed":
+            self.remove_member(event.get("member_id") or (event.get("member") or {}).get("_id", ""))
+
+    def snapshot(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Current statistics, in the same shape as compute_workspace_stats."""
+        now_ts = (now or datetime.now(timezone.utc)).timestamp()
+        overdue = bisect.bisect_left(self.open_due, (now_ts, ""))
+        return build_stats(
+            priority_by_status=self.priority_by_status,
+            open_by_assignee=self.open_by_assignee,
+            unassigned_open_tasks=self.unassigned_open,
+            overdue_tasks=overdue,
+            members_by_role=self.members_by_role,
+        )
+
+
+class _WorkspaceEntry:
+    """View plus bookkeeping for one event-fed workspace."""
+
+    def __init__(self):
+        self.view: Optional[WorkspaceStatsView] = None
+        self.needs_reconcile = True
+        self.reconcile_task: Optional[asyncio.Task] = None
+        # Events received while a reconcile is rebuilding the view
+        self.pending: Optional[List[Dict[str, Any]]] = None
+        self.last_seq: Optional[int] = None
+
+
+class StatsViewRegistry:
+    """
+    Event-fed stats views, one per workspace that the backend pushes to.
+
+    A workspace gets a view once its first event arrives. The view is
+    rebuilt from a full fetch on first read, when a sequence gap is
+    detected, and every `reconcile_seconds` (in the background).
+    """
+
+    def __init__(self, max_workspaces: int, reconcile_seconds: float):
+        self.max_workspaces = max_workspaces
+        self.reconcile_seconds = reconcile_seconds
+        self._entries: "OrderedDict[str, _WorkspaceEntry]" = OrderedDict()
+        self._stats = {"events": 0, "duplicate_events": 0, "gaps": 0, "reads": 0, "reconciles": 0, "reconcile_errors": 0}
+
+    def _entry(self, workspace_id: str) -> _WorkspaceEntry:
+        entry = self._entries.get(workspace_id)
+        if entry is None:
+            entry = _WorkspaceEntry()
+            self._entries[workspace_id] = entry
+            while len(self._entries) > self.max_workspaces:
+                self._entries.popitem(last=False)
+        self._entries.move_to_end(workspace_id)
+        return entry
+
+    def apply_events(self, workspace_id: str, events: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Apply a batch of events for a workspace.
+
+        Events carrying a `seq` are checked for ordering: replays are
+        skipped and a gap marks the view for reconciliation.
+
+        Returns:
+            Counts of applied and skipped events
+        """
+        entry = self._entry(workspace_id)
+        applied = skipped = 0
+        for event in events:
+            self._stats["events"] += 1
+            seq = event.get("seq")
+            if seq is not None and entry.last_seq is not None:
+                if seq <= entry.last_seq:
+                    self._stats["duplicate_events"] += 1
+                    skipped += 1
+                    continue
+                if seq != entry.last_seq + 1:
+                    self._stats["gaps"] += 1
+                    entry.needs_reconcile = True
+            if seq is not None:
+                entry.last_seq = seq
+
+            if entry.pending is not None:
+                entry.pending.append(event)
+            if entry.view is not None:
+                entry.view.apply_event(event)
+            applied += 1
+        return {"applied": applied, "skipped": skipped}
+
+    def is_tracked(self, workspace_id: str) -> bool:
+        """Whether the backend pushes events for this workspace."""
+        return workspace_id in self._entries
+
+    async def get_stats(
+        self,
+        workspace_id: str,
+        load: Callable[[WorkspaceStatsView], Awaitable[None]]
+    ) -> Dict[str, Any]:
+        """
+        Read stats from the view, reconciling first when required.
+
+        Args:
+            workspace_id: The workspace ID
+            load: Coroutine function filling a fresh view from a full fetch
+        """
+        entry = self._entry(workspace_id)
+        self._stats["reads"] += 1
+        if entry.view is None or entry.needs_reconcile:
+            await self._reconcile(entry, load)
+        elif time.monotonic() - entry.view.built_at > self.reconcile_seconds:
+            self._schedule_reconcile(entry, load)
+        return entry.view.snapshot()
+
+    async def _reconcile(
+        self,
+        entry: _WorkspaceEntry,
+        load: Callable[[WorkspaceStatsView], Awaitable[None]]
+    ) -> None:
+        """Rebuild a view from a full fetch (shared by concurrent readers)."""
+        if entry.reconcile_task is None:
+            # Clean context: the rebuild is shared, so one reader's request
+            # deadline must not cut it short for the others
+            loop = asyncio.get_running_loop()
+            entry.reconcile_task = contextvars.Context().run(loop.create_task, self._rebuild(entry, load))
+        await asyncio.shield(entry.reconcile_task)
+
+    def _schedule_reconcile(
+        self,
+        entry: _WorkspaceEntry,
+        load: Callable[[WorkspaceStatsView], Awaitable[None]]
+    ) -> None:
+        """Rebuild a view in the background while the old one keeps serving."""
+        if entry.reconcile_task is None:
+            loop = asyncio.get_running_loop()
+            entry.reconcile_task = contextvars.Context().run(loop.create_task, self._rebuild(entry, load))
+            entry.reconcile_task.add_done_callback(self._log_background_error)
+
+    @staticmethod
+    def _log_background_error(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Error reconciling workspace stats view: {task.exception()}")
+
+    async def _rebuild(
+        self,
+        entry: _WorkspaceEntry,
+        load: Callable[[WorkspaceStatsView], Awaitable[None]]
+    ) -> None:
+        entry.pending = []
+        entry.needs_reconcile = False
+        try:
+            view = WorkspaceStatsView()
+            await load(view)
+            # Events that raced the fetch are re-applied; upserts and
+            # deletes converge on the latest state either way
+            for event in entry.pending:
+                view.apply_event(event)
+            entry.view = view
+            self._stats["reconciles"] += 1
+        except Exception:
+            self._stats["reconcile_errors"] += 1
+            entry.needs_reconcile = True
+            raise
+        finally:
+            entry.pending = None
+            entry.reconcile_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Event and reconciliation counters."""
+        return {"workspaces": len(self._entries), **self._stats}
+
+
+stats_views = StatsViewRegistry(
+    max_workspaces=settings.stats_view_max_workspaces,
+    reconcile_seconds=settings.stats_view_reconcile_seconds,
+)
+
+register_metrics("workspace_stats_views", stats_views.stats)
@@ -0,0 +1,264 @@
+"""Single-pass workspace statistics engine."""
+from array import array
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+try:
+    from ..config import settings
+except ImportError:
+    from config import settings
+
+try:
+    import numpy as np
+except ImportError:  # Optional: falls back to pure-Python counting
+    np = None
+
+
+DONE_STATUS = "done"
+
+
+def parse_due_date(value: Any) -> Optional[datetime]:
+    """Parse an ISO-8601 due date (as sent by the backend) to an aware datetime."""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def task_assignee_id(task: Dict[str, Any]) -> Optional[str]:
+    """Get the assignee ID of a task (plain ID or populated user object)."""
+    assignee = task.get("assigneeId") or task.get("assignee")
+    if isinstance(assignee, dict):
+        assignee = assignee.get("_id")
+    return str(assignee) if assignee else None
+
+
+class _Vocabulary:
+    """Maps category strings to dense integer codes."""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+
+class WorkspaceStatsAccumulator:
+    """
+    Accumulates workspace statistics in a single pass over tasks.
+
+    Each task is encoded into small integer columns (status, priority,
+    assignee, overdue). Columns are flushed every `chunk_size` tasks;
+    with NumPy available a flush is a handful of vectorized bincounts,
+    otherwise a Counter pass. Memory stays bounded by the chunk size and
+    the number of distinct categories, so it works over a streamed
+    listing of any length.
+    """
+
+    def __init__(self, now: Optional[datetime] = None, chunk_size: Optional[int] = None):
+        self.now = now or datetime.now(timezone.utc)
+        self.chunk_size = chunk_size or settings.stats_chunk_size
+        self._statuses = _Vocabulary()
+        self._priorities = _Vocabulary()
+        self._assignees = _Vocabulary()
+        self._reset_columns()
+
+        self.total_tasks = 0
+        self.overdue_tasks = 0
+        self.unassigned_open_tasks = 0
+        self.priority_by_status: Counter = Counter()
+        self.open_by_assignee: Counter = Counter()
+
+    def _reset_columns(self) -> None:
+        self._status_col = array("i")
+        self._priority_col = array("i")
+        self._assignee_col = array("i")
+        self._overdue_col = array("b")
+
+    def add(self, task: Dict[str, Any]) -> None:
+        """Count one task."""
+        status = task.get("status", "todo")
+        assignee = task_assignee_id(task)
+        overdue = 0
+        if status != DONE_STATUS:
+            due = parse_due_date(task.get("dueDate"))
+            overdue = int(due is not None and due < self.now)
+
+        self._status_col.append(self._statuses.code(status))
+        self._priority_col.append(self._priorities.code(task.get("priority", "P2")))
+        self._assignee_col.append(self._assignees.code(assignee) if assignee else -1)
+        self._overdue_col.append(overdue)
+        if len(self._status_col) >= self.chunk_size:
+            self._flush()
+
+    def add_many(self, tasks: Iterable[Dict[str, Any]]) -> None:
+        """Count many tasks."""
+        for task in tasks:
+            self.add(task)
+
+    def _flush(self) -> None:
+        """Fold the buffered columns into the running aggregates."""
+        count = len(self._status_col)
+        if not count:
+            return
+        done_code = self._statuses.codes.get(DONE_STATUS, -1)
+
+        if np is not None:
+            status = np.frombuffer(self._status_col, dtype=np.intc)
+            priority = np.frombuffer(self._priority_col, dtype=np.intc)
+            assignee = np.frombuffer(self._assignee_col, dtype=np.intc)
+            overdue = np.frombuffer(self._overdue_col, dtype=np.int8)
+
+            n_status = len(self._statuses.values)
+            crosstab = np.bincount(priority * n_status + status)
+            for combined in np.flatnonzero(crosstab):
+                p, s = divmod(int(combined), n_status)
+                self.priority_by_status[(p, s)] += int(crosstab[combined])
+
+            is_open = status != done_code
+            open_assignees = assignee[is_open]
+            assigned = open_assignees[open_assignees >= 0]
+            per_assignee = np.bincount(assigned) if assigned.size else np.zeros(0, dtype=np.int64)
+            for code in np.flatnonzero(per_assignee):
+                self.open_by_assignee[int(code)] += int(per_assignee[code])
+            self.unassigned_open_tasks += int(open_assignees.size - assigned.size)
+            self.overdue_tasks += int(overdue.sum())
+        else:
+            self.priority_by_status.update(zip(self._priority_col, self._status_col))
+            for s, a in zip(self._status_col, self._assignee_col):
+                if s == done_code:
+                    continue
+                if a >= 0:
+                    self.open_by_assignee[a] += 1
+                else:
+                    self.unassigned_open_tasks += 1
+            self.overdue_tasks += sum(self._overdue_col)
+
+        self.total_tasks += count
+        self._reset_columns()
+
+    def result(self, members: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Build the statistics dictionary.
+
+        Args:
+            members: Workspace members (for member counts)
+
+        Returns:
+            Workspace statistics
+        """
+        self._flush()
+        statuses = self._statuses.values
+        priorities = self._priorities.values
+        members = members or []
+        return build_stats(
+            priority_by_status={
+                (priorities[p], statuses[s]): n for (p, s), n in self.priority_by_status.items()
+            },
+            open_by_assignee={
+                self._assignees.values[code]: n for code, n in self.open_by_assignee.items()
+            },
+            unassigned_open_tasks=self.unassigned_open_tasks,
+            overdue_tasks=self.overdue_tasks,
+            members_by_role=Counter(m.get("role", "crew") for m in members),
+        )
+
+
+def build_stats(
+    priority_by_status: Dict[tuple, int],
+    open_by_assignee: Dict[str, int],
+    unassigned_open_tasks: int,
+    overdue_tasks: int,
+    members_by_role: Dict[str, int]
+) -> Dict[str, Any]:
+    """
+    Assemble the statistics dictionary from pre-aggregated counts.
+
+    Args:
+        priority_by_status: Task counts keyed by (priority, status)
+        open_by_assignee: Open task counts keyed by assignee ID
+        unassigned_open_tasks: Open tasks without an assignee
+        overdue_tasks: Open tasks past their due date
+        members_by_role: Member counts keyed by role
+
+    Returns:
+        Workspace statistics
+    """
+    by_status: Counter = Counter()
+    by_priority: Counter = Counter()
+    crosstab: Dict[str, Dict[str, int]] = {}
+    for (priority, status), n in priority_by_status.items():
+        if not n:
+            continue
+        by_status[status] += n
+        by_priority[priority] += n
+        crosstab.setdefault(priority, {})[status] = n
+
+    total_tasks = sum(by_status.values())
+    roles = {role: n for role, n in members_by_role.items() if n}
+    return {
+        "total_tasks": total_tasks,
+        "tasks_by_status": dict(by_status),
+        "tasks_by_priority": dict(by_priority),
+        "total_members": sum(roles.values()),
+        "members_by_role": roles,
+        "open_tasks": total_tasks - by_status.get(DONE_STATUS, 0),
+        "overdue_tasks": overdue_tasks,
+        "unassigned_open_tasks": unassigned_open_tasks,
+        "open_tasks_by_assignee": {a: n for a, n in open_by_assignee.items() if n},
+        "priority_by_status": crosstab,
+    }
+
+
+def compute_workspace_stats(
+    tasks: Iterable[Dict[str, Any]],
+    members: Optional[List[Dict[str, Any]]] = None,
+    now: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Compute workspace statistics in one pass.
+
+    Args:
+        tasks: Task objects (any iterable)
+        members: Workspace members
+        now: Reference time for overdue checks (defaults to now, UTC)
+
+    Returns:
+        Workspace statistics
+    """
+    accumulator = WorkspaceStatsAccumulator(now=now)
+    accumulator.add_many(tasks)
+    return accumulator.result(members)
+
+
+def describe_open_load(stats: Dict[str, Any]) -> str:
+    """
+    Summarize how open work is spread across members without naming anyone.
+
+    Args:
+        stats: Output of compute_workspace_stats
+
+    Returns:
+        One-line description of the open-task distribution
+    """
+    loads = sorted(stats.get("open_tasks_by_assignee", {}).values())
+    idle = max(stats.get("total_members", 0) - len(loads), 0)
+    if not loads:
+        return f"No assigned open tasks; {stats.get('unassigned_open_tasks', 0)} open tasks unassigned"
+    median = loads[len(loads) // 2]
+    return (
+        f"Open tasks per assignee: min {loads[0]}, median {median}, max {loads[-1]}; "
+        f"{idle} members with no open tasks; "
+        f"{stats.get('unassigned_open_tasks', 0)} open tasks unassigned"
+    )